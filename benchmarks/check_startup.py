@@ -0,0 +1,110 @@
+"""Cold-start import check for the Streamlit pages.
+
+    python benchmarks/check_startup.py
+    python benchmarks/check_startup.py --budget-ms 800 --repeat 5
+
+Runs the top-level imports of every page in a fresh interpreter and exits with status 1 when a page loads
+one of the heavy libraries (pandas, NumPy, pyarrow, Altair) at start-up or its imports take longer than the
+budget. It then runs each page once in its default state under Streamlit's AppTest, also in a fresh
+interpreter, and fails if that run raises or loads a heavy library. The import check alone misses imports inside
+blocks that run on every rerun, such as an st.expander body. Features that need those libraries import
+them where they run, behind a widget the user turns on.
+"""
+import argparse
+import ast
+import glob
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PAGES = sorted(glob.glob(str(REPO_ROOT / "home_affordability_calculator*.py"))) + [str(REPO_ROOT / "updated_loan_calculator_app.py")]
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "altair")
+DEFAULT_BUDGET_MS = 1000.0
+
+# Times the page's import statements and reports which heavy modules they pulled in
+MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+{imports}
+print(json.dumps({{"ms": (time.perf_counter() - start) * 1000, "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+# Runs the page once with its default inputs and reports the heavy modules loaded by the run
+RUN = """
+import json, sys
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({page!r}, default_timeout=60)
+loaded = set(sys.modules)
+app.run()
+print(json.dumps({{"heavy": [name for name in {heavy!r} if name in sys.modules and name not in loaded],
+                  "exceptions": [exception.message for exception in app.exception]}}))
+"""
+
+
+# Source of the module-level import statements of a page, in order
+def page_imports(page):
+    source = Path(page).read_text(encoding="utf-8")
+    tree = ast.parse(source)
+    return "\n".join(ast.get_source_segment(source, node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+# Best-of-repeat import time (ms) of one page in a fresh interpreter, plus the heavy modules it loaded
+def measure_page(page, repeat=3):
+    code = MEASURE.format(imports=page_imports(page), heavy=HEAVY_MODULES)
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return min(run["ms"] for run in runs), runs[0]["heavy"]
+
+
+# Heavy modules loaded by a default-state run of the page, and the exceptions it raised
+def trace_page_run(page):
+    code = RUN.format(page=str(page), heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, check=True, capture_output=True, text=True).stdout
+    run = json.loads(output.strip().splitlines()[-1])
+    return run["heavy"], run["exceptions"]
+
+
+# One message per page that loads a heavy module, goes over budget_ms or raises in its default run
+def check_startup(pages=PAGES, budget_ms=DEFAULT_BUDGET_MS, repeat=3, run_pages=True):
+    failures = []
+    for page in pages:
+        name = Path(page).name
+        try:
+            milliseconds, heavy = measure_page(page, repeat)
+        except (SyntaxError, subprocess.CalledProcessError) as exc:
+            failures.append(f"{name}: imports failed ({type(exc).__name__})")
+            continue
+        print(f"{name}: {milliseconds:.0f} ms")
+        if heavy:
+            failures.append(f"{name}: imports {', '.join(heavy)} at start-up")
+        if milliseconds > budget_ms:
+            failures.append(f"{name}: imports took {milliseconds:.0f} ms (budget {budget_ms:.0f} ms)")
+        if run_pages:
+            heavy, exceptions = trace_page_run(page)
+            if heavy:
+                failures.append(f"{name}: default run imports {', '.join(heavy)}")
+            for message in exceptions:
+                failures.append(f"{name}: default run raised {message.splitlines()[0] if message else 'an exception'}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="import-time budget per page (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per page; the fastest counts (default: %(default)s)")
+    parser.add_argument("--imports-only", action="store_true", help="skip the AppTest run of each page")
+    parser.add_argument("pages", nargs="*", default=PAGES, help="pages to check (default: every calculator page)")
+    args = parser.parse_args(argv)
+
+    failures = check_startup(args.pages, args.budget_ms, args.repeat, not args.imports_only)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""Benchmarks for the calculation and eligibility hot paths, page reruns and import time.
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --output new.json --compare bench.json --tolerance 0.25
+
+Exits with status 1 when --compare finds a benchmark slower than the baseline by more than the tolerance.
+"""
+import argparse
+import glob
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import loan_engine as engine  # noqa: E402
+
+PAGES = sorted(glob.glob(str(REPO_ROOT / "home_affordability_calculator*.py"))) + sorted(glob.glob(str(REPO_ROOT / "updated_loan_calculator_app*.py")))
+
+
+# Best-of-repeat seconds per call for a zero-argument callable
+def time_call(func, number, repeat=5):
+    timings = timeit.repeat(func, number=number, repeat=repeat)
+    return {"seconds_per_call": min(timings) / number, "median_seconds_per_call": statistics.median(timings) / number, "calls": number}
+
+
+def bench_engine():
+    prices = [50000.0 + 7919.0 * i for i in range(250)]
+    formula = next(iter(engine.loan_formulas))
+    index = engine.next_formula_index()
+    eligibility = engine.eligibility_index()
+    limits = engine.loan_limits[1]
+
+    return {
+        "calculate_loan": time_call(lambda: engine.calculate_loan(807000.0, 30.0, 5.625, 0.03, 0.0, 1200.0, 800.0, 0.0), 20000),
+        "calculate_formula_loan": time_call(lambda: engine.calculate_formula_loan(807000.0, 5.625, 30, "C.3.0", 1200.0, 800.0, 0.0), 20000),
+        "eligibility_scan": time_call(lambda: [engine.eligible_formulas(price, "Primary Residence", 1) for price in prices], 50),
+        "eligibility_index": time_call(lambda: [eligibility.eligible_formulas(price, "Primary Residence", 1) for price in prices], 50),
+        "next_formula_scan": time_call(lambda: [engine.next_formula(price, formula, limits["conforming"], program="C") for price in prices], 50),
+        "next_formula_index": time_call(lambda: [index.next_formula(price, formula, 1, "conforming") for price in prices], 50),
+    }
+
+
+# Vectorized paths over one block of rows: the float batch engine and the integer-cents engine on the same
+# inputs, so the price of exact cents is measured against the batch path it would replace, not the scalar one.
+# Skipped (None) without NumPy.
+def bench_batch(rows=200_000):
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+    from loan_engine.batch import calculate_formula_loan_batch
+    from loan_engine.fixed_point import calculate_formula_loan_cents_batch
+
+    rng = np.random.default_rng(0)
+    inputs = (rng.uniform(50000.0, 2000000.0, rows).round(2), rng.uniform(2.0, 9.0, rows).round(3), rng.choice([15, 30], rows),
+              rng.choice(list(engine.affordability_loan_formulas), rows), rng.uniform(0.0, 12000.0, rows).round(2),
+              rng.uniform(0.0, 4000.0, rows).round(2), np.zeros(rows))
+    return {
+        "calculate_formula_loan_batch": time_call(lambda: calculate_formula_loan_batch(*inputs), 1),
+        "calculate_formula_loan_cents_batch": time_call(lambda: calculate_formula_loan_cents_batch(*inputs), 1),
+    }
+
+
+# Wall time of a fresh interpreter importing each module, minus the bare interpreter start-up
+def bench_imports(modules=("loan_engine", "loan_engine.batch", "streamlit"), repeat=5):
+    def run(code):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, check=True)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    baseline = run("pass")
+    results = {"interpreter": {"seconds": baseline}}
+    for module in modules:
+        try:
+            results[module] = {"seconds": max(run(f"import {module}") - baseline, 0.0)}
+        except subprocess.CalledProcessError as exc:
+            results[module] = {"error": str(exc)}
+    return results
+
+
+# One user interaction: move the first number input (the purchase price) and press the first button, as a user
+# re-pricing a loan does. Pages without a button recompute on the input change alone.
+def interact(app, step):
+    if not len(app.number_input):
+        raise RuntimeError(app.exception[0].message if len(app.exception) else "page has no number input to change")
+    price = app.number_input[0]
+    price.set_value(price.value * (1.05 if step % 2 == 0 else 1 / 1.05))
+    if len(app.button):
+        app.button[0].click()
+    start = time.perf_counter()
+    app.run()
+    return time.perf_counter() - start
+
+
+# Headless script runs of every Streamlit page: first run, warm reruns with unchanged inputs, then interaction reruns
+def bench_pages(pages=PAGES, reruns=5):
+    from streamlit.testing.v1 import AppTest
+
+    results = {}
+    for page in pages:
+        name = Path(page).name
+        try:
+            app = AppTest.from_file(page, default_timeout=60)
+            start = time.perf_counter()
+            app.run()
+            first = time.perf_counter() - start
+            timings = []
+            for _ in range(reruns):
+                start = time.perf_counter()
+                app.run()
+                timings.append(time.perf_counter() - start)
+            interactions = [interact(app, step) for step in range(reruns)]
+        except Exception as exc:  # pages that do not even compile are reported, not fatal
+            results[name] = {"error": f"{type(exc).__name__}: {exc}"}
+            continue
+        results[name] = {"first_run_seconds": first, "seconds": min(timings), "interaction_seconds": min(interactions),
+                         "median_interaction_seconds": statistics.median(interactions), "exceptions": len(app.exception)}
+    return results
+
+
+def run_benchmarks(skip_pages=False):
+    results = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "timestamp": time.time()},
+        "engine": bench_engine(),
+        "imports": bench_imports(),
+    }
+    batch = bench_batch()
+    if batch is not None:
+        results["batch"] = batch
+    if not skip_pages:
+        results["pages"] = bench_pages()
+    return results
+
+
+# Metric paths whose timing got slower than the baseline by more than tolerance (fraction)
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    for section in ("engine", "batch", "imports", "pages"):
+        for name, current in results.get(section, {}).items():
+            previous = baseline.get(section, {}).get(name, {})
+            for metric in ("seconds_per_call", "seconds", "interaction_seconds"):
+                if metric in current and metric in previous and previous[metric] > 0:
+                    ratio = current[metric] / previous[metric]
+                    if ratio > 1 + tolerance:
+                        regressions.append(f"{section}.{name}: {previous[metric]:.6g}s -> {current[metric]:.6g}s ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="bench.json", help="where to write the JSON results (default: %(default)s)")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown as a fraction (default: %(default)s)")
+    parser.add_argument("--skip-pages", action="store_true", help="skip the headless Streamlit page reruns")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(skip_pages=args.skip_pages)
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        regressions = find_regressions(results, json.loads(Path(args.compare).read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,64 +1,20 @@
 
+from loan_engine.instrumentation import page_profiler
+
+profiler = page_profiler(__file__)  # no-op unless LOAN_ENGINE_PROFILE is set
+
 import streamlit as st
-import pandas as pd
-import numpy as np
+
+import loan_engine as engine
+
+engine.watch_rules()  # swaps edits of the rule configuration file into engine.ruleset() without a restart
+rules = engine.ruleset("affordability")  # rule tables shared by every page and session in the process
+
+profiler.checkpoint("imports")
 
 # Set Page Configuration for a Compact UI
 st.set_page_config(page_title="Home Affordability Calculator", layout="wide")
 
-# Define Loan Limits
-conforming_loan_limit = 806500
-high_balance_loan_limit = 1000000
-
-# Define available C & HB Formulas with Down Payment, Seller Concessions, and LTV Restrictions
-loan_formulas = {
-    "C.3.0": {"down_payment": 3, "seller_concession": 0, "max_ltv": 97},
-    "C.3.3": {"down_payment": 3, "seller_concession": 3, "max_ltv": 97},
-    "C.3.6": {"down_payment": 3, "seller_concession": 6, "max_ltv": 97},
-    "C.5.3": {"down_payment": 5, "seller_concession": 3, "max_ltv": 95},
-    "C.10.6": {"down_payment": 10, "seller_concession": 6, "max_ltv": 90},
-    "C.15.2": {"down_payment": 15, "seller_concession": 2, "max_ltv": 85},
-    "C.20.2": {"down_payment": 20, "seller_concession": 2, "max_ltv": 80},
-    "C.25.2": {"down_payment": 25, "seller_concession": 2, "max_ltv": 75},
-    "HB.3.3": {"down_payment": 3, "seller_concession": 3, "max_ltv": 95},
-    "HB.3.6": {"down_payment": 3, "seller_concession": 6, "max_ltv": 95},
-    "HB.10.6": {"down_payment": 10, "seller_concession": 6, "max_ltv": 90},
-    "HB.15.2": {"down_payment": 15, "seller_concession": 2, "max_ltv": 85},
-    "HB.20.2": {"down_payment": 20, "seller_concession": 2, "max_ltv": 80},
-    "HB.25.2": {"down_payment": 25, "seller_concession": 2, "max_ltv": 75},
-}
-
-# Define LTV Restrictions by Occupancy Type and Units
-ltv_limits = {
-    "Primary Residence": {1: 97, 2: 85, 3: 75, 4: 75},
-    "Second Home": {1: 90},
-    "Investment Property": {1: 85, 2: 85, 3: 75, 4: 75},
-    "High-Balance": {1: 95, 2: 85, 3: 75, 4: 75}
-}
-
-# Function to calculate loan values
-def calculate_loan(purchase_price, interest_rate, loan_term, formula, property_tax, home_insurance, flood_insurance):
-    interest_rate = round(interest_rate, 3)  # Round interest rate to the nearest thousandth
-    down_payment_pct = loan_formulas[formula]["down_payment"] / 100
-    seller_concession_pct = loan_formulas[formula]["seller_concession"] / 100
-
-    total_sale_price = purchase_price / (1 - seller_concession_pct)
-    loan_amount = total_sale_price * (1 - down_payment_pct)
-    cash_to_close = total_sale_price * down_payment_pct
-
-    monthly_interest_rate = (interest_rate / 100) / 12
-    num_payments = loan_term * 12
-    monthly_payment = (monthly_interest_rate * loan_amount) / (1 - (1 + monthly_interest_rate) ** -num_payments)
-
-    # Calculate monthly taxes & insurance
-    monthly_property_tax = property_tax / 12
-    monthly_home_insurance = home_insurance / 12
-    monthly_flood_insurance = flood_insurance / 12
-
-    total_monthly_payment = monthly_payment + monthly_property_tax + monthly_home_insurance + monthly_flood_insurance
-
-    return total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment, monthly_property_tax, monthly_home_insurance, monthly_flood_insurance
-
 # Compact UI Layout
 st.title("🏡 Home Affordability Calculator")
 
@@ -78,20 +34,18 @@ with col3:
     home_insurance = st.number_input("🔒 Insurance ($)", min_value=0.0, max_value=20000.0, step=100.0, format="%.0f")
     flood_insurance = st.number_input("🌊 Flood Ins. ($)", min_value=0.0, max_value=20000.0, step=100.0, format="%.0f")
 
+profiler.checkpoint("inputs")
+
 st.markdown("---")
 
 # Determine eligible loan formulas
-eligible_formulas = []
-for formula, values in loan_formulas.items():
-    max_price = (conforming_loan_limit / (1 - values["down_payment"] / 100)) * (1 - values["seller_concession"] / 100)
-
-    if purchase_price <= max_price and values["max_ltv"] <= ltv_limits.get(occupancy_type, {}).get(num_units, 0):
-        eligible_formulas.append(formula)
+eligible_formulas = list(rules.eligible_formulas(purchase_price, occupancy_type, num_units))
 
 selected_formula = st.selectbox("📜 Loan Formula", eligible_formulas)
+profiler.checkpoint("eligibility")
 
 if st.button("🧮 Calculate"):
-    total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment, monthly_property_tax, monthly_home_insurance, monthly_flood_insurance = calculate_loan(
+    total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment, monthly_property_tax, monthly_home_insurance, monthly_flood_insurance = rules.calculate(
         purchase_price, interest_rate, loan_term, selected_formula, property_tax, home_insurance, flood_insurance
     )
 
@@ -112,3 +66,5 @@ if st.button("🧮 Calculate"):
         st.write(f"🌊 **Flood Insurance:** ${monthly_flood_insurance:,.2f}")
         st.write(f"💸 **Total Monthly Payment:** ${total_monthly_payment:,.2f}")
 
+profiler.checkpoint("results")
+profiler.finish()
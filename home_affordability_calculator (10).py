@@ -1,6 +1,12 @@
 
+from loan_engine.instrumentation import page_profiler
+
+profiler = page_profiler(__file__)  # no-op unless LOAN_ENGINE_PROFILE is set
+
 import streamlit as st
 
+profiler.checkpoint("imports")
+
 # Set Page Configuration for a Compact UI
 st.set_page_config(page_title="Home Affordability Calculator", layout="wide")
 
@@ -23,11 +29,6 @@ with col3:
     home_insurance = float(st.number_input("🔒 Insurance ($)", min_value=0.0, max_value=20000.0, step=100.0, value=0.0, format="%.0f"))
     flood_insurance = float(st.number_input("🌊 Flood Ins. ($)", min_value=0.0, max_value=20000.0, step=100.0, value=0.0, format="%.0f"))
 
-# Debugging Section: Print detected types
-st.write("### Debugging Data Types:")
-st.write(f"purchase_price type: {type(purchase_price)}")
-st.write(f"loan_term type: {type(loan_term)}")
-st.write(f"property_tax type: {type(property_tax)}")
-st.write(f"home_insurance type: {type(home_insurance)}")
-st.write(f"flood_insurance type: {type(flood_insurance)}")
-st.write(f"interest_rate type: {type(interest_rate)}")
+# Per-rerun timings and engine call counts, shown when LOAN_ENGINE_PROFILE is set
+profiler.checkpoint("inputs")
+profiler.finish()
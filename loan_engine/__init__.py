@@ -0,0 +1,31 @@
+# Calculation engine shared by the Streamlit calculator pages. Pure Python: importing it never loads
+# Streamlit, pandas or NumPy. The NumPy batch helpers live in loan_engine.batch and are imported on demand.
+from .amortization import amortization_schedule
+from .cache import cache_stats, cached_calculate_formula_loan, cached_calculate_loan, clear_cache
+from .core import (
+    adjusted_down_payment_pct,
+    calculate_formula_loan,
+    calculate_loan,
+    eligible_formulas,
+    evaluate_scenario,
+    exceeds_conforming_limit,
+    formula_lookup,
+    max_seller_concession,
+    next_formula,
+    outside_high_balance_range,
+    pmt,
+)
+from .eligibility import eligibility_index, next_formula_index
+from .rules import (
+    affordability_loan_formulas,
+    conforming_loan_limit,
+    dti_limits,
+    legacy_loan_formulas,
+    legacy_max_loan_limit,
+    loan_formulas,
+    loan_limits,
+    ltv_limits,
+)
+from .rule_config import RuleConfigError, load_rules
+from .rulesets import RuleSet, rule_set_versions, ruleset, use_rules, watch_rules
+from .solver import dti_ratios, max_affordable_price, max_loan_amount, max_qualifying_payment, max_qualifying_price
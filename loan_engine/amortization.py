@@ -0,0 +1,20 @@
+from .core import pmt
+
+
+# Month-by-month amortization built on the same PMT setup as calculate_loan
+def monthly_payment(loan_amount, loan_term, interest_rate):
+    return pmt(loan_amount, (interest_rate / 100) / 12, loan_term * 12)
+
+
+# Lazily yield (month, interest, principal, balance) for one loan; the last row clears any rounding residue
+def amortization_schedule(loan_amount, loan_term, interest_rate):
+    monthly_interest_rate = (interest_rate / 100) / 12
+    num_payments = int(round(loan_term * 12))
+    payment = monthly_payment(loan_amount, loan_term, interest_rate)
+
+    balance = loan_amount
+    for month in range(1, num_payments + 1):
+        interest = balance * monthly_interest_rate
+        principal = balance if month == num_payments else payment - interest
+        balance -= principal
+        yield month, interest, principal, balance
@@ -0,0 +1,245 @@
+"""Asyncio JSON pricing service over the same logic as updated_loan_calculator_app.py.
+
+    python -m loan_engine.api --host 0.0.0.0 --port 8080
+
+POST /price with one scenario object, or {"scenarios": [...]} for a batch. A scenario has the fields
+occupancy, units, price, term (years), rate (%), formula and optional tax, insurance, flood. Invalid input gets a 400
+with {"error": ...}, a failure inside the engine a 500. GET /health returns {"status": "ok"}.
+
+Every request reads the formula table and loan limits from ruleset(RULE_SET) when it arrives; the server
+watches the rule configuration (rulesets.watch_rules), so a validated edit applies to the next request
+without a restart.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from .cache import cached_calculate_loan
+from .core import evaluate_scenario
+from .rulesets import ruleset, watch_rules
+
+REQUIRED_FIELDS = ("occupancy", "units", "price", "term", "rate", "formula")
+OPTIONAL_FIELDS = ("tax", "insurance", "flood")
+# Accepted ranges of the loan inputs: term in years, note rate in percent
+TERM_RANGE = (1, 50)
+RATE_RANGE = (0, 30)
+MAX_BATCH_SIZE = 10_000
+MAX_BODY_BYTES = 8 * 1024 * 1024
+RULE_SET = "calculator"
+
+logger = logging.getLogger("loan_engine.api")
+
+
+class RequestError(Exception):
+    def __init__(self, message, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+# Validate a scenario object against a rule set's tables and reduce it to a hashable key; identical scenarios share one key
+def normalize_scenario(scenario, rules=None):
+    if not isinstance(scenario, dict):
+        raise RequestError("each scenario must be a JSON object")
+    missing = [field for field in REQUIRED_FIELDS if field not in scenario]
+    if missing:
+        raise RequestError(f"missing field(s): {', '.join(missing)}")
+    rules = rules or ruleset(RULE_SET)
+    formulas, loan_limits = rules.lookup, rules.loan_limits
+    if not isinstance(scenario["formula"], str) or not isinstance(scenario["occupancy"], str):
+        raise RequestError("formula and occupancy must be strings")
+    if scenario["formula"] not in formulas:
+        raise RequestError(f"unknown formula: {scenario['formula']}")
+    if scenario["occupancy"] not in rules.ltv_limits:
+        raise RequestError(f"occupancy must be one of {', '.join(rules.ltv_limits)}")
+    if isinstance(scenario["units"], bool):
+        raise RequestError("units must be a whole number")
+    try:
+        units = float(scenario["units"])
+        numbers = tuple(float(scenario.get(field, 0.0)) for field in ("price", "term", "rate") + OPTIONAL_FIELDS)
+    except (TypeError, ValueError, OverflowError):
+        raise RequestError("units, price, term, rate, tax, insurance and flood must be numbers")
+    price, term, rate = numbers[:3]
+    if not units.is_integer():
+        raise RequestError("units must be a whole number")
+    units = int(units)
+    if units not in loan_limits:
+        raise RequestError(f"units must be one of {sorted(loan_limits)}")
+    if not all(math.isfinite(number) for number in numbers):
+        raise RequestError("price, term, rate, tax, insurance and flood must be finite")
+    if price <= 0 or min(numbers[3:]) < 0:
+        raise RequestError("price must be positive and tax, insurance and flood not negative")
+    if not TERM_RANGE[0] <= term <= TERM_RANGE[1]:
+        raise RequestError(f"term must be between {TERM_RANGE[0]} and {TERM_RANGE[1]} years")
+    if not RATE_RANGE[0] <= rate <= RATE_RANGE[1]:
+        raise RequestError(f"rate must be between {RATE_RANGE[0]} and {RATE_RANGE[1]} percent")
+    return (str(scenario["occupancy"]), units, formulas[scenario["formula"]]) + numbers
+
+
+def _evaluate_key(key, rules):
+    occupancy, units, formula, price, term, rate, tax, insurance, flood = key
+    scenario = {"occupancy": occupancy, "units": units, "formula": formula, "price": price, "term": term, "rate": rate,
+                "tax": tax, "insurance": insurance, "flood": flood}
+    return evaluate_scenario(scenario, loan_formulas=rules.loan_formulas, loan_limits=rules.loan_limits,
+                             index=rules.next_formula_index, calculate=cached_calculate_loan)
+
+
+# Prices scenarios with request coalescing (identical in-flight scenarios under the same rule set share one
+# evaluation) and a cap on how many evaluations run at once
+class PricingService:
+    def __init__(self, max_concurrency=64, workers=4):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pricing")
+        self.inflight = {}
+        self.stats = {"requests": 0, "scenarios": 0, "coalesced": 0, "evaluated": 0}
+        ruleset(RULE_SET).next_formula_index  # build the shared index before the first request
+
+    async def price(self, key, rules):
+        inflight_key = (rules, key)  # a request after a rule reload must not join an evaluation under the old tables
+        future = self.inflight.get(inflight_key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[inflight_key] = future
+        try:
+            async with self.semaphore:
+                result = await asyncio.get_running_loop().run_in_executor(self.executor, _evaluate_key, key, rules)
+            self.stats["evaluated"] += 1
+            future.set_result(result)
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # waiters re-raise it; don't log it as unretrieved
+            raise
+        finally:
+            del self.inflight[inflight_key]
+        return result
+
+    # Route one request; returns (status, payload)
+    async def dispatch(self, method, path, body=b""):
+        self.stats["requests"] += 1
+        try:
+            if path == "/health" and method == "GET":
+                return HTTPStatus.OK, {"status": "ok", **self.stats}
+            if path != "/price":
+                raise RequestError("not found", HTTPStatus.NOT_FOUND)
+            if method != "POST":
+                raise RequestError("use POST", HTTPStatus.METHOD_NOT_ALLOWED)
+            try:
+                payload = json.loads(body or b"null")
+            except ValueError:
+                raise RequestError("body must be JSON")
+
+            rules = ruleset(RULE_SET)  # one table version for the whole request
+            if isinstance(payload, dict) and "scenarios" in payload:
+                scenarios = payload["scenarios"]
+                if not isinstance(scenarios, list) or len(scenarios) > MAX_BATCH_SIZE:
+                    raise RequestError(f"scenarios must be a list of at most {MAX_BATCH_SIZE} objects")
+                keys = [normalize_scenario(scenario, rules) for scenario in scenarios]
+                self.stats["scenarios"] += len(keys)
+                return HTTPStatus.OK, {"results": await asyncio.gather(*(self.price(key, rules) for key in keys))}
+
+            key = normalize_scenario(payload, rules)
+            self.stats["scenarios"] += 1
+            return HTTPStatus.OK, await self.price(key, rules)
+        except RequestError as exc:
+            return exc.status, {"error": str(exc)}
+        except Exception:
+            logger.exception("error pricing %s %s", method, path)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"}
+
+    # Minimal HTTP/1.1 handler with keep-alive
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = headers.get("content-length", "0") or "0"
+                length = int(length) if length.isdigit() else -1
+                if length < 0:
+                    status, payload = HTTPStatus.BAD_REQUEST, {"error": "invalid Content-Length"}
+                    keep_alive = False
+                elif length > MAX_BODY_BYTES:
+                    status, payload = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "body too large"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.dispatch(method, path.split("?")[0], body)
+                    keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+# In-process client for tests and local verification; goes through the same dispatch as the HTTP server
+class LocalClient:
+    def __init__(self, service=None):
+        self.service = service
+
+    async def request(self, method, path, payload=None):
+        self.service = self.service or PricingService()
+        body = json.dumps(payload).encode() if payload is not None else b""
+        status, response = await self.service.dispatch(method, path, body)
+        return status.value, response
+
+    async def post(self, path, payload):
+        return await self.request("POST", path, payload)
+
+    async def get(self, path):
+        return await self.request("GET", path)
+
+
+async def serve(host="127.0.0.1", port=8080, max_concurrency=64, workers=4):
+    watch_rules()
+    service = PricingService(max_concurrency, workers)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m loan_engine.api", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-concurrency", type=int, default=64, help="evaluations running at once (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=4, help="evaluation threads (default: %(default)s)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_concurrency, args.workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,205 @@
+import numpy as np
+
+from .formulas import TableCache, formula_records
+from .rules import affordability_loan_formulas, loan_formulas as app_loan_formulas, loan_limits as app_loan_limits
+
+# Column order matches the tuple returned by the scalar calculate_loan
+LOAN_COLUMNS = ("total_sale_price", "loan_amount", "cash_to_close", "monthly_payment", "total_monthly_payment")
+ESCROW_COLUMNS = ("monthly_property_tax", "monthly_home_insurance", "monthly_flood_insurance")
+# Row layout of formula_table: the numeric fields of formulas.Formula
+FORMULA_DTYPE = np.dtype([
+    ("down_payment_pct", np.float64), ("seller_concession_pct", np.float64), ("max_ltv", np.float64),
+    ("loan_factor", np.float64), ("concession_factor", np.float64), ("is_conforming", np.bool_), ("is_high_balance", np.bool_),
+])
+
+
+# Array form of core.pmt: monthly payment at monthly_interest_rate over num_payments, straight-line at 0%
+def pmt_batch(loan_amount, monthly_interest_rate, num_payments):
+    has_interest = monthly_interest_rate > 0
+    safe_rate = np.where(has_interest, monthly_interest_rate, 1.0)
+    return np.where(has_interest, (safe_rate * loan_amount) / (1 - (1 + safe_rate) ** -num_payments), loan_amount / num_payments)
+
+
+# Vectorized counterpart of calculate_loan; every argument may be a scalar or an array and is broadcast
+def calculate_loan_batch(purchase_price, loan_term, interest_rate, down_payment_pct, seller_concession_pct,
+                         property_tax=0.0, home_insurance=0.0, flood_insurance=0.0):
+    purchase_price = np.asarray(purchase_price, dtype=np.float64)
+    down_payment_pct = np.asarray(down_payment_pct, dtype=np.float64)
+    seller_concession_pct = np.asarray(seller_concession_pct, dtype=np.float64)
+
+    total_sale_price = purchase_price / (1 - seller_concession_pct)
+    loan_amount = total_sale_price * (1 - down_payment_pct)
+    cash_to_close = total_sale_price * down_payment_pct
+
+    # Monthly mortgage calculation (PMT formula), falling back to straight-line repayment at 0%
+    monthly_interest_rate = (np.asarray(interest_rate, dtype=np.float64) / 100) / 12
+    num_payments = np.asarray(loan_term, dtype=np.float64) * 12
+    monthly_payment = pmt_batch(loan_amount, monthly_interest_rate, num_payments)
+
+    # Escrow calculations (tax, insurance, flood insurance)
+    monthly_property_tax = np.asarray(property_tax, dtype=np.float64) / 12
+    monthly_home_insurance = np.asarray(home_insurance, dtype=np.float64) / 12
+    monthly_flood_insurance = np.asarray(flood_insurance, dtype=np.float64) / 12
+
+    total_monthly_payment = monthly_payment + monthly_property_tax + monthly_home_insurance + monthly_flood_insurance
+
+    columns = np.broadcast_arrays(total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment)
+    return dict(zip(LOAN_COLUMNS, columns))
+
+
+def _formula_table(loan_formulas):
+    records = formula_records(loan_formulas)
+    rows = {key: row for row, key in enumerate(records)}
+    array = np.array([tuple(getattr(record, field) for field in FORMULA_DTYPE.names) for record in records.values()],
+                     dtype=FORMULA_DTYPE)
+    return rows, array
+
+
+_formula_tables = TableCache(_formula_table)
+
+
+# Formula records as one structured array in table order, plus the key -> row mapping; built once per table
+def formula_table(loan_formulas):
+    return _formula_tables(loan_formulas)
+
+
+# Rows of formula_table for an array of formula keys; every other per-formula value is then an integer gather
+def formula_rows(formula, loan_formulas):
+    rows, array = formula_table(loan_formulas)
+    formula = np.asarray(formula)
+    return np.array([rows[key] for key in formula.ravel().tolist()], dtype=np.intp).reshape(formula.shape), array
+
+
+# Look up the down payment and seller concession fractions for an array of formula keys
+def formula_pcts(formula, loan_formulas):
+    rows, array = formula_rows(formula, loan_formulas)
+    return array["down_payment_pct"][rows], array["seller_concession_pct"][rows]
+
+
+# Batch form of the formula-key calculate_loan used by the home affordability pages (rate rounded to 0.001%)
+def calculate_formula_loan_batch(purchase_price, interest_rate, loan_term, formula, property_tax, home_insurance,
+                                 flood_insurance, loan_formulas=affordability_loan_formulas):
+    interest_rate = np.round(np.asarray(interest_rate, dtype=np.float64), 3)
+    down_payment_pct, seller_concession_pct = formula_pcts(formula, loan_formulas)
+
+    result = calculate_loan_batch(purchase_price, loan_term, interest_rate, down_payment_pct, seller_concession_pct,
+                                  property_tax, home_insurance, flood_insurance)
+    shape = result["loan_amount"].shape
+    escrow = [np.broadcast_to(np.asarray(value, dtype=np.float64) / 12, shape)
+              for value in (property_tax, home_insurance, flood_insurance)]
+    result.update(zip(ESCROW_COLUMNS, escrow))
+    return result
+
+
+# Conforming and high-balance limits for an array of unit counts
+def unit_limits(num_units, loan_limits=app_loan_limits):
+    size = max(loan_limits) + 1
+    conforming = np.full(size, np.nan)
+    high_balance = np.full(size, np.nan)
+    for units, limits in loan_limits.items():
+        conforming[units] = limits["conforming"]
+        high_balance[units] = limits["high_balance"]
+    num_units = np.asarray(num_units, dtype=np.intp)
+    return conforming[num_units], high_balance[num_units]
+
+
+# Batch form of solver.max_affordable_price; NaN marks HB scenarios that cannot clear the conforming limit
+def max_affordable_price_batch(monthly_budget, loan_term, interest_rate, formula, property_tax, home_insurance,
+                               flood_insurance=0.0, num_units=1, loan_formulas=app_loan_formulas, loan_limits=app_loan_limits):
+    rows, formulas = formula_rows(formula, loan_formulas)
+    formulas = formulas[rows]
+    conforming, high_balance = unit_limits(num_units, loan_limits)
+
+    escrow = (np.asarray(property_tax, dtype=np.float64) / 12 + np.asarray(home_insurance, dtype=np.float64) / 12
+              + np.asarray(flood_insurance, dtype=np.float64) / 12)
+    monthly_principal_interest = np.maximum(np.asarray(monthly_budget, dtype=np.float64) - escrow, 0.0)
+
+    monthly_interest_rate = (np.asarray(interest_rate, dtype=np.float64) / 100) / 12
+    num_payments = np.asarray(loan_term, dtype=np.float64) * 12
+    has_interest = monthly_interest_rate > 0
+    safe_rate = np.where(has_interest, monthly_interest_rate, 1.0)
+    loan_amount = np.where(has_interest,
+                           monthly_principal_interest * (1 - (1 + safe_rate) ** -num_payments) / safe_rate,
+                           monthly_principal_interest * num_payments)
+
+    is_high_balance = formulas["is_high_balance"]
+    is_conforming = formulas["is_conforming"]
+    loan_amount = np.where(is_high_balance, np.minimum(loan_amount, high_balance), loan_amount)
+    loan_amount = np.where(is_conforming, np.minimum(loan_amount, conforming), loan_amount)
+    loan_amount = np.where(is_high_balance & (loan_amount <= conforming), np.nan, loan_amount)
+
+    total_sale_price = loan_amount / formulas["loan_factor"]
+    return total_sale_price * formulas["concession_factor"]
+
+
+# Default memory ceiling for one block of the amortization matrices (interest, principal, balance)
+AMORTIZATION_MAX_BYTES = 256 * 1024 * 1024
+SCHEDULE_COLUMNS = ("interest", "principal", "balance")
+
+
+# (loans x months) interest, principal and balance matrices from the closed-form balance after k payments.
+# Months past a loan's term are zero, so shorter terms share the matrix with the longest one.
+def _amortization_block(loan_amount, monthly_interest_rate, num_payments, months):
+    has_interest = monthly_interest_rate > 0
+    safe_rate = np.where(has_interest, monthly_interest_rate, 1.0)
+    payment = pmt_batch(loan_amount, monthly_interest_rate, num_payments)
+
+    k = np.arange(months + 1, dtype=np.float64)
+    growth = (1 + safe_rate[:, None]) ** k
+    balances = np.where(has_interest[:, None],
+                        loan_amount[:, None] * growth - payment[:, None] * (growth - 1) / safe_rate[:, None],
+                        loan_amount[:, None] - payment[:, None] * k)
+    active = k[1:] <= num_payments[:, None]
+    balances[:, 1:] = np.where(active, balances[:, 1:], 0.0)
+    balances[np.arange(len(num_payments)), num_payments.astype(np.intp)] = 0.0
+
+    interest = np.where(active, balances[:, :-1] * monthly_interest_rate[:, None], 0.0)
+    principal = np.where(active, balances[:, :-1] - balances[:, 1:], 0.0)
+    return dict(zip(SCHEDULE_COLUMNS, (interest, principal, balances[:, 1:])))
+
+
+def _schedule_inputs(loan_amount, loan_term, interest_rate):
+    loan_amount, loan_term, interest_rate = np.broadcast_arrays(np.asarray(loan_amount, dtype=np.float64),
+                                                                np.asarray(loan_term, dtype=np.float64),
+                                                                np.asarray(interest_rate, dtype=np.float64))
+    loan_amount = loan_amount.ravel()
+    monthly_interest_rate = (interest_rate.ravel() / 100) / 12
+    num_payments = np.round(loan_term.ravel() * 12)
+    return loan_amount, monthly_interest_rate, num_payments, int(num_payments.max(initial=0))
+
+
+def _chunk_rows(months, max_bytes):
+    # growth/balances carry months + 1 columns; interest, principal and two masks carry months
+    return max(1, max_bytes // (8 * (months + 1) * 6))
+
+
+def _iter_amortization_blocks(loan_amount, monthly_interest_rate, num_payments, months, chunk_rows):
+    for start in range(0, len(loan_amount), chunk_rows):
+        stop = start + chunk_rows
+        yield start, _amortization_block(loan_amount[start:stop], monthly_interest_rate[start:stop], num_payments[start:stop], months)
+
+
+# Yield (start_row, columns) blocks of the amortization matrices, sized so each block stays under max_bytes
+def amortization_chunks(loan_amount, loan_term, interest_rate, chunk_rows=None, max_bytes=AMORTIZATION_MAX_BYTES):
+    loan_amount, monthly_interest_rate, num_payments, months = _schedule_inputs(loan_amount, loan_term, interest_rate)
+    chunk_rows = chunk_rows or _chunk_rows(months, max_bytes)
+    return _iter_amortization_blocks(loan_amount, monthly_interest_rate, num_payments, months, chunk_rows)
+
+
+# Full (loans x months) amortization matrices in one vectorized pass, falling back to chunked assembly
+# into preallocated outputs when a single pass would exceed max_bytes. The outputs count against max_bytes too;
+# when they alone exceed it this raises ValueError, and amortization_chunks is the way to stream the schedules.
+def amortization_matrix(loan_amount, loan_term, interest_rate, max_bytes=AMORTIZATION_MAX_BYTES):
+    loan_amount, monthly_interest_rate, num_payments, months = _schedule_inputs(loan_amount, loan_term, interest_rate)
+    if len(loan_amount) <= _chunk_rows(months, max_bytes):
+        return _amortization_block(loan_amount, monthly_interest_rate, num_payments, months)
+
+    output_bytes = 8 * len(SCHEDULE_COLUMNS) * len(loan_amount) * months
+    if output_bytes >= max_bytes:
+        raise ValueError(f"amortization matrices need {output_bytes} bytes, over max_bytes={max_bytes}; use amortization_chunks")
+    chunk_rows = _chunk_rows(months, max_bytes - output_bytes)
+    result = {column: np.zeros((len(loan_amount), months)) for column in SCHEDULE_COLUMNS}
+    for start, block in _iter_amortization_blocks(loan_amount, monthly_interest_rate, num_payments, months, chunk_rows):
+        for column in SCHEDULE_COLUMNS:
+            result[column][start:start + chunk_rows] = block[column]
+    return result
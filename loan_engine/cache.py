@@ -0,0 +1,45 @@
+from functools import lru_cache
+
+from .core import calculate_formula_loan, calculate_loan
+
+# Results kept per server process; every Streamlit session in the process shares them
+CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _cached_loan(purchase_price, loan_term, interest_rate, down_payment_pct, seller_concession_pct, property_tax, home_insurance, flood_insurance):
+    return calculate_loan(purchase_price, loan_term, interest_rate, down_payment_pct, seller_concession_pct, property_tax, home_insurance, flood_insurance)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _cached_formula_loan(purchase_price, interest_rate, loan_term, formula, property_tax, home_insurance, flood_insurance, round_cents):
+    return calculate_formula_loan(purchase_price, interest_rate, loan_term, formula, property_tax, home_insurance, flood_insurance,
+                                  round_cents=round_cents)
+
+
+# calculate_loan behind the shared cache. Inputs are normalized to floats, so ints and floats of the same value
+# hit the same entry; the rate is used exactly as given, so a cached result always equals calculate_loan's.
+def cached_calculate_loan(purchase_price, loan_term, interest_rate, down_payment_pct, seller_concession_pct, property_tax, home_insurance, flood_insurance):
+    return _cached_loan(float(purchase_price), float(loan_term), float(interest_rate), float(down_payment_pct),
+                        float(seller_concession_pct), float(property_tax), float(home_insurance), float(flood_insurance))
+
+
+# calculate_formula_loan (default formula table) behind the shared cache. calculate_formula_loan itself takes the
+# rate to the nearest thousandth, so keying on the rounded rate cannot change a result.
+def cached_calculate_formula_loan(purchase_price, interest_rate, loan_term, formula, property_tax, home_insurance, flood_insurance, round_cents=False):
+    return _cached_formula_loan(float(purchase_price), round(float(interest_rate), 3), float(loan_term), formula, float(property_tax),
+                                float(home_insurance), float(flood_insurance), bool(round_cents))
+
+
+# Hit/miss counters and occupancy for each cache
+def cache_stats():
+    stats = {}
+    for name, cached in (("calculate_loan", _cached_loan), ("calculate_formula_loan", _cached_formula_loan)):
+        info = cached.cache_info()
+        stats[name] = {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize}
+    return stats
+
+
+def clear_cache():
+    _cached_loan.cache_clear()
+    _cached_formula_loan.cache_clear()
@@ -0,0 +1,119 @@
+import argparse
+import os
+import sys
+from collections import deque
+from pathlib import Path
+
+from .scenarios import COLUMN_TYPES, MORTGAGE_INSURANCE_COLUMNS, OPTIONAL_SCENARIO_COLUMNS, RESULT_COLUMNS, SCENARIO_COLUMNS, evaluate_scenarios
+
+DEFAULT_CHUNK_SIZE = 100_000
+PARQUET_SUFFIXES = (".parquet", ".pq")
+
+
+def _is_parquet(path):
+    return Path(path).suffix.lower() in PARQUET_SUFFIXES
+
+
+# Stream the named columns of a CSV or Parquet file as pandas DataFrames of at most chunk_size rows;
+# optional columns are read when the file has them
+def read_chunks(path, columns, optional_columns=(), chunk_size=DEFAULT_CHUNK_SIZE, dtype=None):
+    import pandas as pd
+
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        optional = [column for column in optional_columns if column in parquet_file.schema_arrow.names]
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=list(columns) + optional):
+            yield batch.to_pandas()
+    else:
+        wanted = set(columns) | set(optional_columns)
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=lambda column: column in wanted, dtype=dtype)
+
+
+# Stream a scenario file as pandas DataFrames of at most chunk_size rows
+def read_scenario_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    return read_chunks(path, SCENARIO_COLUMNS, OPTIONAL_SCENARIO_COLUMNS, chunk_size, {"occupancy": str, "formula": str, "fips": str})
+
+
+# Append result chunks to a CSV or Parquet file without holding earlier chunks in memory. The Parquet schema is
+# fixed from the first chunk's columns: column_types maps a column to its Arrow type alias ("string", "int64",
+# "bool"), every other column is float64, and each chunk is converted to that schema.
+class ResultWriter:
+    def __init__(self, path, column_types=None):
+        self.path = path
+        self.parquet = _is_parquet(path)
+        self.column_types = column_types or {}
+        self.schema = None
+        self.writer = None
+        self.rows = 0
+
+    def write(self, frame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self.writer is None:
+                self.schema = pa.schema([(column, pa.type_for_alias(self.column_types.get(column, "float64"))) for column in frame.columns])
+                self.writer = pq.ParquetWriter(self.path, self.schema)
+            self.writer.write_table(pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False))
+        else:
+            frame.to_csv(self.path, mode="a" if self.rows else "w", header=not self.rows, index=False)
+        self.rows += len(frame)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+# Price a scenario file chunk by chunk; workers > 1 fans the chunks out over a process pool in input order.
+# tables_root prices against the rule tables published there (shared_tables), picking up new versions between chunks.
+def run_scenario_file(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, tables_root=None):
+    import pandas as pd
+
+    frames = deque()
+
+    def scenario_chunks():
+        for chunk in read_scenario_chunks(input_path, chunk_size):
+            frames.append(chunk.reset_index(drop=True))
+            yield {column: chunk[column].to_numpy() for column in SCENARIO_COLUMNS + OPTIONAL_SCENARIO_COLUMNS if column in chunk}
+
+    if workers > 1:
+        from .parallel import evaluate_chunks_parallel
+
+        results = evaluate_chunks_parallel(scenario_chunks(), max_workers=workers, tables_root=tables_root)
+    elif tables_root is not None:
+        from .shared_tables import current_rule_tables
+
+        results = (evaluate_scenarios(chunk, **current_rule_tables(tables_root).scenario_tables()) for chunk in scenario_chunks())
+    else:
+        results = map(evaluate_scenarios, scenario_chunks())
+
+    writer = ResultWriter(output_path, COLUMN_TYPES)
+    try:
+        for result in results:
+            frame = frames.popleft()
+            columns = [column for column in RESULT_COLUMNS + MORTGAGE_INSURANCE_COLUMNS if column in result]
+            writer.write(pd.concat([frame, pd.DataFrame({column: result[column] for column in columns})], axis=1))
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m loan_engine", description="Price a CSV or Parquet file of loan scenarios.")
+    parser.add_argument("input", help=f"scenario file with columns: {', '.join(SCENARIO_COLUMNS)}")
+    parser.add_argument("output", help="result file (.csv or .parquet)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per chunk (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (default: %(default)s)")
+    parser.add_argument("--tables", default=os.environ.get("LOAN_ENGINE_TABLES"),
+                        help="price against the rule tables published in this directory (python -m loan_engine.shared_tables publish; "
+                             "default: $LOAN_ENGINE_TABLES)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    rows = run_scenario_file(args.input, args.output, args.chunk_size, args.workers, args.tables)
+    print(f"Priced {rows:,} scenarios -> {args.output}", file=sys.stderr)
+    return 0
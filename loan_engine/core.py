@@ -0,0 +1,181 @@
+from .formulas import TableCache, formula_records
+from .rules import affordability_loan_formulas, conforming_loan_limit, loan_formulas, loan_limits, ltv_limits
+
+
+# Monthly payment of a loan (PMT formula) at a monthly rate over num_payments, straight-line repayment at 0%.
+# Every scalar payment of the engine goes through here; batch.pmt_batch is the array form.
+def pmt(loan_amount, monthly_interest_rate, num_payments):
+    if monthly_interest_rate > 0:
+        return (monthly_interest_rate * loan_amount) / (1 - (1 + monthly_interest_rate) ** -num_payments)
+    return loan_amount / num_payments
+
+
+# Function to calculate loan details (updated_loan_calculator_app.py signature)
+def calculate_loan(purchase_price, loan_term, interest_rate, down_payment_pct, seller_concession_pct, property_tax, home_insurance, flood_insurance):
+    total_sale_price = purchase_price / (1 - seller_concession_pct)
+    loan_amount = total_sale_price * (1 - down_payment_pct)
+    cash_to_close = total_sale_price * down_payment_pct
+
+    # Monthly mortgage calculation (PMT formula), straight-line repayment at 0%
+    monthly_interest_rate = (interest_rate / 100) / 12
+    num_payments = loan_term * 12
+    monthly_payment = pmt(loan_amount, monthly_interest_rate, num_payments)
+
+    # Escrow calculations (tax, insurance, flood insurance)
+    monthly_property_tax = property_tax / 12
+    monthly_home_insurance = home_insurance / 12
+    monthly_flood_insurance = flood_insurance / 12
+
+    # Total monthly payment
+    total_monthly_payment = monthly_payment + monthly_property_tax + monthly_home_insurance + monthly_flood_insurance
+
+    return total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment
+
+
+# Formula-key variant used by the home affordability pages; round_cents reproduces the pages that round every step
+def calculate_formula_loan(purchase_price, interest_rate, loan_term, formula, property_tax, home_insurance, flood_insurance,
+                           loan_formulas=affordability_loan_formulas, round_cents=False):
+    money = (lambda value: round(value, 2)) if round_cents else (lambda value: value)
+
+    interest_rate = round(float(interest_rate), 3)  # Round interest rate to the nearest thousandth
+    record = formula_records(loan_formulas)[formula]
+    down_payment_pct = record.down_payment_pct
+    seller_concession_pct = record.seller_concession_pct
+
+    total_sale_price = money(purchase_price / (1 - seller_concession_pct))
+    loan_amount = money(total_sale_price * (1 - down_payment_pct))
+    cash_to_close = money(total_sale_price * down_payment_pct)
+
+    monthly_interest_rate = (interest_rate / 100) / 12
+    num_payments = loan_term * 12
+    monthly_payment = money(pmt(loan_amount, monthly_interest_rate, num_payments))
+
+    # Calculate monthly taxes & insurance
+    monthly_property_tax = money(property_tax / 12)
+    monthly_home_insurance = money(home_insurance / 12)
+    monthly_flood_insurance = money(flood_insurance / 12)
+
+    total_monthly_payment = money(monthly_payment + monthly_property_tax + monthly_home_insurance + monthly_flood_insurance)
+
+    return total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment, monthly_property_tax, monthly_home_insurance, monthly_flood_insurance
+
+
+# Formulas whose max price under the loan limit covers purchase_price and whose LTV the occupancy/units allow
+def eligible_formulas(purchase_price, occupancy_type, num_units, loan_formulas=affordability_loan_formulas,
+                      loan_limit=conforming_loan_limit, ltv_limits=ltv_limits):
+    max_ltv = ltv_limits.get(occupancy_type, {}).get(num_units, 0)
+    eligible = []
+    for formula in formula_records(loan_formulas).values():
+        max_price = (loan_limit / formula.loan_factor) * formula.concession_factor
+
+        if purchase_price <= max_price and formula.max_ltv <= max_ltv:
+            eligible.append(formula.label)
+    return eligible
+
+
+# Conforming formulas must keep the loan amount at or below the conforming limit
+def exceeds_conforming_limit(formula, loan_amount, limits):
+    return formula.startswith("C") and loan_amount > limits["conforming"]
+
+
+# High-balance formulas must land strictly above the conforming limit and at or below the high-balance limit
+def outside_high_balance_range(formula, loan_amount, limits):
+    return formula.startswith("HB") and (loan_amount <= limits["conforming"] or loan_amount > limits["high_balance"])
+
+
+# Down payment fraction that brings the loan amount back down to loan_limit
+def adjusted_down_payment_pct(loan_amount, loan_limit, total_sale_price, down_payment_pct):
+    return ((loan_amount - loan_limit) / total_sale_price) + down_payment_pct
+
+
+# First formula other than selected_formula whose estimated loan amount falls in (min_loan_amount, max_loan_amount]
+def next_formula(purchase_price, selected_formula, max_loan_amount, min_loan_amount=None, program=None,
+                 loan_formulas=loan_formulas):
+    for key, formula in formula_records(loan_formulas).items():
+        if key == selected_formula or (program and formula.program != program):
+            continue
+        estimated_loan_amount = purchase_price * formula.loan_factor
+        if estimated_loan_amount <= max_loan_amount and (min_loan_amount is None or estimated_loan_amount > min_loan_amount):
+            return key
+    return None
+
+
+# Maximum seller concession for the occupancy type at this LTV; None when the occupancy does not allow the LTV
+def max_seller_concession(occupancy_type, ltv):
+    if occupancy_type == "Primary Residence":
+        return 0.03 if ltv > 90 else 0.06
+    if occupancy_type == "Second Home":
+        return None if ltv > 90 else 0.06
+    if occupancy_type == "Investment Property":
+        return 0.02
+    return None
+
+
+def _formula_lookup(loan_formulas):
+    lookup = {key: key for key in loan_formulas}
+    for key in loan_formulas:
+        lookup.setdefault(key.split(" ")[0], key)
+    return lookup
+
+
+_formula_lookups = TableCache(_formula_lookup)
+
+
+# Map full formula labels and their leading codes ("C.10.6") to the formula key; built once per table, so
+# callers must not modify the mapping
+def formula_lookup(loan_formulas=loan_formulas):
+    return _formula_lookups(loan_formulas)
+
+
+# Scalar form of scenarios.evaluate_scenarios: one scenario dict through calculate_loan and the checks of
+# updated_loan_calculator_app.py. Missing escrow fields default to 0.
+def evaluate_scenario(scenario, loan_formulas=loan_formulas, loan_limits=loan_limits, index=None, calculate=calculate_loan):
+    from .eligibility import tables_next_formula_index
+
+    index = index or tables_next_formula_index(loan_formulas, loan_limits)
+    formula = formula_lookup(loan_formulas)[scenario["formula"]]
+    num_units = int(scenario["units"])
+    purchase_price = float(scenario["price"])
+    record = formula_records(loan_formulas)[formula]
+    down_payment_pct = record.down_payment_pct
+    seller_concession_pct = record.seller_concession_pct
+    limits = loan_limits[num_units]
+
+    total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment = calculate(
+        purchase_price, float(scenario["term"]), float(scenario["rate"]), down_payment_pct, seller_concession_pct,
+        float(scenario.get("tax", 0.0)), float(scenario.get("insurance", 0.0)), float(scenario.get("flood", 0.0))
+    )
+
+    conforming_exceeded = exceeds_conforming_limit(formula, loan_amount, limits)
+    high_balance_outside = outside_high_balance_range(formula, loan_amount, limits)
+    max_exceeded = loan_amount > limits["high_balance"]
+
+    adjusted = None
+    if conforming_exceeded or max_exceeded:
+        binding_limit = limits["conforming"] if conforming_exceeded else limits["high_balance"]
+        adjusted = adjusted_down_payment_pct(loan_amount, binding_limit, total_sale_price, down_payment_pct)
+
+    rule = "conforming" if conforming_exceeded else "high_balance" if high_balance_outside else "max_loan_limit" if max_exceeded else None
+    suggestion = index.next_formula(purchase_price, formula, num_units, rule) if rule else None
+
+    ltv = (loan_amount / total_sale_price) * 100
+    max_concession = max_seller_concession(scenario["occupancy"], ltv)
+    concession_exceeded = max_concession is not None and seller_concession_pct > max_concession
+
+    return {
+        "formula": formula,
+        "total_sale_price": total_sale_price,
+        "loan_amount": loan_amount,
+        "cash_to_close": cash_to_close,
+        "monthly_payment": monthly_payment,
+        "total_monthly_payment": total_monthly_payment,
+        "ltv": ltv,
+        "exceeds_conforming_limit": conforming_exceeded,
+        "outside_high_balance_range": high_balance_outside,
+        "exceeds_max_loan_limit": max_exceeded,
+        "adjusted_down_payment_pct": adjusted,
+        "next_formula": suggestion,
+        "occupancy_ltv_not_allowed": max_concession is None,
+        "seller_concession_exceeded": concession_exceeded,
+        "eligible": not (conforming_exceeded or high_balance_outside or max_exceeded or max_concession is None or concession_exceeded),
+    }
@@ -0,0 +1,100 @@
+import csv
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from .rules import loan_limits
+
+DATA_DIR = Path(__file__).parent / "data"
+DEFAULT_CSV = DATA_DIR / "county_loan_limits.csv"
+UNIT_COLUMNS = ("one_unit", "two_unit", "three_unit", "four_unit")
+FIPS_CODES = 100_000  # five-digit state + county codes
+
+
+# FIPS code of a file value; a missing code (None, NaN, "") is 0, which no county uses, so the row takes the national limits
+def parse_fips(fips):
+    if fips is None or fips != fips or not str(fips).strip():
+        return 0
+    try:
+        return int(str(fips).strip())
+    except ValueError:
+        raise ValueError(f"FIPS code {fips!r} is not a number") from None
+
+
+# County high-balance limits in a dense (FIPS_CODES, 4) int32 array: row = FIPS code, column = units - 1,
+# 0 = county not listed. A lookup is one index into the array; counties that are not listed fall back to
+# the national table, and the conforming limit is always the national baseline for the unit count.
+class CountyLoanLimits:
+    def __init__(self, table, loan_limits=loan_limits):
+        self.table = table
+        self.units = np.array(sorted(loan_limits))
+        self.conforming = np.array([loan_limits[units]["conforming"] for units in self.units], dtype=np.int64)
+        self.high_balance = np.array([loan_limits[units]["high_balance"] for units in self.units], dtype=np.int64)
+        self.loan_limits = loan_limits
+
+    @classmethod
+    def from_csv(cls, path=DEFAULT_CSV, loan_limits=loan_limits):
+        table = np.zeros((FIPS_CODES, len(UNIT_COLUMNS)), dtype=np.int32)
+        with open(path, newline="") as file:
+            for row in csv.DictReader(line for line in file if not line.startswith("#")):
+                table[parse_fips(row["fips"])] = [int(row[column]) for column in UNIT_COLUMNS]
+        return cls(table, loan_limits)
+
+    # Memory-map a table written by save(); worker processes share its pages instead of re-parsing the CSV
+    @classmethod
+    def load(cls, path, loan_limits=loan_limits, mmap_mode="r"):
+        return cls(np.load(path, mmap_mode=mmap_mode), loan_limits)
+
+    # Write the table as .npy through a temporary file so concurrent readers never see a partial file
+    def save(self, path):
+        path = Path(path)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(temp_path, "wb") as file:
+            np.save(file, np.ascontiguousarray(self.table))
+        os.replace(temp_path, path)
+
+    # Table row and column of each lookup. Values outside the table raise a ValueError naming the first bad one;
+    # plain indexing would raise a bare IndexError, or read the wrong row for a negative FIPS code.
+    def positions(self, fips, num_units):
+        num_units = np.asarray(num_units)
+        bad_units = ~np.isin(num_units, self.units)
+        if bad_units.any():
+            raise ValueError(f"unit count {num_units[bad_units].flat[0]} is not one of {', '.join(map(str, self.units))}")
+        bad_fips = (fips < 0) | (fips >= FIPS_CODES)
+        if bad_fips.any():
+            raise ValueError(f"FIPS code {fips[bad_fips].flat[0]} is outside 0-{FIPS_CODES - 1}")
+        return fips, np.searchsorted(self.units, num_units)
+
+    # Same shape as a loan_limits entry, so it can be passed to the limit checks in core
+    def limits(self, fips, num_units):
+        row, column = self.positions(np.asarray(parse_fips(fips)), num_units)
+        national = self.loan_limits[num_units]
+        county = int(self.table[row, column])
+        return {"conforming": national["conforming"], "high_balance": county or national["high_balance"]}
+
+    # Vectorized form of limits(): (conforming, high_balance) arrays, like batch.unit_limits
+    def unit_limits_many(self, fips, num_units):
+        fips = np.asarray(fips)
+        if fips.dtype.kind not in "iu":
+            fips = np.array([parse_fips(code) for code in fips.tolist()], dtype=np.intp)
+        fips, unit_position = self.positions(fips, num_units)
+        county = self.table[fips, unit_position]
+        return self.conforming[unit_position], np.where(county > 0, county, self.high_balance[unit_position])
+
+
+# Default table, loaded once per process. The CSV is compiled to a .npy beside it on first use (and again
+# whenever the CSV is newer); later loads memory-map the compiled file.
+@lru_cache(maxsize=None)
+def county_loan_limits(csv_path=DEFAULT_CSV):
+    csv_path = Path(csv_path)
+    compiled_path = csv_path.with_suffix(".npy")
+    if compiled_path.exists() and compiled_path.stat().st_mtime >= csv_path.stat().st_mtime:
+        return CountyLoanLimits.load(compiled_path)
+    limits = CountyLoanLimits.from_csv(csv_path)
+    try:
+        limits.save(compiled_path)
+    except OSError:
+        return limits  # read-only install: keep the parsed table in memory
+    return CountyLoanLimits.load(compiled_path)
@@ -0,0 +1,128 @@
+import argparse
+import sys
+
+import numpy as np
+
+from .batch import calculate_loan_batch, formula_rows, max_affordable_price_batch
+from .core import formula_lookup
+from .formulas import formula_records
+from .rules import dti_limits, loan_formulas, loan_limits
+
+# Input columns of a lead file: gross monthly income and other monthly debt payments, then the loan inputs as
+# on the calculator pages (annual tax and insurance)
+LEAD_COLUMNS = ("income", "debts", "units", "term", "rate", "tax", "insurance", "flood")
+# Optional columns: a target price and formula add the ratios of that loan and whether it qualifies
+OPTIONAL_LEAD_COLUMNS = ("price", "formula")
+# Arrow type of each lead and result column that is not float64 (see cli.ResultWriter)
+COLUMN_TYPES = {"units": "int64", "formula": "string", "best_formula": "string", "qualifies": "bool"}
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+# Monthly debts per lead: a vector, or a (leads x liabilities) matrix summed across each row (NaN = no liability)
+def monthly_debt_total(monthly_debts):
+    monthly_debts = np.asarray(monthly_debts, dtype=np.float64)
+    return np.nansum(monthly_debts, axis=-1) if monthly_debts.ndim == 2 else monthly_debts
+
+
+# Vectorized solver.dti_ratios: (front_end, back_end) in percent, inf where income is not positive
+def dti_ratios_batch(monthly_income, total_monthly_payment, monthly_debts=0.0):
+    monthly_income = np.asarray(monthly_income, dtype=np.float64)
+    total_monthly_payment = np.asarray(total_monthly_payment, dtype=np.float64)
+    safe_income = np.where(monthly_income > 0, monthly_income, 1.0)
+    front_end = np.where(monthly_income > 0, total_monthly_payment / safe_income * 100, np.inf)
+    back_end = np.where(monthly_income > 0, (total_monthly_payment + monthly_debt_total(monthly_debts)) / safe_income * 100, np.inf)
+    return front_end, back_end
+
+
+# Vectorized solver.max_qualifying_payment
+def max_qualifying_payment_batch(monthly_income, monthly_debts=0.0, dti_limits=dti_limits):
+    monthly_income = np.asarray(monthly_income, dtype=np.float64)
+    front_end = monthly_income * dti_limits["front_end"] / 100
+    back_end = monthly_income * dti_limits["back_end"] / 100 - monthly_debt_total(monthly_debts)
+    return np.maximum(np.minimum(front_end, back_end), 0.0)
+
+
+# Leads down the rows, formulas across the columns; scalars broadcast as they are
+def _lead_column(value, dtype=np.float64):
+    value = np.asarray(value, dtype=dtype)
+    return value.reshape(-1, 1) if value.ndim else value
+
+
+# (leads x formulas) matrix of solver.max_qualifying_price. The qualifying payment and loan amount are solved once
+# per lead and only the limit cap and price factors broadcast across formulas; NaN marks HB formulas the lead cannot
+# take above the conforming limit. formulas defaults to every formula in loan_formulas.
+def max_qualifying_prices(monthly_income, monthly_debts, loan_term, interest_rate, property_tax, home_insurance, flood_insurance=0.0,
+                          num_units=1, formulas=None, dti_limits=dti_limits, loan_formulas=loan_formulas, loan_limits=loan_limits):
+    formulas = np.array(list(loan_formulas) if formulas is None else list(formulas))
+    budget = max_qualifying_payment_batch(monthly_income, monthly_debts, dti_limits)
+    return max_affordable_price_batch(_lead_column(budget), _lead_column(loan_term), _lead_column(interest_rate), formulas[None, :],
+                                      _lead_column(property_tax), _lead_column(home_insurance), _lead_column(flood_insurance),
+                                      _lead_column(num_units, np.intp), loan_formulas, loan_limits)
+
+
+# Screen a block of leads. leads maps LEAD_COLUMNS (and optionally price/formula) to equal-length arrays; "debts" may
+# also be a (leads x liabilities) matrix. Returns the qualifying payment, the max price for every formula (keyed
+# "max_price_<code>"), the formula with the highest max price (None when nothing qualifies), and with a target loan its ratios and whether it qualifies.
+def qualify_leads(leads, dti_limits=dti_limits, loan_formulas=loan_formulas, loan_limits=loan_limits):
+    records = formula_records(loan_formulas)
+    monthly_debts = monthly_debt_total(leads["debts"])
+    prices = max_qualifying_prices(leads["income"], monthly_debts, leads["term"], leads["rate"], leads["tax"], leads["insurance"],
+                                   leads["flood"], leads["units"], None, dti_limits, loan_formulas, loan_limits)
+
+    ranked = np.where(np.isnan(prices), -np.inf, prices)
+    best = ranked.argmax(axis=1)
+    best_price = ranked[np.arange(len(best)), best]
+    found = best_price > 0
+    labels = np.array(list(records))
+    result = {
+        "max_payment": max_qualifying_payment_batch(leads["income"], monthly_debts, dti_limits),
+        **{f"max_price_{record.code}": prices[:, row] for row, record in enumerate(records.values())},
+        "best_formula": np.where(found, labels[best], None),
+        "best_price": np.where(found, best_price, np.nan),
+    }
+
+    if "price" in leads and "formula" in leads:
+        lookup = formula_lookup(loan_formulas)
+        rows, table = formula_rows(np.array([lookup[str(key)] for key in leads["formula"]]), loan_formulas)
+        loan = calculate_loan_batch(leads["price"], leads["term"], leads["rate"], table["down_payment_pct"][rows],
+                                    table["seller_concession_pct"][rows], leads["tax"], leads["insurance"], leads["flood"])
+        front_end, back_end = dti_ratios_batch(leads["income"], loan["total_monthly_payment"], monthly_debts)
+        result["total_monthly_payment"] = loan["total_monthly_payment"]
+        result["front_end"] = front_end
+        result["back_end"] = back_end
+        result["qualifies"] = (front_end <= dti_limits["front_end"]) & (back_end <= dti_limits["back_end"])
+    return result
+
+
+# Screen a CSV or Parquet lead file chunk by chunk, appending the qualify_leads columns to each lead
+def run_lead_file(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, dti_limits=dti_limits):
+    import pandas as pd
+
+    from .cli import ResultWriter, read_chunks
+
+    writer = ResultWriter(output_path, COLUMN_TYPES)
+    try:
+        for chunk in read_chunks(input_path, LEAD_COLUMNS, OPTIONAL_LEAD_COLUMNS, chunk_size, {"formula": str}):
+            chunk = chunk.reset_index(drop=True)
+            result = qualify_leads({column: chunk[column].to_numpy() for column in chunk}, dti_limits)
+            writer.write(pd.concat([chunk, pd.DataFrame(result)], axis=1))
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m loan_engine.dti", description="Screen a CSV or Parquet file of pre-qualification leads.")
+    parser.add_argument("input", help=f"lead file with columns: {', '.join(LEAD_COLUMNS)} (optional: {', '.join(OPTIONAL_LEAD_COLUMNS)})")
+    parser.add_argument("output", help="result file (.csv or .parquet)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per chunk (default: %(default)s)")
+    parser.add_argument("--front-end", type=float, default=dti_limits["front_end"], help="max front-end DTI %% (default: %(default)s)")
+    parser.add_argument("--back-end", type=float, default=dti_limits["back_end"], help="max back-end DTI %% (default: %(default)s)")
+    args = parser.parse_args(argv)
+    rows = run_lead_file(args.input, args.output, args.chunk_size, {"front_end": args.front_end, "back_end": args.back_end})
+    print(f"Screened {rows:,} leads -> {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import math
+from bisect import bisect_left
+from functools import lru_cache
+
+from .formulas import TableCache, formula_records
+from .rules import affordability_loan_formulas, conforming_loan_limit, loan_formulas, loan_limits, ltv_limits
+
+_default_loan_formulas, _default_loan_limits = loan_formulas, loan_limits
+
+
+# Largest price whose estimated loan amount (price * factor) stays at or below limit, exact to the last float
+def _price_ceiling(limit, factor):
+    price = limit / factor
+    while price * factor > limit:
+        price = math.nextafter(price, -math.inf)
+    while math.nextafter(price, math.inf) * factor <= limit:
+        price = math.nextafter(price, math.inf)
+    return price
+
+
+# Price axis cut into segments with a constant, precomputed tuple of eligible formulas.
+# bounds holds (formula, floor, ceiling) in priority order; a formula is eligible when floor < price <= ceiling.
+class PriceIndex:
+    def __init__(self, bounds):
+        self.points = sorted({edge for _, floor, ceiling in bounds for edge in (floor, ceiling) if math.isfinite(edge)})
+        edges = [-math.inf] + self.points + [math.inf]
+        self.segments = [
+            tuple(formula for formula, floor, ceiling in bounds if floor <= edges[i] and edges[i + 1] <= ceiling)
+            for i in range(len(edges) - 1)
+        ]
+
+    def lookup(self, price):
+        return self.segments[bisect_left(self.points, price)]
+
+    def lookup_many(self, prices):
+        points, segments = self.points, self.segments
+        return [segments[bisect_left(points, price)] for price in prices]
+
+
+# Eligible formulas by price for each (occupancy, units), matching the loop in home_affordability_calculator (1).py
+class FormulaPriceIndex:
+    def __init__(self, loan_formulas=affordability_loan_formulas, loan_limit=conforming_loan_limit, ltv_limits=ltv_limits):
+        self.indexes = {}
+        for occupancy_type, unit_limits in ltv_limits.items():
+            for num_units, max_ltv in unit_limits.items():
+                bounds = []
+                for formula in formula_records(loan_formulas).values():
+                    if formula.max_ltv <= max_ltv:
+                        max_price = (loan_limit / formula.loan_factor) * formula.concession_factor
+                        bounds.append((formula.label, -math.inf, max_price))
+                self.indexes[occupancy_type, num_units] = PriceIndex(bounds)
+        self.empty = PriceIndex([])
+
+    def eligible_formulas(self, purchase_price, occupancy_type, num_units):
+        return self.indexes.get((occupancy_type, num_units), self.empty).lookup(purchase_price)
+
+    def eligible_formulas_many(self, purchase_prices, occupancy_type, num_units):
+        return self.indexes.get((occupancy_type, num_units), self.empty).lookup_many(purchase_prices)
+
+
+# Next eligible formula per (units, rule), matching the next_formula loops in updated_loan_calculator_app.py
+class NextFormulaIndex:
+    def __init__(self, loan_formulas=loan_formulas, loan_limits=loan_limits):
+        self.indexes = {}
+        for num_units, limits in loan_limits.items():
+            windows = {
+                "conforming": ("C", None, limits["conforming"]),
+                "high_balance": ("HB", limits["conforming"], limits["high_balance"]),
+                "max_loan_limit": (None, None, limits["high_balance"]),
+            }
+            for rule, (program, min_loan_amount, max_loan_amount) in windows.items():
+                bounds = []
+                for key, formula in formula_records(loan_formulas).items():
+                    if program and formula.program != program:
+                        continue
+                    factor = formula.loan_factor
+                    floor = -math.inf if min_loan_amount is None else _price_ceiling(min_loan_amount, factor)
+                    bounds.append((key, floor, _price_ceiling(max_loan_amount, factor)))
+                self.indexes[num_units, rule] = PriceIndex(bounds)
+
+    def next_formula(self, purchase_price, selected_formula, num_units, rule):
+        for key in self.indexes[num_units, rule].lookup(purchase_price):
+            if key != selected_formula:
+                return key
+        return None
+
+
+# Indexes over the default rule tables, built once per process and shared by every session
+@lru_cache(maxsize=None)
+def eligibility_index():
+    return FormulaPriceIndex()
+
+
+@lru_cache(maxsize=None)
+def next_formula_index():
+    return NextFormulaIndex()
+
+
+_next_formula_indexes = TableCache(NextFormulaIndex)
+
+
+# NextFormulaIndex for the formula and limit tables a caller passes in: the shared index for the default tables,
+# else one built once per table pair
+def tables_next_formula_index(loan_formulas=loan_formulas, loan_limits=loan_limits):
+    if loan_formulas is _default_loan_formulas and loan_limits is _default_loan_limits:
+        return next_formula_index()
+    return _next_formula_indexes(loan_formulas, loan_limits)
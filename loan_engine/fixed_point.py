@@ -0,0 +1,132 @@
+"""Integer-cents loan math.
+
+Rounding policy: every money value is an integer number of cents and each derived value is rounded
+exactly once, to the nearest cent with ties rounded half up. Sale price, loan amount, P&I and each monthly
+escrow item are rounded from exact integer ratios (only the PMT annuity factor goes through a float);
+cash to close is sale price minus loan amount and the total payment is the sum of the rounded parts,
+so the displayed figures always add up. Rates are carried in thousandths of a percent (the 0.001 step
+of the Interest input) and formula percentages in basis points.
+"""
+import math
+
+import numpy as np
+
+from .batch import calculate_formula_loan_batch, formula_rows
+from .core import calculate_formula_loan
+from .formulas import formula_records
+from .rules import affordability_loan_formulas
+
+CENTS_COLUMNS = ("total_sale_price", "loan_amount", "cash_to_close", "monthly_payment", "total_monthly_payment",
+                 "monthly_property_tax", "monthly_home_insurance", "monthly_flood_insurance")
+
+
+# Round numerator / denominator half up for non-negative integers (Python ints or int64 arrays)
+def div_round(numerator, denominator):
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+# Dollars to cents, half up; the inner round() strips binary noise such as 0.145 * 100 == 14.499999999999998
+def to_cents(dollars):
+    return math.floor(round(dollars * 100, 6) + 0.5)
+
+
+def to_rate_thousandths(interest_rate):
+    return math.floor(round(interest_rate * 1000, 6) + 0.5)
+
+
+def calculate_loan_cents(price_cents, loan_term, rate_thousandths, down_payment_bp, seller_concession_bp,
+                         tax_cents, insurance_cents, flood_cents):
+    total_sale_price = div_round(price_cents * 10000, 10000 - seller_concession_bp)
+    loan_amount = div_round(total_sale_price * (10000 - down_payment_bp), 10000)
+    cash_to_close = total_sale_price - loan_amount
+
+    num_payments = int(round(loan_term * 12))
+    if rate_thousandths > 0:
+        monthly_interest_rate = rate_thousandths / 1200000
+        factor = monthly_interest_rate / (1 - (1 + monthly_interest_rate) ** -num_payments)
+        monthly_payment = int(loan_amount * factor + 0.5)
+    else:
+        monthly_payment = div_round(loan_amount, num_payments)
+
+    monthly_property_tax = div_round(tax_cents, 12)
+    monthly_home_insurance = div_round(insurance_cents, 12)
+    monthly_flood_insurance = div_round(flood_cents, 12)
+    total_monthly_payment = monthly_payment + monthly_property_tax + monthly_home_insurance + monthly_flood_insurance
+
+    return (total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment,
+            monthly_property_tax, monthly_home_insurance, monthly_flood_insurance)
+
+
+# Same arguments as calculate_formula_loan (dollars in), integer cents out
+def calculate_formula_loan_cents(purchase_price, interest_rate, loan_term, formula, property_tax, home_insurance, flood_insurance,
+                                 loan_formulas=affordability_loan_formulas):
+    record = formula_records(loan_formulas)[formula]
+    return calculate_loan_cents(to_cents(purchase_price), loan_term, to_rate_thousandths(interest_rate),
+                                round(record.down_payment_pct * 10000), round(record.seller_concession_pct * 10000),
+                                to_cents(property_tax), to_cents(home_insurance), to_cents(flood_insurance))
+
+
+def _array_scaled(values, scale):
+    return np.floor(np.round(np.asarray(values, dtype=np.float64) * scale, 6) + 0.5).astype(np.int64)
+
+
+# Vectorized calculate_loan_cents over int64 arrays (all arguments broadcast)
+def calculate_loan_cents_batch(price_cents, loan_term, rate_thousandths, down_payment_bp, seller_concession_bp,
+                               tax_cents=0, insurance_cents=0, flood_cents=0):
+    price_cents = np.asarray(price_cents, dtype=np.int64)
+    rate_thousandths = np.asarray(rate_thousandths, dtype=np.int64)
+    down_payment_bp = np.asarray(down_payment_bp, dtype=np.int64)
+    seller_concession_bp = np.asarray(seller_concession_bp, dtype=np.int64)
+
+    total_sale_price = div_round(price_cents * 10000, 10000 - seller_concession_bp)
+    loan_amount = div_round(total_sale_price * (10000 - down_payment_bp), 10000)
+    cash_to_close = total_sale_price - loan_amount
+
+    num_payments = np.rint(np.asarray(loan_term, dtype=np.float64) * 12).astype(np.int64)
+    has_interest = rate_thousandths > 0
+    monthly_interest_rate = np.where(has_interest, rate_thousandths, 1) / 1200000
+    factor = monthly_interest_rate / (1 - (1 + monthly_interest_rate) ** -num_payments)
+    monthly_payment = np.where(has_interest,
+                               np.floor(loan_amount * factor + 0.5).astype(np.int64),
+                               div_round(loan_amount, num_payments))
+
+    escrow = [div_round(np.asarray(value, dtype=np.int64), 12) for value in (tax_cents, insurance_cents, flood_cents)]
+    total_monthly_payment = monthly_payment + escrow[0] + escrow[1] + escrow[2]
+
+    columns = np.broadcast_arrays(total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment, *escrow)
+    return dict(zip(CENTS_COLUMNS, columns))
+
+
+# Batch form of calculate_formula_loan_cents (dollars and formula keys in, int64 cents out)
+def calculate_formula_loan_cents_batch(purchase_price, interest_rate, loan_term, formula, property_tax, home_insurance,
+                                       flood_insurance, loan_formulas=affordability_loan_formulas):
+    rows, formulas = formula_rows(formula, loan_formulas)
+    down_payment_bp = np.rint(formulas["down_payment_pct"] * 10000).astype(np.int64)[rows]
+    seller_concession_bp = np.rint(formulas["seller_concession_pct"] * 10000).astype(np.int64)[rows]
+    rate_thousandths = _array_scaled(interest_rate, 1000)
+    return calculate_loan_cents_batch(_array_scaled(purchase_price, 100), loan_term, rate_thousandths, down_payment_bp, seller_concession_bp,
+                                      _array_scaled(property_tax, 100), _array_scaled(home_insurance, 100), _array_scaled(flood_insurance, 100))
+
+
+# Compare the fixed-point results with the two float paths the pages use today: raw floats shown to the
+# cent (pages 1-3) and round(..., 2) after every step (pages 4-8). Returns per-column mismatch counts and the
+# largest difference in cents for each path.
+def reconciliation_report(purchase_price, interest_rate, loan_term, formula, property_tax, home_insurance, flood_insurance,
+                          loan_formulas=affordability_loan_formulas):
+    columns = np.broadcast_arrays(*(np.asarray(value) for value in (purchase_price, interest_rate, loan_term, formula,
+                                                                     property_tax, home_insurance, flood_insurance)))
+    columns = [column.ravel() for column in columns]
+    fixed = calculate_formula_loan_cents_batch(*columns, loan_formulas=loan_formulas)
+
+    raw = calculate_formula_loan_batch(*columns, loan_formulas=loan_formulas)
+    stepwise = [calculate_formula_loan(*row, loan_formulas=loan_formulas, round_cents=True)
+                for row in zip(*(column.tolist() for column in columns))]
+    stepwise = dict(zip(CENTS_COLUMNS, np.array(stepwise, dtype=np.float64).reshape(-1, len(CENTS_COLUMNS)).T))
+
+    report = {"rows": len(columns[0])}
+    for path, results in (("float", raw), ("float_round", stepwise)):
+        report[path] = {}
+        for column in CENTS_COLUMNS:
+            diff = np.abs(fixed[column] - _array_scaled(results[column], 100))
+            report[path][column] = {"mismatched": int(np.count_nonzero(diff)), "max_cents_diff": int(diff.max(initial=0))}
+    return report
@@ -0,0 +1,76 @@
+from .rules import affordability_loan_formulas, legacy_loan_formulas, loan_formulas
+
+
+# One loan formula parsed once: program ("C" or "HB") and code ("C.10.6") split out of the key, the display
+# label kept as-is, and the percentages stored as fractions together with the factors the loops multiply by
+class Formula:
+    __slots__ = ("label", "code", "program", "is_conforming", "is_high_balance", "down_payment_pct",
+                 "seller_concession_pct", "max_ltv", "loan_factor", "concession_factor")
+
+    def __init__(self, label, values):
+        self.label = label
+        self.code = label.split(" ")[0]
+        self.program = self.code.split(".")[0]
+        self.is_conforming = self.program.startswith("C")
+        self.is_high_balance = self.program.startswith("HB")
+        self.down_payment_pct = values["down_payment"] / 100
+        self.seller_concession_pct = values["seller_concession"] / 100
+        self.max_ltv = values["max_ltv"]
+        self.loan_factor = 1 - self.down_payment_pct  # loan amount per dollar of sale price
+        self.concession_factor = 1 - self.seller_concession_pct  # purchase price per dollar of sale price
+
+    def __repr__(self):
+        return f"Formula({self.code!r}, down_payment_pct={self.down_payment_pct}, seller_concession_pct={self.seller_concession_pct})"
+
+
+def compile_formulas(loan_formulas):
+    return {label: Formula(label, values) for label, values in loan_formulas.items()}
+
+
+# Compiled records for the startup tables, kept for the process (they are the default arguments everywhere)
+_compiled = {id(table): (table, compile_formulas(table)) for table in (loan_formulas, affordability_loan_formulas, legacy_loan_formulas)}
+# Compiled records of the tables registered by the last rule reload, by table name; a reload replaces the entry
+# of the version it supersedes. Other tables are compiled on each call.
+_registered = {}
+
+
+# Compile a table loaded at run time (a reloaded rule configuration) once, so formula_records serves it like a
+# default table; name is its table in the configuration (rule_config.FORMULA_TABLES)
+def register_formulas(loan_formulas, name="loan_formulas"):
+    table, records = _registered.get(name, (None, None))
+    if table is not loan_formulas:
+        records = formula_records(loan_formulas)
+        _registered[name] = (loan_formulas, records)
+    return records
+
+
+def formula_records(loan_formulas=loan_formulas):
+    table, records = _compiled.get(id(loan_formulas), (None, None))
+    if table is loan_formulas:
+        return records
+    for table, records in _registered.values():
+        if table is loan_formulas:
+            return records
+    return compile_formulas(loan_formulas)
+
+
+# Values built once per rule table (or tuple of tables), keyed by identity since the tables are dicts. Only the
+# maxsize most recently used tables are kept, so hot reloads and per-request tables do not pile up entries.
+class TableCache:
+    def __init__(self, build, maxsize=8):
+        self.build = build
+        self.maxsize = maxsize
+        self.entries = {}
+
+    def __call__(self, *tables):
+        key = tuple(id(table) for table in tables)
+        entry = self.entries.pop(key, None)
+        if entry is None or any(cached is not table for cached, table in zip(entry[0], tables)):
+            entry = (tables, self.build(*tables))
+        self.entries[key] = entry
+        while len(self.entries) > self.maxsize:
+            del self.entries[next(iter(self.entries))]
+        return entry[1]
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,106 @@
+from .core import exceeds_conforming_limit, max_seller_concession, outside_high_balance_range, pmt
+
+
+# Node functions of the calculator graph; each takes its inputs in declaration order and returns its outputs
+def _sale_price(purchase_price, seller_concession_pct):
+    return (purchase_price / (1 - seller_concession_pct),)
+
+
+def _loan_amount(total_sale_price, down_payment_pct):
+    return total_sale_price * (1 - down_payment_pct), total_sale_price * down_payment_pct
+
+
+def _principal_interest(loan_amount, loan_term, interest_rate):
+    return (pmt(loan_amount, (interest_rate / 100) / 12, loan_term * 12),)
+
+
+def _escrow(property_tax, home_insurance, flood_insurance):
+    return property_tax / 12, home_insurance / 12, flood_insurance / 12
+
+
+# Summed in the same order as calculate_loan so the total matches it to the last bit
+def _total_payment(monthly_payment, monthly_property_tax, monthly_home_insurance, monthly_flood_insurance):
+    return (monthly_payment + monthly_property_tax + monthly_home_insurance + monthly_flood_insurance,)
+
+
+def _eligibility(formula, num_units, occupancy_type, loan_amount, total_sale_price, seller_concession_pct, loan_limits):
+    limits = loan_limits[num_units]
+    ltv = (loan_amount / total_sale_price) * 100
+    max_concession = max_seller_concession(occupancy_type, ltv)
+    return (
+        exceeds_conforming_limit(formula, loan_amount, limits),
+        outside_high_balance_range(formula, loan_amount, limits),
+        loan_amount > limits["high_balance"],
+        ltv,
+        max_concession,
+        max_concession is not None and seller_concession_pct > max_concession,
+    )
+
+
+# (name, inputs, outputs, function) in dependency order: sale price -> loan amount -> P&I and eligibility,
+# with escrow on its own branch so a tax or insurance change never re-runs the PMT or the limit checks
+LOAN_NODES = (
+    ("sale_price", ("purchase_price", "seller_concession_pct"), ("total_sale_price",), _sale_price),
+    ("loan_amount", ("total_sale_price", "down_payment_pct"), ("loan_amount", "cash_to_close"), _loan_amount),
+    ("principal_interest", ("loan_amount", "loan_term", "interest_rate"), ("monthly_payment",), _principal_interest),
+    ("escrow", ("property_tax", "home_insurance", "flood_insurance"),
+     ("monthly_property_tax", "monthly_home_insurance", "monthly_flood_insurance"), _escrow),
+    ("total_payment", ("monthly_payment", "monthly_property_tax", "monthly_home_insurance", "monthly_flood_insurance"),
+     ("total_monthly_payment",), _total_payment),
+    ("eligibility", ("formula", "num_units", "occupancy_type", "loan_amount", "total_sale_price", "seller_concession_pct", "loan_limits"),
+     ("exceeds_conforming_limit", "outside_high_balance_range", "exceeds_max_loan_limit", "ltv",
+      "max_seller_concession", "seller_concession_exceeded"), _eligibility),
+)
+
+
+# Incremental evaluation of a node graph across reruns. Values live in state[key] (st.session_state on the
+# pages, any dict elsewhere); evaluate() re-runs only the nodes with a changed input, and a node whose outputs
+# come out unchanged stops the change from propagating further. state[key]["trace"] lists the nodes that ran.
+class DependencyGraph:
+    def __init__(self, nodes=LOAN_NODES, state=None, key="loan_graph"):
+        produced = set()
+        for name, inputs, outputs, function in nodes:
+            late = [value for value in inputs if any(value in later[2] for later in nodes) and value not in produced]
+            if late:
+                raise ValueError(f"node {name} reads {', '.join(late)} before it is computed")
+            produced.update(outputs)
+        self.nodes = nodes
+        self.inputs = {value for node in nodes for value in node[1]} - produced
+        self.state = {} if state is None else state
+        self.key = key
+        if key not in self.state:
+            self.state[key] = {"values": {}, "ran": set(), "trace": []}
+
+    @property
+    def values(self):
+        return self.state[self.key]["values"]
+
+    @property
+    def trace(self):
+        return self.state[self.key]["trace"]
+
+    def evaluate(self, **inputs):
+        missing = self.inputs - set(inputs) - set(self.values)
+        if missing:
+            raise ValueError(f"missing graph input(s): {', '.join(sorted(missing))}")
+        store = self.state[self.key]
+        values = store["values"]
+
+        changed = {name for name, value in inputs.items() if name not in values or values[name] != value}
+        values.update(inputs)
+        trace = []
+        for name, node_inputs, outputs, function in self.nodes:
+            if name in store["ran"] and changed.isdisjoint(node_inputs):
+                continue
+            results = function(*(values[value] for value in node_inputs))
+            for output, result in zip(outputs, results):
+                if output not in values or values[output] != result:
+                    changed.add(output)
+                    values[output] = result
+            store["ran"].add(name)
+            trace.append(name)
+        store["trace"] = trace
+        return values
+
+    def reset(self):
+        self.state[self.key] = {"values": {}, "ran": set(), "trace": []}
@@ -0,0 +1,164 @@
+"""Opt-in timing instrumentation for the calculator pages.
+
+Set LOAN_ENGINE_PROFILE to turn it on:
+
+    LOAN_ENGINE_PROFILE=panel streamlit run "home_affordability_calculator (1).py"   # collapsible debug panel
+    LOAN_ENGINE_PROFILE=log   streamlit run updated_loan_calculator_app.py           # one JSON log line per rerun
+    LOAN_ENGINE_PROFILE=panel,log ...                                               # both
+
+Any other non-empty value except "0" means "panel". When the variable is unset every hook is a no-op and
+the engine functions are left unwrapped. Turning it on imports nothing the page would not: the NumPy-backed
+helpers are wrapped from the first rerun after the page has imported them.
+"""
+import functools
+import importlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+ENV_VAR = "LOAN_ENGINE_PROFILE"
+logger = logging.getLogger("loan_engine.profile")
+
+# (module, attribute) pairs wrapped by instrument_engine: the engine entry points the pages call through the
+# loan_engine package, the shared index methods, and the page-level helpers in the NumPy modules
+INSTRUMENTED = (
+    ("loan_engine", "amortization_schedule"), ("loan_engine", "calculate_formula_loan"), ("loan_engine", "calculate_loan"),
+    ("loan_engine", "cached_calculate_formula_loan"), ("loan_engine", "cached_calculate_loan"),
+    ("loan_engine", "eligible_formulas"), ("loan_engine", "evaluate_scenario"), ("loan_engine", "max_affordable_price"),
+    ("loan_engine", "next_formula"),
+    ("loan_engine.eligibility", "FormulaPriceIndex.eligible_formulas"),
+    ("loan_engine.eligibility", "FormulaPriceIndex.eligible_formulas_many"),
+    ("loan_engine.eligibility", "NextFormulaIndex.next_formula"),
+    ("loan_engine.graph", "DependencyGraph.evaluate"),
+    ("loan_engine.rulesets", "RuleSet.calculate"), ("loan_engine.rulesets", "RuleSet.eligible_formulas"),
+    ("loan_engine.rulesets", "RuleSet.next_formula"),
+    ("loan_engine.scenarios", "rank_formulas"),
+    ("loan_engine.sensitivity", "rate_price_grid"), ("loan_engine.sensitivity", "rate_formula_grid"),
+)
+# NumPy-backed modules in INSTRUMENTED: wrapped once a page has imported them, never imported here, so turning
+# profiling on does not load numpy and pandas into a page that has not opened a section needing them
+LAZY_MODULES = ("loan_engine.scenarios", "loan_engine.sensitivity")
+
+_current = threading.local()  # each Streamlit session reruns its script on its own thread
+_instrumented_modules = set()
+_instrument_lock = threading.Lock()
+
+
+def profile_modes(value=None):
+    value = os.environ.get(ENV_VAR, "") if value is None else value
+    modes = {mode.strip().lower() for mode in value.split(",") if mode.strip()} - {"0"}
+    return {"panel" if mode not in ("panel", "log") else mode for mode in modes}
+
+
+# Timings and call counts for one rerun: sections are page laps or blocks, calls are wrapped engine functions
+class Profiler:
+    def __init__(self, page, modes):
+        self.page = page
+        self.modes = modes
+        self.started = self.last = time.perf_counter()
+        self.sections = []
+        self.calls = {}
+
+    # Close the lap since the previous checkpoint (or the start of the rerun) under name
+    def checkpoint(self, name):
+        now = time.perf_counter()
+        self.sections.append((name, now - self.last))
+        self.last = now
+
+    @contextmanager
+    def section(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections.append((name, time.perf_counter() - started))
+            self.last = time.perf_counter()
+
+    def record_call(self, name, seconds):
+        calls, total, slowest = self.calls.get(name, (0, 0.0, 0.0))
+        self.calls[name] = (calls + 1, total + seconds, max(slowest, seconds))
+
+    def report(self):
+        return {
+            "page": self.page,
+            "total_ms": (time.perf_counter() - self.started) * 1000,
+            "sections": [{"section": name, "ms": seconds * 1000} for name, seconds in self.sections],
+            "calls": [{"function": name, "calls": calls, "total_ms": total * 1000, "max_ms": slowest * 1000}
+                      for name, (calls, total, slowest) in sorted(self.calls.items(), key=lambda item: -item[1][1])],
+        }
+
+    # End the rerun: log the report and/or render it in a collapsed expander
+    def finish(self):
+        _current.profiler = None
+        report = self.report()
+        if "log" in self.modes:
+            logger.info(json.dumps(report))
+        if "panel" in self.modes:
+            import streamlit as st
+
+            with st.expander(f"⏱️ Performance: {report['total_ms']:.1f} ms this rerun"):
+                milliseconds = st.column_config.NumberColumn(format="%.3f")
+                st.dataframe(report["sections"], hide_index=True, column_config={"ms": milliseconds})
+                st.dataframe(report["calls"], hide_index=True, column_config={"total_ms": milliseconds, "max_ms": milliseconds})
+        return report
+
+
+# Stand-in used when instrumentation is off; every hook does nothing
+class NullProfiler:
+    def checkpoint(self, name):
+        pass
+
+    def section(self, name):
+        return nullcontext()
+
+    def finish(self):
+        return None
+
+
+def _timed(name, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = getattr(_current, "profiler", None)
+        if profiler is None:
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.record_call(name, time.perf_counter() - started)
+
+    return wrapper
+
+
+# Wrap the engine entry points once per process so calls made through the package are counted and timed.
+# Called on every profiled rerun: a LAZY_MODULES module is wrapped on the first rerun after the page imports it.
+def instrument_engine():
+    with _instrument_lock:
+        for module_name, attribute in INSTRUMENTED:
+            if module_name in _instrumented_modules or (module_name in LAZY_MODULES and module_name not in sys.modules):
+                continue
+            owner = importlib.import_module(module_name)
+            *path, name = attribute.split(".")
+            for part in path:
+                owner = getattr(owner, part)
+            setattr(owner, name, _timed(attribute, getattr(owner, name)))
+        _instrumented_modules.update(module_name for module_name, _ in INSTRUMENTED
+                                     if module_name not in LAZY_MODULES or module_name in sys.modules)
+
+
+# Start profiling a page rerun. Call it before the page's imports so the first rerun includes import time.
+def page_profiler(page):
+    modes = profile_modes()
+    if not modes:
+        return NullProfiler()
+    if "log" in modes and not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+        logger.setLevel(logging.INFO)
+    # Start the clock first: instrument_engine imports the engine on the first rerun, which belongs to "imports"
+    _current.profiler = Profiler(os.path.splitext(os.path.basename(page))[0], modes)
+    instrument_engine()
+    return _current.profiler
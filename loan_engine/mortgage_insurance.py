@@ -0,0 +1,76 @@
+import csv
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from .rules import mortgage_insurance_coverage
+
+DATA_DIR = Path(__file__).parent / "data"
+DEFAULT_CSV = DATA_DIR / "mortgage_insurance_rates.csv"
+NO_MI_LTV = 80  # loans at or below this LTV carry no mortgage insurance
+MAX_CREDIT_SCORE = 850
+
+
+# LTV as the agencies band it: rounded up to the next whole percent (float noise such as 95.00000000000001 dropped first)
+def ltv_percent(ltv):
+    return np.ceil(np.round(np.asarray(ltv, dtype=np.float64), 6))
+
+
+# Mortgage insurance rate card in a dense (LTV band, credit score band, coverage) array of annual premium rates
+# (% of the loan amount). Band 0 on the LTV axis is "80% or less" (rate 0 for every score and coverage, a missing
+# or low score included); past it the last slot of every axis is a NaN pad, so an LTV above the card, a score below
+# the lowest band or a coverage the card does not offer all index NaN. Scores and coverages resolve to their slot through dense lookup arrays, so pricing a batch of loans is
+# one searchsorted over a handful of LTV edges and one gather.
+class MortgageInsuranceRates:
+    def __init__(self, ltv_edges, score_floors, coverages, rates, coverage=mortgage_insurance_coverage):
+        self.ltv_edges = np.asarray(ltv_edges, dtype=np.float64)  # NO_MI_LTV followed by the top of each band
+        self.score_floors = tuple(score_floors)
+        self.coverages = tuple(coverages)
+        self.rates = rates
+        self.score_slot = np.full(MAX_CREDIT_SCORE + 1, len(score_floors), dtype=np.intp)
+        for slot, floor in enumerate(score_floors):
+            self.score_slot[floor:] = slot
+        self.coverage_slot = np.full(101, len(coverages), dtype=np.intp)
+        self.coverage_slot[list(coverages)] = np.arange(len(coverages))
+        # Standard coverage per LTV band, used when a loan does not name one
+        self.standard_coverage = np.array([0] + [coverage.get(int(top), 0) for top in self.ltv_edges[1:]] + [0], dtype=np.intp)
+
+    @classmethod
+    def from_csv(cls, path=DEFAULT_CSV, coverage=mortgage_insurance_coverage):
+        with open(path, newline="") as file:
+            rows = list(csv.DictReader(line for line in file if not line.startswith("#")))
+        score_floors = sorted(int(column) for column in rows[0] if column.isdigit())
+        ltv_edges = [NO_MI_LTV] + sorted({float(row["ltv_max"]) for row in rows})
+        coverages = sorted({int(row["coverage"]) for row in rows})
+        rates = np.full((len(ltv_edges) + 1, len(score_floors) + 1, len(coverages) + 1), np.nan)
+        rates[0] = 0.0
+        for row in rows:
+            band = ltv_edges.index(float(row["ltv_max"]))
+            rates[band, :-1, coverages.index(int(row["coverage"]))] = [float(row[str(floor)]) for floor in score_floors]
+        return cls(ltv_edges, score_floors, coverages, rates, coverage)
+
+    def ltv_band(self, ltv):
+        return np.searchsorted(self.ltv_edges, ltv_percent(ltv), side="left")
+
+    # Annual premium rates (%) for arrays of LTV, credit score and coverage (None = standard coverage for the band)
+    def annual_rates(self, ltv, credit_score, coverage=None):
+        band = self.ltv_band(ltv)
+        score = self.score_slot[np.clip(np.nan_to_num(np.asarray(credit_score, dtype=np.float64)), 0, MAX_CREDIT_SCORE).astype(np.intp)]  # missing score: no rate
+        coverage = self.standard_coverage[band] if coverage is None else np.clip(np.asarray(coverage, dtype=np.intp), 0, 100)
+        return self.rates[band, score, self.coverage_slot[coverage]]
+
+    # Monthly premium in dollars: loan amount x annual rate / 12; NaN where the card has no rate
+    def monthly_premium(self, loan_amount, ltv, credit_score, coverage=None):
+        return np.asarray(loan_amount, dtype=np.float64) * self.annual_rates(ltv, credit_score, coverage) / 100 / 12
+
+    # Scalar form of monthly_premium; None where the card has no rate
+    def premium(self, loan_amount, ltv, credit_score, coverage=None):
+        premium = float(self.monthly_premium(loan_amount, ltv, credit_score, coverage))
+        return None if np.isnan(premium) else premium
+
+
+# Default rate card, loaded once per process
+@lru_cache(maxsize=None)
+def mortgage_insurance_rates(csv_path=DEFAULT_CSV):
+    return MortgageInsuranceRates.from_csv(csv_path)
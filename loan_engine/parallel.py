@@ -0,0 +1,66 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .eligibility import NextFormulaIndex
+from .rules import loan_formulas, loan_limits
+from .scenarios import evaluate_scenarios
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Rule tables and the next-formula index, set once per worker process by _init_worker. With a tables root the
+# worker instead attaches to the shared, memory-mapped tables and follows new published versions per chunk.
+_worker_tables = {}
+
+
+def _init_worker(loan_formulas, loan_limits, tables_root=None):
+    if tables_root is not None:
+        from .shared_tables import current_rule_tables
+
+        current_rule_tables(tables_root).scenario_tables()  # attach before the first chunk arrives
+        _worker_tables.update(tables_root=tables_root)
+    else:
+        _worker_tables.update(loan_formulas=loan_formulas, loan_limits=loan_limits, index=NextFormulaIndex(loan_formulas, loan_limits))
+
+
+def _evaluate_chunk(scenarios):
+    if "tables_root" in _worker_tables:
+        from .shared_tables import current_rule_tables
+
+        return evaluate_scenarios(scenarios, **current_rule_tables(_worker_tables["tables_root"]).scenario_tables())
+    return evaluate_scenarios(scenarios, **_worker_tables)
+
+
+# Evaluate scenario chunks on a process pool and yield the results in input order. At most
+# max_in_flight chunks are queued at once so a long stream of chunks never piles up in memory. tables_root
+# (see shared_tables) makes the workers share one published copy of the rule tables instead of their own.
+def evaluate_chunks_parallel(chunks, max_workers=None, loan_formulas=loan_formulas, loan_limits=loan_limits, max_in_flight=None,
+                             tables_root=None):
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * max_workers
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(loan_formulas, loan_limits, tables_root)) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_evaluate_chunk, chunk))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# Split in-memory scenario columns into chunk_size shards
+def shard_scenarios(scenarios, chunk_size=DEFAULT_CHUNK_SIZE):
+    rows = len(next(iter(scenarios.values())))
+    for start in range(0, rows, chunk_size):
+        yield {column: values[start:start + chunk_size] for column, values in scenarios.items()}
+
+
+# Parallel counterpart of evaluate_scenarios: same columns, same row order, same values
+def evaluate_scenarios_parallel(scenarios, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=None, loan_formulas=loan_formulas,
+                                loan_limits=loan_limits):
+    import numpy as np
+
+    parts = list(evaluate_chunks_parallel(shard_scenarios(scenarios, chunk_size), max_workers, loan_formulas, loan_limits))
+    if not parts:
+        return evaluate_scenarios(scenarios, loan_formulas, loan_limits)
+    return {column: np.concatenate([part[column] for part in parts]) for column in parts[0]}
@@ -0,0 +1,161 @@
+import argparse
+import sys
+from itertools import product
+
+import numpy as np
+
+from .batch import pmt_batch
+
+# Input columns of a portfolio file: current balance, note rate (%) and remaining term in months
+PORTFOLIO_COLUMNS = ("balance", "rate", "remaining_term")
+OPTIONAL_PORTFOLIO_COLUMNS = ("loan_id",)
+# Fields of a refinance scenario: new note rate (%), new term in years, points (% of the balance) and fixed fees ($)
+SCENARIO_FIELDS = ("new_rate", "new_term", "points", "fees")
+ANALYSIS_COLUMNS = ("monthly_savings", "closing_costs", "break_even_month", "npv")
+SUMMARY_COLUMNS = ("current_payment", "best_scenario", *SCENARIO_FIELDS, "monthly_savings", "break_even_month", "npv",
+                   "scenarios_in_the_money", "should_refinance")
+# Arrow type of each input and output column that is not float64 (see cli.ResultWriter)
+COLUMN_TYPES = {"loan_id": "string", "scenario": "int64", "best_scenario": "int64", "scenarios_in_the_money": "int64", "should_refinance": "bool"}
+DEFAULT_DISCOUNT_RATE = 5.0  # annual %, for the NPV of the payment savings
+# Default memory ceiling for one block of (loans x scenarios) work arrays
+REFINANCE_MAX_BYTES = 256 * 1024 * 1024
+WORK_ARRAYS = 16  # (loans x scenarios) float64 arrays alive at once in analyze_refinance
+
+
+# PMT formula of calculate_loan for a principal over a number of months, straight-line repayment at 0%
+def monthly_payment(principal, interest_rate, months):
+    monthly_interest_rate = (np.asarray(interest_rate, dtype=np.float64) / 100) / 12
+    return pmt_batch(principal, monthly_interest_rate, np.asarray(months, dtype=np.float64))
+
+
+# Closed-form balance after k payments (zero once the loan is paid off), as in batch._amortization_block
+def balance_after(principal, interest_rate, months, payment, k):
+    monthly_interest_rate = (np.asarray(interest_rate, dtype=np.float64) / 100) / 12
+    has_interest = monthly_interest_rate > 0
+    safe_rate = np.where(has_interest, monthly_interest_rate, 1.0)
+    k = np.minimum(k, months)
+    growth = (1 + safe_rate) ** k
+    balance = np.where(has_interest, principal * growth - payment * (growth - 1) / safe_rate, principal - payment * k)
+    return np.where(k < months, balance, 0.0)
+
+
+# Present value of 1 a month for n months at the monthly discount rate
+def annuity_factor(monthly_discount_rate, months):
+    if monthly_discount_rate == 0:
+        return np.asarray(months, dtype=np.float64)
+    return (1 - (1 + monthly_discount_rate) ** -np.asarray(months, dtype=np.float64)) / monthly_discount_rate
+
+
+# Every combination of the candidate rates, terms, points and fees as SCENARIO_FIELDS arrays
+def refinance_grid(new_rates, new_terms=(30,), points=(0.0,), fees=(0.0,)):
+    combos = np.array(list(product(new_rates, new_terms, points, fees)), dtype=np.float64).reshape(-1, len(SCENARIO_FIELDS))
+    return dict(zip(SCENARIO_FIELDS, combos.T))
+
+
+# (loans x scenarios) ANALYSIS_COLUMNS for refinancing each balance into each scenario, with closing costs paid in cash.
+# Savings are current minus new payment; break_even_month is the first month whose cumulative savings cover the costs
+# (NaN when the payment does not drop). npv discounts the monthly cash-flow difference over the horizon (months; default
+# until both loans are paid off) and, for a horizon before payoff, the difference in the balance owed when it ends.
+def analyze_refinance(balance, interest_rate, remaining_term, scenarios, discount_rate=DEFAULT_DISCOUNT_RATE, horizon=None):
+    balance = np.asarray(balance, dtype=np.float64)[:, None]
+    interest_rate = np.asarray(interest_rate, dtype=np.float64)[:, None]
+    remaining_term = np.asarray(remaining_term, dtype=np.float64)[:, None]
+    new_rate = np.asarray(scenarios["new_rate"], dtype=np.float64)[None, :]
+    new_months = np.asarray(scenarios["new_term"], dtype=np.float64)[None, :] * 12
+
+    current_payment = monthly_payment(balance, interest_rate, remaining_term)
+    new_payment = monthly_payment(balance, new_rate, new_months)
+    monthly_savings = current_payment - new_payment
+    closing_costs = balance * np.asarray(scenarios["points"], dtype=np.float64)[None, :] / 100 + np.asarray(scenarios["fees"], dtype=np.float64)[None, :]
+    saves = monthly_savings > 0
+    break_even_month = np.where(saves, np.ceil(closing_costs / np.where(saves, monthly_savings, 1.0)), np.nan)
+
+    monthly_discount_rate = (discount_rate / 100) / 12
+    end = np.maximum(remaining_term, new_months) if horizon is None else np.float64(horizon)
+    npv = (current_payment * annuity_factor(monthly_discount_rate, np.minimum(remaining_term, end))
+           - new_payment * annuity_factor(monthly_discount_rate, np.minimum(new_months, end)) - closing_costs)
+    if horizon is not None:
+        owed = (balance_after(balance, interest_rate, remaining_term, current_payment, end)
+                - balance_after(balance, new_rate, new_months, new_payment, end))
+        npv = npv + owed * (1 + monthly_discount_rate) ** -end
+
+    return {
+        "current_payment": current_payment[:, 0],
+        "new_payment": new_payment,
+        "monthly_savings": monthly_savings,
+        "closing_costs": closing_costs,
+        "break_even_month": break_even_month,
+        "npv": npv,
+    }
+
+
+# One row per loan: the scenario with the highest NPV and how many scenarios have a positive NPV
+def best_refinance(analysis, scenarios):
+    npv = analysis["npv"]
+    best = npv.argmax(axis=1)
+    rows = np.arange(len(best))
+    summary = {"current_payment": analysis["current_payment"], "best_scenario": best}
+    summary.update({field: np.asarray(scenarios[field])[best] for field in SCENARIO_FIELDS})
+    summary.update({column: analysis[column][rows, best] for column in ("monthly_savings", "break_even_month", "npv")})
+    summary["scenarios_in_the_money"] = (npv > 0).sum(axis=1)
+    summary["should_refinance"] = summary["npv"] > 0
+    return summary
+
+
+# Loans per block so the (loans x scenarios) work arrays stay under max_bytes
+def chunk_loans(num_scenarios, max_bytes=REFINANCE_MAX_BYTES):
+    return max(1, max_bytes // (num_scenarios * WORK_ARRAYS * 8))
+
+
+# Analyze a CSV or Parquet portfolio file block by block. Writes one SUMMARY_COLUMNS row per loan, or with
+# all_scenarios one row per loan x scenario; memory stays bounded by chunk_loans whatever the book size.
+def run_portfolio_file(input_path, output_path, scenarios, discount_rate=DEFAULT_DISCOUNT_RATE, horizon=None, all_scenarios=False,
+                       max_bytes=REFINANCE_MAX_BYTES):
+    import pandas as pd
+
+    from .cli import ResultWriter, read_chunks
+
+    num_scenarios = len(scenarios["new_rate"])
+    writer = ResultWriter(output_path, COLUMN_TYPES)
+    try:
+        chunks = read_chunks(input_path, PORTFOLIO_COLUMNS, OPTIONAL_PORTFOLIO_COLUMNS, chunk_loans(num_scenarios, max_bytes), {"loan_id": str})
+        for chunk in chunks:
+            chunk = chunk.reset_index(drop=True)
+            analysis = analyze_refinance(chunk["balance"].to_numpy(), chunk["rate"].to_numpy(), chunk["remaining_term"].to_numpy(),
+                                         scenarios, discount_rate, horizon)
+            if all_scenarios:
+                frame = chunk.loc[chunk.index.repeat(num_scenarios)].reset_index(drop=True)
+                frame["scenario"] = np.tile(np.arange(num_scenarios), len(chunk))
+                for field in SCENARIO_FIELDS:
+                    frame[field] = np.tile(scenarios[field], len(chunk))
+                for column in ANALYSIS_COLUMNS:
+                    frame[column] = analysis[column].ravel()
+            else:
+                frame = pd.concat([chunk, pd.DataFrame(best_refinance(analysis, scenarios))], axis=1)
+            writer.write(frame)
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m loan_engine.refinance", description="Refinance break-even and NPV scan over a loan book.")
+    parser.add_argument("input", help=f"portfolio file with columns: {', '.join(PORTFOLIO_COLUMNS)} (remaining_term in months)")
+    parser.add_argument("output", help="result file (.csv or .parquet)")
+    parser.add_argument("--rates", type=float, nargs="+", required=True, help="candidate note rates (%%)")
+    parser.add_argument("--terms", type=float, nargs="+", default=[30], help="candidate terms in years (default: 30)")
+    parser.add_argument("--points", type=float, nargs="+", default=[0.0], help="points, %% of the balance (default: 0)")
+    parser.add_argument("--fees", type=float, nargs="+", default=[0.0], help="fixed closing costs in dollars (default: 0)")
+    parser.add_argument("--discount-rate", type=float, default=DEFAULT_DISCOUNT_RATE, help="annual discount rate %% (default: %(default)s)")
+    parser.add_argument("--horizon", type=float, default=None, help="months until the loan is expected to be sold or refinanced again")
+    parser.add_argument("--all-scenarios", action="store_true", help="write every loan x scenario instead of each loan's best")
+    args = parser.parse_args(argv)
+
+    scenarios = refinance_grid(args.rates, args.terms, args.points, args.fees)
+    rows = run_portfolio_file(args.input, args.output, scenarios, args.discount_rate, args.horizon, args.all_scenarios)
+    print(f"Wrote {rows:,} rows ({len(scenarios['new_rate'])} scenarios) -> {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
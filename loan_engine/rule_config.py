@@ -0,0 +1,197 @@
+"""Rule configuration: the loan formulas, loan limits and ratio limits the engine runs on, in one JSON file.
+
+    python -c "import loan_engine; loan_engine.load_rules('new_rules.json')"   # validate a file before deploying it
+
+The active file is loan_engine/data/rules.json, or the path in LOAN_ENGINE_RULES. loan_engine.rules compiles it
+once at import. While a server runs, rulesets.watch_rules() polls the file and swaps validated updates into
+ruleset(); a file that fails validation is logged and the tables already in use stay in place. Nothing on the
+calculation path reads the file.
+
+Formula tables map a label ("C.10.6 – ..." or a bare code) to down_payment, seller_concession and max_ltv in
+percent. loan_limits and ltv_limits key on the number of units; JSON object keys are strings, so "1".."4" are
+turned back into ints here. loan_limits must cover all four unit counts, since the pages and ltv_limits accept
+any of them. conforming_loan_limit, the single limit of the affordability pages, defaults to the
+1-unit conforming limit so the annual update is one number.
+"""
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+ENV_VAR = "LOAN_ENGINE_RULES"
+DEFAULT_RULES_PATH = Path(__file__).parent / "data" / "rules.json"
+DEFAULT_POLL_INTERVAL = 2.0  # seconds between checks of the file's mtime and size
+FORMULA_TABLES = ("loan_formulas", "affordability_loan_formulas", "legacy_loan_formulas")
+FORMULA_FIELDS = ("down_payment", "seller_concession", "max_ltv")
+RULE_TABLES = (*FORMULA_TABLES, "loan_limits", "conforming_loan_limit", "legacy_max_loan_limit",
+               "ltv_limits", "dti_limits", "mortgage_insurance_coverage")
+OPTIONAL_RULE_TABLES = ("conforming_loan_limit",)
+# Tables older configurations may still carry; nothing reads them, so they are skipped with a warning
+RETIRED_RULE_TABLES = ("high_balance_loan_limit",)
+PROGRAMS = ("C", "HB")
+
+logger = logging.getLogger("loan_engine.rules")
+
+
+class RuleConfigError(ValueError):
+    pass
+
+
+def rules_path(path=None):
+    return Path(path or os.environ.get(ENV_VAR) or DEFAULT_RULES_PATH)
+
+
+def _object(value, where):
+    if not isinstance(value, dict) or not value:
+        raise RuleConfigError(f"{where}: expected a non-empty object")
+    return value
+
+
+def _number(value, where, low=0, high=None, low_inclusive=True):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise RuleConfigError(f"{where}: expected a number, got {value!r}")
+    if value < low or (value == low and not low_inclusive) or (high is not None and value > high):
+        bounds = f"{'[' if low_inclusive else '('}{low}, {high if high is not None else 'inf'}]"
+        raise RuleConfigError(f"{where}: {value!r} is outside {bounds}")
+    return value
+
+
+def _units(key, where):
+    try:
+        num_units = int(key)
+    except ValueError:
+        raise RuleConfigError(f"{where}: unit count {key!r} is not an integer") from None
+    if not 1 <= num_units <= 4:
+        raise RuleConfigError(f"{where}: unit count {key!r} is outside 1-4")
+    return num_units
+
+
+def _formula_table(table, where):
+    formulas = {}
+    for label, values in _object(table, where).items():
+        if label.split(" ")[0].split(".")[0] not in PROGRAMS:
+            raise RuleConfigError(f"{where}.{label}: label must start with a program code ({', '.join(p + '.' for p in PROGRAMS)})")
+        values = _object(values, f"{where}.{label}")
+        if set(values) != set(FORMULA_FIELDS):
+            raise RuleConfigError(f"{where}.{label}: expected exactly the fields {', '.join(FORMULA_FIELDS)}")
+        formulas[label] = {
+            "down_payment": _number(values["down_payment"], f"{where}.{label}.down_payment", 0, 100),
+            "seller_concession": _number(values["seller_concession"], f"{where}.{label}.seller_concession", 0, 100),
+            "max_ltv": _number(values["max_ltv"], f"{where}.{label}.max_ltv", 0, 100, low_inclusive=False),
+        }
+        if formulas[label]["down_payment"] == 100 or formulas[label]["seller_concession"] == 100:
+            raise RuleConfigError(f"{where}.{label}: down_payment and seller_concession must be below 100")
+    return formulas
+
+
+# Validate a parsed configuration and turn it into the engine's tables (unit and LTV keys back to ints)
+def compile_rules(config):
+    config = _object(config, "rules")
+    for name in sorted(set(config) & set(RETIRED_RULE_TABLES)):
+        logger.warning("rules: ignoring retired table %s", name)
+    unknown = set(config) - set(RULE_TABLES) - set(RETIRED_RULE_TABLES)
+    missing = set(RULE_TABLES) - set(OPTIONAL_RULE_TABLES) - set(config)
+    if unknown:
+        raise RuleConfigError(f"rules: unknown table(s) {', '.join(sorted(unknown))}")
+    if missing:
+        raise RuleConfigError(f"rules: missing table(s) {', '.join(sorted(missing))}")
+
+    rules = {name: _formula_table(config[name], name) for name in FORMULA_TABLES}
+
+    rules["loan_limits"] = {}
+    for key, limits in _object(config["loan_limits"], "loan_limits").items():
+        where = f"loan_limits.{key}"
+        limits = _object(limits, where)
+        if set(limits) != {"conforming", "high_balance"}:
+            raise RuleConfigError(f"{where}: expected exactly the fields conforming, high_balance")
+        conforming = _number(limits["conforming"], f"{where}.conforming", 0, low_inclusive=False)
+        high_balance = _number(limits["high_balance"], f"{where}.high_balance", conforming)
+        rules["loan_limits"][_units(key, where)] = {"conforming": conforming, "high_balance": high_balance}
+    missing_units = [num_units for num_units in range(1, 5) if num_units not in rules["loan_limits"]]
+    if missing_units:
+        raise RuleConfigError(f"loan_limits: limits for {', '.join(map(str, missing_units))} unit(s) are required")
+
+    rules["conforming_loan_limit"] = _number(config.get("conforming_loan_limit", rules["loan_limits"][1]["conforming"]),
+                                             "conforming_loan_limit", 0, low_inclusive=False)
+    rules["legacy_max_loan_limit"] = _number(config["legacy_max_loan_limit"], "legacy_max_loan_limit", 0, low_inclusive=False)
+
+    rules["ltv_limits"] = {}
+    for occupancy_type, limits in _object(config["ltv_limits"], "ltv_limits").items():
+        where = f"ltv_limits.{occupancy_type}"
+        rules["ltv_limits"][occupancy_type] = {_units(key, where): _number(max_ltv, f"{where}.{key}", 0, 100, low_inclusive=False)
+                                               for key, max_ltv in _object(limits, where).items()}
+
+    dti = _object(config["dti_limits"], "dti_limits")
+    if set(dti) != {"front_end", "back_end"}:
+        raise RuleConfigError("dti_limits: expected exactly the fields front_end, back_end")
+    rules["dti_limits"] = {"front_end": _number(dti["front_end"], "dti_limits.front_end", 0, 100, low_inclusive=False),
+                           "back_end": _number(dti["back_end"], "dti_limits.back_end", 0, 100, low_inclusive=False)}
+    if rules["dti_limits"]["front_end"] > rules["dti_limits"]["back_end"]:
+        raise RuleConfigError("dti_limits: front_end must not exceed back_end")
+
+    rules["mortgage_insurance_coverage"] = {}
+    for key, coverage in _object(config["mortgage_insurance_coverage"], "mortgage_insurance_coverage").items():
+        where = f"mortgage_insurance_coverage.{key}"
+        if not key.isdigit() or not 80 < int(key) <= 100:
+            raise RuleConfigError(f"{where}: LTV band top must be an integer in (80, 100]")
+        rules["mortgage_insurance_coverage"][int(key)] = _number(coverage, where, 0, 100)
+    return rules
+
+
+# Read, parse and validate a rule configuration file
+def load_rules(path=None):
+    path = rules_path(path)
+    try:
+        config = json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError as error:
+        raise RuleConfigError(f"{path}: not valid JSON ({error})") from None
+    try:
+        return compile_rules(config)
+    except RuleConfigError as error:
+        raise RuleConfigError(f"{path}: {error}") from None
+
+
+# (mtime, size) of the file, None while it does not exist
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Background thread that polls a rule configuration file and hands each valid new version to on_change. The file
+# is only read when its mtime or size moves; an invalid or half-written file is logged and retried on the next change.
+class RuleWatcher(threading.Thread):
+    def __init__(self, path, on_change, interval=DEFAULT_POLL_INTERVAL):
+        super().__init__(name=f"rule-watcher:{Path(path).name}", daemon=True)
+        self.path = Path(path)
+        self.on_change = on_change
+        self.interval = interval
+        self.stamp = _stamp(self.path)
+        self.reloads = 0
+        self._stopped = threading.Event()
+
+    def check(self):
+        stamp = _stamp(self.path)
+        if stamp is None or stamp == self.stamp:
+            return False
+        self.stamp = stamp
+        try:
+            rules = load_rules(self.path)
+        except (OSError, RuleConfigError) as error:
+            logger.warning("keeping the current rule tables: %s", error)
+            return False
+        self.on_change(rules)
+        self.reloads += 1
+        logger.info("loaded rule tables from %s", self.path)
+        return True
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        self._stopped.set()
+
@@ -0,0 +1,34 @@
+# Rule tables shared by every calculator page, compiled once at import from the rule configuration file
+# (loan_engine/data/rules.json or $LOAN_ENGINE_RULES; see rule_config). Standard library only, so importing
+# them never pulls in Streamlit, pandas or NumPy. These are the tables the process started with; pages get
+# updated tables through rulesets.ruleset() once rulesets.watch_rules() has picked up a change.
+from .rule_config import load_rules
+
+# Every table below, as compiled from the file
+startup_rules = load_rules()
+
+# Loan formula setup and max limits (updated_loan_calculator_app.py)
+loan_formulas = startup_rules["loan_formulas"]
+
+# **Loan Limits for Conforming & High-Balance Loans**
+loan_limits = startup_rules["loan_limits"]
+
+# Loan limits used by the home affordability pages
+conforming_loan_limit = startup_rules["conforming_loan_limit"]
+
+# Define available C & HB Formulas with Down Payment, Seller Concessions, and LTV Restrictions
+affordability_loan_formulas = startup_rules["affordability_loan_formulas"]
+
+# Seven-formula table and single max loan limit of the removed updated_loan_calculator_app copies (calculator-legacy)
+legacy_loan_formulas = startup_rules["legacy_loan_formulas"]
+legacy_max_loan_limit = startup_rules["legacy_max_loan_limit"]
+
+# Define LTV Restrictions by Occupancy Type and Units
+ltv_limits = startup_rules["ltv_limits"]
+
+# Maximum debt-to-income ratios (%): housing payment / income (front end) and housing payment plus other
+# monthly debts / income (back end)
+dti_limits = startup_rules["dti_limits"]
+
+# Standard mortgage insurance coverage (%) by the top of each LTV band; loans at or below 80% LTV carry none
+mortgage_insurance_coverage = startup_rules["mortgage_insurance_coverage"]
@@ -0,0 +1,156 @@
+import threading
+from functools import cached_property
+
+from .cache import cached_calculate_formula_loan, cached_calculate_loan
+from .core import calculate_formula_loan, formula_lookup
+from .eligibility import FormulaPriceIndex, NextFormulaIndex, eligibility_index, next_formula_index
+from .formulas import formula_records, register_formulas
+from .rule_config import DEFAULT_POLL_INTERVAL, FORMULA_TABLES, RuleWatcher, load_rules, rules_path
+from .rules import affordability_loan_formulas, conforming_loan_limit, loan_formulas, loan_limits, ltv_limits, startup_rules
+
+# Values returned by RuleSet.calculate; the calculator variants returned the first five
+RESULT_FIELDS = ("total_sale_price", "loan_amount", "cash_to_close", "monthly_payment", "total_monthly_payment",
+                 "monthly_property_tax", "monthly_home_insurance", "monthly_flood_insurance")
+
+# Every calculator variant that has shipped, as rule tables over the one engine, built from a compiled rule
+# configuration (see rule_config). pages lists the files whose calculate_loan the version reproduces
+# (tests/golden holds their outputs; the calculator-legacy copies were removed once their golden outputs were
+# recorded and are read from git history); round_cents marks the pages that round each step to cents.
+def rule_set_specs(rules):
+    legacy_limit = rules["legacy_max_loan_limit"]
+    return {
+        "calculator": {
+            "description": f"{len(rules['loan_formulas'])} formulas, conforming and high-balance limits by units",
+            "pages": ("updated_loan_calculator_app.py",),
+            "loan_formulas": rules["loan_formulas"],
+            "loan_limits": rules["loan_limits"],
+            "conforming_loan_limit": rules["conforming_loan_limit"],
+            "round_cents": False,
+            "ltv_limits": rules["ltv_limits"],
+        },
+        "calculator-legacy": {
+            "description": f"{len(rules['legacy_loan_formulas'])} conforming formulas, one ${legacy_limit:,.0f} max loan limit",
+            "pages": ("updated_loan_calculator_app (1).py", "updated_loan_calculator_app (2).py",
+                      "updated_loan_calculator_app.py.py", "updated_loan_calculator_app.py2.py"),
+            "loan_formulas": rules["legacy_loan_formulas"],
+            "loan_limits": {num_units: {"conforming": legacy_limit, "high_balance": legacy_limit} for num_units in rules["loan_limits"]},
+            "conforming_loan_limit": legacy_limit,
+            "round_cents": False,
+            "ltv_limits": rules["ltv_limits"],
+        },
+        "affordability": {
+            "description": f"{len(rules['affordability_loan_formulas'])} C & HB formulas, unrounded results",
+            "pages": ("home_affordability_calculator (1).py", "home_affordability_calculator (2).py",
+                      "home_affordability_calculator (3).py", "home_affordability_calculator (9).py"),
+            "loan_formulas": rules["affordability_loan_formulas"],
+            "loan_limits": rules["loan_limits"],
+            "conforming_loan_limit": rules["conforming_loan_limit"],
+            "round_cents": False,
+            "ltv_limits": rules["ltv_limits"],
+        },
+        "affordability-rounded": {
+            "description": f"{len(rules['affordability_loan_formulas'])} C & HB formulas, every step rounded to cents",
+            "pages": ("home_affordability_calculator (4).py", "home_affordability_calculator (5).py",
+                      "home_affordability_calculator (6).py", "home_affordability_calculator (7).py",
+                      "home_affordability_calculator (8).py"),
+            "loan_formulas": rules["affordability_loan_formulas"],
+            "loan_limits": rules["loan_limits"],
+            "conforming_loan_limit": rules["conforming_loan_limit"],
+            "round_cents": True,
+            "ltv_limits": rules["ltv_limits"],
+        },
+    }
+
+
+rule_set_versions = rule_set_specs(startup_rules)
+DEFAULT_VERSION = "calculator"
+
+
+# One rule-set version: its formula table and limits compiled once, with the calculation and eligibility
+# entry points every page uses. Indexes are built on first use and shared with the default ones when the
+# tables match.
+class RuleSet:
+    def __init__(self, version, description, pages, loan_formulas, loan_limits, conforming_loan_limit, round_cents,
+                 ltv_limits=ltv_limits):
+        self.version = version
+        self.description = description
+        self.pages = pages
+        self.loan_formulas = loan_formulas
+        self.loan_limits = loan_limits
+        self.conforming_loan_limit = conforming_loan_limit
+        self.round_cents = round_cents
+        self.ltv_limits = ltv_limits
+        self.formulas = formula_records(loan_formulas)
+        self.lookup = formula_lookup(loan_formulas)
+
+    def __repr__(self):
+        return f"RuleSet({self.version!r}, {len(self.formulas)} formulas)"
+
+    @cached_property
+    def eligibility_index(self):
+        if self.loan_formulas is affordability_loan_formulas and self.conforming_loan_limit == conforming_loan_limit and self.ltv_limits is ltv_limits:
+            return eligibility_index()
+        return FormulaPriceIndex(self.loan_formulas, self.conforming_loan_limit, self.ltv_limits)
+
+    @cached_property
+    def next_formula_index(self):
+        if self.loan_formulas is loan_formulas and self.loan_limits is loan_limits:
+            return next_formula_index()
+        return NextFormulaIndex(self.loan_formulas, self.loan_limits)
+
+    # The eight RESULT_FIELDS for one formula (full label or code), through the shared result cache.
+    # The affordability table takes rates to the nearest thousandth, as its pages do; the others use them as given.
+    def calculate(self, purchase_price, interest_rate, loan_term, formula, property_tax=0.0, home_insurance=0.0, flood_insurance=0.0):
+        formula = self.lookup[formula]
+        if self.loan_formulas is affordability_loan_formulas:
+            return cached_calculate_formula_loan(purchase_price, interest_rate, loan_term, formula, property_tax, home_insurance,
+                                                 flood_insurance, round_cents=self.round_cents)
+        if self.round_cents:
+            return calculate_formula_loan(purchase_price, interest_rate, loan_term, formula, property_tax, home_insurance,
+                                          flood_insurance, loan_formulas=self.loan_formulas, round_cents=True)
+        record = self.formulas[formula]
+        return cached_calculate_loan(purchase_price, loan_term, interest_rate, record.down_payment_pct, record.seller_concession_pct,
+                                     property_tax, home_insurance, flood_insurance) + (property_tax / 12, home_insurance / 12, flood_insurance / 12)
+
+    def eligible_formulas(self, purchase_price, occupancy_type, num_units):
+        return self.eligibility_index.eligible_formulas(purchase_price, occupancy_type, num_units)
+
+    def next_formula(self, purchase_price, selected_formula, num_units, rule):
+        return self.next_formula_index.next_formula(purchase_price, selected_formula, num_units, rule)
+
+
+# RuleSet per version for the tables in use. use_rules replaces the whole dict in one assignment, so a caller
+# sees either the old rule sets or the new ones, and a page rerun keeps the RuleSet it already fetched.
+_rule_sets = {version: RuleSet(version, **spec) for version, spec in rule_set_versions.items()}
+_watchers = {}
+_watch_lock = threading.Lock()
+
+
+# The rule set for a version, shared by every page and session in the process
+def ruleset(version=DEFAULT_VERSION):
+    rule_sets = _rule_sets
+    if version not in rule_sets:
+        raise ValueError(f"unknown rule-set version {version!r}; choose one of {', '.join(rule_sets)}")
+    return rule_sets[version]
+
+
+# Swap in rule sets built from newly compiled tables (rule_config.compile_rules / load_rules)
+def use_rules(rules):
+    global _rule_sets
+    for name in FORMULA_TABLES:
+        register_formulas(rules[name], name)
+    _rule_sets = {version: RuleSet(version, **spec) for version, spec in rule_set_specs(rules).items()}
+
+
+# Start, once per file and process, the background thread that swaps valid edits of the rule configuration into
+# ruleset(). A file other than the one loan_engine.rules was compiled from is loaded right away.
+def watch_rules(path=None, interval=DEFAULT_POLL_INTERVAL):
+    path = rules_path(path).resolve()
+    with _watch_lock:
+        watcher = _watchers.get(path)
+        if watcher is None:
+            if path != rules_path().resolve():
+                use_rules(load_rules(path))
+            watcher = _watchers[path] = RuleWatcher(path, use_rules, interval)
+            watcher.start()
+    return watcher
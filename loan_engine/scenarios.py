@@ -0,0 +1,183 @@
+import numpy as np
+
+from .batch import calculate_loan_batch, formula_rows, formula_table, unit_limits
+from .core import formula_lookup, next_formula
+from .eligibility import tables_next_formula_index
+from .rules import loan_formulas, loan_limits, ltv_limits
+
+# Input columns of a scenario file, in the order of the Streamlit inputs
+SCENARIO_COLUMNS = ("occupancy", "units", "price", "term", "rate", "tax", "insurance", "flood", "formula")
+# Optional input columns: fips applies the county loan limits in county_limits instead of the national table;
+# credit_score prices mortgage insurance from the rate card in mortgage_insurance
+OPTIONAL_SCENARIO_COLUMNS = ("fips", "credit_score")
+RESULT_COLUMNS = (
+    "total_sale_price", "loan_amount", "cash_to_close", "monthly_payment", "total_monthly_payment",
+    "ltv", "exceeds_conforming_limit", "outside_high_balance_range", "exceeds_max_loan_limit",
+    "adjusted_down_payment_pct", "next_formula", "occupancy_ltv_not_allowed", "seller_concession_exceeded", "eligible",
+)
+RANKING_COLUMNS = (
+    "formula", "total_sale_price", "loan_amount", "cash_to_close", "monthly_payment", "total_monthly_payment", "ltv",
+    "exceeds_conforming_limit", "outside_high_balance_range", "exceeds_max_loan_limit", "ltv_not_allowed",
+    "occupancy_ltv_not_allowed", "seller_concession_exceeded", "eligible",
+)
+RANKING_KEYS = ("cash_to_close", "total_monthly_payment", "monthly_payment")
+# Added to RESULT_COLUMNS / RANKING_COLUMNS when the scenario has a credit score
+MORTGAGE_INSURANCE_COLUMNS = ("monthly_mortgage_insurance", "mortgage_insurance_unpriced")
+# Occupancies of the seller-concession rule, in the row order of its table form
+CONCESSION_OCCUPANCIES = ("Primary Residence", "Second Home", "Investment Property")
+# Arrow type of each input and result column that is not float64, so a result file has one schema whatever
+# types pandas infers for a chunk (an all-null next_formula, a tax column of whole numbers)
+COLUMN_TYPES = {
+    "occupancy": "string", "units": "int64", "formula": "string", "fips": "string", "next_formula": "string",
+    **{column: "bool" for column in ("exceeds_conforming_limit", "outside_high_balance_range", "exceeds_max_loan_limit",
+                                     "occupancy_ltv_not_allowed", "seller_concession_exceeded", "eligible",
+                                     "mortgage_insurance_unpriced")},
+}
+
+
+# Vectorized form of the occupancy seller-concession rule in core.max_seller_concession (NaN = LTV not allowed).
+# table is the same rule as a (CONCESSION_OCCUPANCIES, [LTV <= 90, LTV > 90]) array, as published by shared_tables.
+def max_seller_concession_batch(occupancy, ltv, table=None):
+    occupancy = np.asarray(occupancy, dtype=str)
+    high_ltv = np.asarray(ltv) > 90
+    if table is not None:
+        row = np.select([occupancy == occupancy_type for occupancy_type in CONCESSION_OCCUPANCIES], range(len(CONCESSION_OCCUPANCIES)), default=-1)
+        return np.where(row >= 0, np.asarray(table)[np.maximum(row, 0), high_ltv.astype(np.intp)], np.nan)
+    return np.select(
+        [occupancy == "Primary Residence", occupancy == "Second Home", occupancy == "Investment Property"],
+        [np.where(high_ltv, 0.03, 0.06), np.where(high_ltv, np.nan, 0.06), 0.02],
+        default=np.nan,
+    )
+
+
+# Monthly mortgage insurance for each loan, folded into total_monthly_payment. Where the rate card has no rate
+# (above 80% LTV with no score or one below its lowest band) the premium is NaN, mortgage_insurance_unpriced is
+# set and the total stays the payment before mortgage insurance.
+def add_mortgage_insurance(result, ltv, credit_score, mi_rates=None):
+    from .mortgage_insurance import mortgage_insurance_rates
+
+    mi_rates = mi_rates or mortgage_insurance_rates()
+    premium = mi_rates.monthly_premium(result["loan_amount"], ltv, credit_score)
+    unpriced = np.isnan(premium)
+    result["monthly_mortgage_insurance"] = premium
+    result["mortgage_insurance_unpriced"] = unpriced
+    result["total_monthly_payment"] = result["total_monthly_payment"] + np.where(unpriced, 0.0, premium)
+
+
+# Run a block of scenarios through calculate_loan and the checks of updated_loan_calculator_app.py.
+# scenarios maps SCENARIO_COLUMNS (and optionally OPTIONAL_SCENARIO_COLUMNS) to equal-length arrays; returns
+# RESULT_COLUMNS as arrays, plus MORTGAGE_INSURANCE_COLUMNS when credit scores are given.
+def evaluate_scenarios(scenarios, loan_formulas=loan_formulas, loan_limits=loan_limits, index=None, county_limits=None, mi_rates=None,
+                       seller_concession=None):
+    index = index or tables_next_formula_index(loan_formulas, loan_limits)
+    lookup = formula_lookup(loan_formulas)
+    formula = np.array([lookup[str(key)] for key in scenarios["formula"]])
+    rows, formulas = formula_rows(formula, loan_formulas)
+    formulas = formulas[rows]
+    units = np.asarray(scenarios["units"], dtype=np.intp)
+    price = np.asarray(scenarios["price"], dtype=np.float64)
+
+    down_payment_pct, seller_concession_pct = formulas["down_payment_pct"], formulas["seller_concession_pct"]
+    result = calculate_loan_batch(price, scenarios["term"], scenarios["rate"], down_payment_pct, seller_concession_pct,
+                                  scenarios["tax"], scenarios["insurance"], scenarios["flood"])
+    loan_amount = result["loan_amount"]
+    total_sale_price = result["total_sale_price"]
+    if "fips" in scenarios:
+        from .county_limits import county_loan_limits
+
+        county_limits = county_limits or county_loan_limits()
+        conforming, high_balance = county_limits.unit_limits_many(scenarios["fips"], units)
+    else:
+        conforming, high_balance = unit_limits(units, loan_limits)
+
+    is_conforming = formulas["is_conforming"]
+    is_high_balance = formulas["is_high_balance"]
+    exceeds_conforming = is_conforming & (loan_amount > conforming)
+    outside_high_balance = is_high_balance & ((loan_amount <= conforming) | (loan_amount > high_balance))
+    exceeds_max = loan_amount > high_balance
+
+    # Down payment that brings the loan under the binding limit, as in the "Apply ... Down Payment" buttons
+    binding_limit = np.where(exceeds_conforming, conforming, high_balance)
+    adjusted = np.where(exceeds_conforming | exceeds_max, (loan_amount - binding_limit) / total_sale_price + down_payment_pct, np.nan)
+
+    rules = np.where(exceeds_conforming, "conforming", np.where(outside_high_balance, "high_balance", np.where(exceeds_max, "max_loan_limit", "")))
+    if "fips" in scenarios:
+        # County windows differ per row, so suggestions go through the scalar scan (only flagged rows pay for it)
+        next_formulas = np.full(len(price), None, dtype=object)
+        for row in np.flatnonzero(rules != "").tolist():
+            rule = rules[row]
+            max_loan_amount = conforming[row] if rule == "conforming" else high_balance[row]
+            min_loan_amount = conforming[row] if rule == "high_balance" else None
+            program = {"conforming": "C", "high_balance": "HB"}.get(rule)
+            next_formulas[row] = next_formula(price[row], formula[row], max_loan_amount, min_loan_amount, program, loan_formulas)
+    else:
+        next_formulas = np.array([
+            index.next_formula(p, f, u, rule) if rule else None
+            for p, f, u, rule in zip(price.tolist(), formula.tolist(), units.tolist(), rules.tolist())
+        ], dtype=object)
+
+    ltv = (loan_amount / total_sale_price) * 100
+    max_concession = max_seller_concession_batch(scenarios["occupancy"], ltv, seller_concession)
+    occupancy_not_allowed = np.isnan(max_concession)
+    concession_exceeded = ~occupancy_not_allowed & (seller_concession_pct > np.nan_to_num(max_concession))
+    if "credit_score" in scenarios:
+        add_mortgage_insurance(result, ltv, scenarios["credit_score"], mi_rates)
+
+    result.update({
+        "ltv": ltv,
+        "exceeds_conforming_limit": exceeds_conforming,
+        "outside_high_balance_range": outside_high_balance,
+        "exceeds_max_loan_limit": exceeds_max,
+        "adjusted_down_payment_pct": adjusted,
+        "next_formula": next_formulas,
+        "occupancy_ltv_not_allowed": occupancy_not_allowed,
+        "seller_concession_exceeded": concession_exceeded,
+        "eligible": ~(exceeds_conforming | outside_high_balance | exceeds_max | occupancy_not_allowed | concession_exceeded),
+    })
+    return result
+
+
+# Every formula for one scenario in a single vectorized pass: loan limits for the unit count, the formula's
+# max LTV against ltv_limits[occupancy][units] and the occupancy seller-concession rule. Returns
+# RANKING_COLUMNS as arrays, eligible formulas first, each group ordered by sort_by (ties keep table order).
+# A "credit_score" in the scenario adds mortgage insurance to the total payment and MORTGAGE_INSURANCE_COLUMNS.
+def rank_formulas(scenario, sort_by="cash_to_close", loan_formulas=loan_formulas, loan_limits=loan_limits, ltv_limits=ltv_limits,
+                  mi_rates=None, seller_concession=None):
+    if sort_by not in RANKING_KEYS:
+        raise ValueError(f"sort_by must be one of {', '.join(RANKING_KEYS)}")
+    rows, formulas = formula_table(loan_formulas)
+    num_units = int(scenario["units"])
+    limits = loan_limits[num_units]
+
+    result = calculate_loan_batch(float(scenario["price"]), float(scenario["term"]), float(scenario["rate"]),
+                                  formulas["down_payment_pct"], formulas["seller_concession_pct"], float(scenario.get("tax", 0.0)),
+                                  float(scenario.get("insurance", 0.0)), float(scenario.get("flood", 0.0)))
+    loan_amount = result["loan_amount"]
+    exceeds_conforming = formulas["is_conforming"] & (loan_amount > limits["conforming"])
+    outside_high_balance = formulas["is_high_balance"] & ((loan_amount <= limits["conforming"]) | (loan_amount > limits["high_balance"]))
+    exceeds_max = loan_amount > limits["high_balance"]
+    ltv_not_allowed = formulas["max_ltv"] > ltv_limits.get(scenario["occupancy"], {}).get(num_units, 0)
+
+    ltv = (loan_amount / result["total_sale_price"]) * 100
+    max_concession = max_seller_concession_batch(np.full(len(ltv), scenario["occupancy"]), ltv, seller_concession)
+    occupancy_not_allowed = np.isnan(max_concession)
+    concession_exceeded = ~occupancy_not_allowed & (formulas["seller_concession_pct"] > np.nan_to_num(max_concession))
+    eligible = ~(exceeds_conforming | outside_high_balance | exceeds_max | ltv_not_allowed | occupancy_not_allowed | concession_exceeded)
+    columns = RANKING_COLUMNS
+    if scenario.get("credit_score") is not None:
+        add_mortgage_insurance(result, ltv, int(scenario["credit_score"]), mi_rates)
+        columns += MORTGAGE_INSURANCE_COLUMNS
+
+    result.update({
+        "formula": np.array(list(rows)),
+        "ltv": ltv,
+        "exceeds_conforming_limit": exceeds_conforming,
+        "outside_high_balance_range": outside_high_balance,
+        "exceeds_max_loan_limit": exceeds_max,
+        "ltv_not_allowed": ltv_not_allowed,
+        "occupancy_ltv_not_allowed": occupancy_not_allowed,
+        "seller_concession_exceeded": concession_exceeded,
+        "eligible": eligible,
+    })
+    order = np.lexsort((result[sort_by], ~eligible))
+    return {column: result[column][order] for column in columns}
@@ -0,0 +1,29 @@
+import numpy as np
+
+from .batch import calculate_loan_batch, formula_pcts
+from .rules import loan_formulas
+
+
+# Evenly spaced values from start to stop inclusive, rounded like the Streamlit inputs
+def grid_axis(start, stop, steps, decimals=3):
+    return np.round(np.linspace(start, stop, steps), decimals)
+
+
+# (rates x prices) grid of one calculate_loan column for a single formula, in one broadcast pass
+def rate_price_grid(rates, prices, loan_term, down_payment_pct, seller_concession_pct, property_tax=0.0, home_insurance=0.0,
+                    flood_insurance=0.0, column="total_monthly_payment"):
+    rates = np.asarray(rates, dtype=np.float64)[:, None]
+    prices = np.asarray(prices, dtype=np.float64)[None, :]
+    result = calculate_loan_batch(prices, loan_term, rates, down_payment_pct, seller_concession_pct,
+                                  property_tax, home_insurance, flood_insurance)
+    return result[column]
+
+
+# (rates x formulas) grid of one calculate_loan column at a single purchase price
+def rate_formula_grid(rates, formulas, purchase_price, loan_term, property_tax=0.0, home_insurance=0.0, flood_insurance=0.0,
+                      column="total_monthly_payment", loan_formulas=loan_formulas):
+    down_payment_pct, seller_concession_pct = formula_pcts(list(formulas), loan_formulas)
+    rates = np.asarray(rates, dtype=np.float64)[:, None]
+    result = calculate_loan_batch(purchase_price, loan_term, rates, down_payment_pct[None, :], seller_concession_pct[None, :],
+                                  property_tax, home_insurance, flood_insurance)
+    return result[column]
@@ -0,0 +1,260 @@
+"""Compiled rule tables published once to memory-mapped files and attached read-only by every process.
+
+    python -m loan_engine.shared_tables publish            # compile the current tables as a new version
+    python -m loan_engine.shared_tables show               # version the workers attach to
+
+A publish writes each table as a .npy file in a new version directory under the tables root and then
+atomically repoints the root's CURRENT file at it. Processes attach with np.load(mmap_mode="r"), so every
+Streamlit server and batch worker on the host reads the same page-cache pages instead of building its own
+copy. current_rule_tables() re-reads CURRENT (one small file read) and re-attaches when the version changed,
+so a table update reaches running processes without a restart. Old versions are kept for processes still
+holding them and pruned after `keep` newer publishes.
+
+Who reads them: the scenario CLI (--tables, or LOAN_ENGINE_TABLES) and its pool workers, which attach in
+_init_worker and follow CURRENT between chunks, and the NumPy sections of updated_loan_calculator_app.py
+(Compare All Formulas) when LOAN_ENGINE_TABLES is set. The scalar page paths keep the rule-set tables in
+rulesets: attaching means importing NumPy, which the pages keep out of their start-up.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .core import max_seller_concession
+from .county_limits import CountyLoanLimits, county_loan_limits
+from .eligibility import NextFormulaIndex
+from .mortgage_insurance import MortgageInsuranceRates, mortgage_insurance_rates
+from .rule_config import load_rules
+from .rules import loan_formulas, loan_limits, ltv_limits
+from .scenarios import CONCESSION_OCCUPANCIES
+
+ENV_VAR = "LOAN_ENGINE_TABLES"
+DEFAULT_ROOT = Path(__file__).parent / "data" / "tables"
+POINTER = "CURRENT"
+MANIFEST = "manifest.json"
+DEFAULT_KEEP = 3
+RAW_FORMULA_DTYPE = np.dtype([("down_payment", np.float64), ("seller_concession", np.float64), ("max_ltv", np.float64)])
+
+
+# Rule tables as arrays plus the small metadata (labels, keys, band edges) needed to read them back
+def compile_rule_tables(loan_formulas=loan_formulas, loan_limits=loan_limits, ltv_limits=ltv_limits, county_limits=None, mi_rates=None):
+    county_limits = county_limits or county_loan_limits()
+    mi_rates = mi_rates or mortgage_insurance_rates()
+    units = sorted(loan_limits)
+    occupancies = list(ltv_limits)
+
+    limits = np.zeros((max(units) + 1, 2), dtype=np.int64)
+    for num_units in units:
+        limits[num_units] = loan_limits[num_units]["conforming"], loan_limits[num_units]["high_balance"]
+    ltv = np.full((len(occupancies), max(units) + 1), np.nan)
+    for row, occupancy_type in enumerate(occupancies):
+        for num_units, max_ltv in ltv_limits[occupancy_type].items():
+            ltv[row, num_units] = max_ltv
+    # Seller-concession rule per occupancy at LTV <= 90 and > 90; NaN = occupancy does not allow the LTV
+    concession = np.array([[max_seller_concession(occupancy_type, ltv_value) for ltv_value in (90, 91)] for occupancy_type in CONCESSION_OCCUPANCIES],
+                          dtype=np.float64)
+
+    arrays = {
+        "formulas": np.array([tuple(values[field] for field in RAW_FORMULA_DTYPE.names) for values in loan_formulas.values()],
+                             dtype=RAW_FORMULA_DTYPE),
+        "loan_limits": limits,
+        "ltv_limits": ltv,
+        "seller_concession": concession,
+        "county_limits": np.ascontiguousarray(county_limits.table),
+        "mortgage_insurance": np.ascontiguousarray(mi_rates.rates),
+    }
+    metadata = {
+        "formulas": list(loan_formulas),
+        "units": units,
+        "occupancies": occupancies,
+        "concession_occupancies": list(CONCESSION_OCCUPANCIES),
+        "mortgage_insurance": {"ltv_edges": mi_rates.ltv_edges.tolist(), "score_floors": list(mi_rates.score_floors),
+                               "coverages": list(mi_rates.coverages)},
+    }
+    return arrays, metadata
+
+
+# Content hash of the compiled tables, so publishing unchanged tables is a no-op
+def tables_digest(arrays, metadata):
+    digest = hashlib.sha256(json.dumps(metadata, sort_keys=True).encode())
+    for name in sorted(arrays):
+        digest.update(name.encode())
+        digest.update(str(arrays[name].dtype).encode())
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def current_version(root=DEFAULT_ROOT):
+    try:
+        return (Path(root) / POINTER).read_text(encoding="utf-8").strip() or None
+    except FileNotFoundError:
+        return None
+
+
+# Write the tables as a new version directory and atomically point CURRENT at it; returns the version
+def publish_rule_tables(root=DEFAULT_ROOT, keep=DEFAULT_KEEP, **tables):
+    root = Path(root)
+    arrays, metadata = compile_rule_tables(**tables)
+    version = tables_digest(arrays, metadata)
+    if current_version(root) == version:
+        return version
+
+    version_dir = root / version
+    if not (version_dir / MANIFEST).exists():
+        temp_dir = root / f".{version}.{os.getpid()}.tmp"
+        temp_dir.mkdir(parents=True, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(temp_dir / f"{name}.npy", array)
+        manifest = {"version": version, "published": time.time(), "tables": sorted(arrays), **metadata}
+        (temp_dir / MANIFEST).write_text(json.dumps(manifest), encoding="utf-8")
+        try:
+            os.replace(temp_dir, version_dir)
+        except OSError:
+            shutil.rmtree(temp_dir, ignore_errors=True)  # another process published the same version first
+
+    pointer = root / f".{POINTER}.{os.getpid()}.tmp"
+    pointer.write_text(version, encoding="utf-8")
+    os.replace(pointer, root / POINTER)
+    prune_versions(root, keep)
+    return version
+
+
+# Remove all but the `keep` most recently published versions (never the current one). Processes that still map
+# a removed version keep reading it; the files go away when they re-attach.
+def prune_versions(root=DEFAULT_ROOT, keep=DEFAULT_KEEP):
+    root = Path(root)
+    current = current_version(root)
+    versions = sorted((path for path in root.iterdir() if (path / MANIFEST).exists()), key=lambda path: (path / MANIFEST).stat().st_mtime)
+    for path in versions[:-keep] if keep else versions:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+# One attached version: the arrays are read-only memory maps, and the dict tables the engine functions take are
+# rebuilt from them (a few dozen entries). Objects built from the tables are created on first use.
+class RuleTables:
+    def __init__(self, version_dir):
+        self.path = Path(version_dir)
+        self.manifest = json.loads((self.path / MANIFEST).read_text(encoding="utf-8"))
+        self.version = self.manifest["version"]
+        self.arrays = {name: np.load(self.path / f"{name}.npy", mmap_mode="r") for name in self.manifest["tables"]}
+        self._scenario_tables = None
+
+    @classmethod
+    def attach(cls, root=DEFAULT_ROOT):
+        version = current_version(root)
+        if version is None:
+            raise FileNotFoundError(f"no rule tables published under {root}; run `python -m loan_engine.shared_tables publish`")
+        return cls(Path(root) / version)
+
+    def __repr__(self):
+        return f"RuleTables({self.version!r})"
+
+    @property
+    def loan_formulas(self):
+        formulas = self.arrays["formulas"]
+        return {label: {field: float(formulas[row][field]) for field in RAW_FORMULA_DTYPE.names}
+                for row, label in enumerate(self.manifest["formulas"])}
+
+    @property
+    def loan_limits(self):
+        limits = self.arrays["loan_limits"]
+        return {num_units: {"conforming": int(limits[num_units, 0]), "high_balance": int(limits[num_units, 1])} for num_units in self.manifest["units"]}
+
+    @property
+    def ltv_limits(self):
+        ltv = self.arrays["ltv_limits"]
+        return {occupancy_type: {num_units: float(ltv[row, num_units]) for num_units in range(ltv.shape[1]) if not np.isnan(ltv[row, num_units])}
+                for row, occupancy_type in enumerate(self.manifest["occupancies"])}
+
+    # Table form of core.max_seller_concession
+    def max_seller_concession(self, occupancy_type, ltv):
+        occupancies = self.manifest["concession_occupancies"]
+        if occupancy_type not in occupancies:
+            return None
+        value = float(self.arrays["seller_concession"][occupancies.index(occupancy_type), int(ltv > 90)])
+        return None if np.isnan(value) else value
+
+    @property
+    def county_limits(self):
+        return CountyLoanLimits(self.arrays["county_limits"], self.loan_limits)
+
+    @property
+    def mi_rates(self):
+        bands = self.manifest["mortgage_insurance"]
+        return MortgageInsuranceRates(bands["ltv_edges"], bands["score_floors"], bands["coverages"], self.arrays["mortgage_insurance"])
+
+    # Keyword arguments for scenarios.evaluate_scenarios, built once per attached version
+    def scenario_tables(self):
+        if self._scenario_tables is None:
+            loan_formulas, loan_limits = self.loan_formulas, self.loan_limits
+            self._scenario_tables = {"loan_formulas": loan_formulas, "loan_limits": loan_limits, "index": NextFormulaIndex(loan_formulas, loan_limits),
+                                     "county_limits": self.county_limits, "mi_rates": self.mi_rates,
+                                     "seller_concession": self.arrays["seller_concession"]}
+        return self._scenario_tables
+
+    # Keyword arguments for scenarios.rank_formulas
+    def ranking_tables(self):
+        tables = self.scenario_tables()
+        return {"loan_formulas": tables["loan_formulas"], "loan_limits": tables["loan_limits"], "ltv_limits": self.ltv_limits,
+                "mi_rates": tables["mi_rates"], "seller_concession": tables["seller_concession"]}
+
+
+_attached = {}
+_attach_lock = threading.Lock()
+
+
+# The tables CURRENT points at, attached once per process and re-attached when a new version is published
+def current_rule_tables(root=DEFAULT_ROOT):
+    root = Path(root)
+    version = current_version(root)
+    tables = _attached.get(root)
+    if tables is None or tables.version != version:
+        with _attach_lock:
+            tables = _attached.get(root)
+            if tables is None or tables.version != version:
+                tables = _attached[root] = RuleTables.attach(root)
+    return tables
+
+
+# Tables under the LOAN_ENGINE_TABLES root, or None when the variable is unset
+def published_rule_tables():
+    root = os.environ.get(ENV_VAR)
+    return current_rule_tables(root) if root else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m loan_engine.shared_tables", description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("publish", "show"))
+    parser.add_argument("--root", default=str(DEFAULT_ROOT), help="tables directory (default: %(default)s)")
+    parser.add_argument("--rules", help="rule configuration file to compile (default: the one loan_engine.rules was loaded from)")
+    parser.add_argument("--county-csv", help="county loan limit CSV (default: the bundled sample)")
+    parser.add_argument("--mi-csv", help="mortgage insurance rate card CSV (default: the bundled sample)")
+    parser.add_argument("--keep", type=int, default=DEFAULT_KEEP, help="versions to keep (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.command == "publish":
+        tables = {}
+        if args.rules:
+            rules = load_rules(args.rules)
+            tables.update(loan_formulas=rules["loan_formulas"], loan_limits=rules["loan_limits"], ltv_limits=rules["ltv_limits"])
+        if args.county_csv:
+            tables["county_limits"] = CountyLoanLimits.from_csv(args.county_csv)
+        if args.mi_csv:
+            tables["mi_rates"] = MortgageInsuranceRates.from_csv(args.mi_csv)
+        print(publish_rule_tables(args.root, args.keep, **tables))
+    else:
+        tables = RuleTables.attach(args.root)
+        print(f"{tables.version} ({len(tables.manifest['formulas'])} formulas, published {time.ctime(tables.manifest['published'])})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
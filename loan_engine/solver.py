@@ -0,0 +1,54 @@
+from .formulas import formula_records
+from .rules import dti_limits, loan_formulas, loan_limits
+
+
+# Largest loan amount whose monthly P&I fits the budget (PMT formula solved for the principal)
+def max_loan_amount(monthly_principal_interest, loan_term, interest_rate):
+    monthly_interest_rate = (interest_rate / 100) / 12
+    num_payments = loan_term * 12
+    if monthly_interest_rate > 0:
+        return monthly_principal_interest * (1 - (1 + monthly_interest_rate) ** -num_payments) / monthly_interest_rate
+    return monthly_principal_interest * num_payments
+
+
+# Highest purchase price whose total monthly payment from calculate_loan stays within monthly_budget.
+# The loan amount is also capped at the conforming (C) or high-balance (HB) limit for num_units; returns None
+# when an HB formula cannot reach a loan amount above the conforming limit within the budget.
+def max_affordable_price(monthly_budget, loan_term, interest_rate, formula, property_tax, home_insurance, flood_insurance=0.0,
+                         num_units=1, loan_formulas=loan_formulas, loan_limits=loan_limits):
+    record = formula_records(loan_formulas)[formula]
+    limits = loan_limits[num_units]
+
+    escrow = property_tax / 12 + home_insurance / 12 + flood_insurance / 12
+    loan_amount = max_loan_amount(max(monthly_budget - escrow, 0.0), loan_term, interest_rate)
+
+    if record.is_high_balance:
+        loan_amount = min(loan_amount, limits["high_balance"])
+        if loan_amount <= limits["conforming"]:
+            return None
+    elif record.is_conforming:
+        loan_amount = min(loan_amount, limits["conforming"])
+
+    total_sale_price = loan_amount / record.loan_factor
+    return total_sale_price * record.concession_factor
+
+
+# Front-end (housing payment / income) and back-end (housing payment plus other debts / income) ratios in percent
+def dti_ratios(monthly_income, total_monthly_payment, monthly_debts=0.0):
+    if monthly_income <= 0:
+        return float("inf"), float("inf")
+    return total_monthly_payment / monthly_income * 100, (total_monthly_payment + monthly_debts) / monthly_income * 100
+
+
+# Largest total monthly payment that keeps both ratios within dti_limits
+def max_qualifying_payment(monthly_income, monthly_debts=0.0, dti_limits=dti_limits):
+    front_end = monthly_income * dti_limits["front_end"] / 100
+    back_end = monthly_income * dti_limits["back_end"] / 100 - monthly_debts
+    return max(min(front_end, back_end), 0.0)
+
+
+# Highest purchase price for formula whose total monthly payment qualifies on income and debts
+def max_qualifying_price(monthly_income, monthly_debts, loan_term, interest_rate, formula, property_tax, home_insurance,
+                         flood_insurance=0.0, num_units=1, dti_limits=dti_limits, loan_formulas=loan_formulas, loan_limits=loan_limits):
+    return max_affordable_price(max_qualifying_payment(monthly_income, monthly_debts, dti_limits), loan_term, interest_rate, formula,
+                                property_tax, home_insurance, flood_insurance, num_units, loan_formulas, loan_limits)
@@ -0,0 +1,112 @@
+import numpy as np
+
+from .batch import calculate_loan_batch, formula_pcts, pmt_batch
+from .rules import loan_formulas
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+DEFAULT_MARGIN = 2.75  # index margin for the fixed and float-down structures
+
+# Common ARM structures: months at the start rate, months between resets, margin over the index and
+# initial / periodic / lifetime caps, all in percentage points
+arm_structures = {
+    "5/1": {"fixed_months": 60, "adjust_months": 12, "margin": 2.75, "initial_cap": 2.0, "periodic_cap": 2.0, "lifetime_cap": 5.0},
+    "5/6": {"fixed_months": 60, "adjust_months": 6, "margin": 2.75, "initial_cap": 2.0, "periodic_cap": 1.0, "lifetime_cap": 5.0},
+    "7/6": {"fixed_months": 84, "adjust_months": 6, "margin": 2.75, "initial_cap": 5.0, "periodic_cap": 1.0, "lifetime_cap": 5.0},
+    "10/6": {"fixed_months": 120, "adjust_months": 6, "margin": 2.75, "initial_cap": 5.0, "periodic_cap": 1.0, "lifetime_cap": 5.0},
+}
+
+
+# Monthly index paths (percent) from a mean-reverting Vasicek / Ornstein-Uhlenbeck model, Euler-stepped.
+# Returns a (months, num_paths) array; the same seed always gives the same paths.
+def rate_paths(num_paths, months, start_rate, long_run_rate=None, reversion=0.15, volatility=1.0, seed=0, min_rate=0.0):
+    long_run_rate = start_rate if long_run_rate is None else long_run_rate
+    dt = 1 / 12
+    shocks = np.random.default_rng(seed).standard_normal((months, num_paths)) * (volatility * np.sqrt(dt))
+    rates = np.empty((months, num_paths))
+    current = np.full(num_paths, float(start_rate))
+    for month in range(months):
+        rates[month] = current
+        current = np.maximum(current + reversion * (long_run_rate - current) * dt + shocks[month], min_rate)
+    return rates
+
+
+# Note rate of an ARM for every (month, path): initial_rate during the fixed period, then index + margin
+# rounded to the nearest 1/8 point at each reset, held within the caps and never below the margin
+def arm_note_rates(index_rates, initial_rate, fixed_months, adjust_months, margin, initial_cap, periodic_cap, lifetime_cap,
+                   rounding=0.125):
+    months = index_rates.shape[0]
+    note_rates = np.full(index_rates.shape, float(initial_rate))
+    current = note_rates[0].copy()
+    ceiling = initial_rate + lifetime_cap
+    for position, reset in enumerate(range(fixed_months, months, adjust_months)):
+        cap = initial_cap if position == 0 else periodic_cap
+        fully_indexed = np.round((index_rates[reset] + margin) / rounding) * rounding
+        current = np.clip(fully_indexed, np.maximum(current - cap, margin), np.minimum(current + cap, ceiling))
+        note_rates[reset:reset + adjust_months] = current
+    return note_rates
+
+
+# Fixed-rate loan with a one-time float-down during the lock: the first month in lock_months where
+# index + margin is at least threshold below initial_rate reprices the loan for the whole term
+def float_down_note_rates(index_rates, initial_rate, margin, lock_months=2, threshold=0.25):
+    market = index_rates[:lock_months] + margin
+    hits = market <= initial_rate - threshold
+    first_hit = np.argmax(hits, axis=0)
+    rate = np.where(hits.any(axis=0), market[first_hit, np.arange(index_rates.shape[1])], initial_rate)
+    return np.broadcast_to(rate, index_rates.shape)
+
+
+# Monthly P&I per unit of principal for every (month, path). Each month re-amortizes the remaining balance
+# over the remaining term (the PMT formula), which leaves the payment unchanged while the rate is unchanged.
+def unit_payment_paths(note_rates):
+    months, num_paths = note_rates.shape
+    payments = np.empty(note_rates.shape)
+    balance = np.ones(num_paths)
+    for month in range(months):
+        monthly_interest_rate = note_rates[month] / 1200
+        payment = pmt_batch(balance, monthly_interest_rate, months - month)
+        payments[month] = payment
+        balance = balance * (1 + monthly_interest_rate) - payment
+    return payments
+
+
+# Payment distributions per formula over simulated rate paths. structure is "fixed", "float_down" or an
+# arm_structures key (or a dict of the same fields). P&I is linear in the loan amount, so one set of
+# per-unit payment paths serves every formula: each formula's (path, month) payments are the unit paths times
+# its loan amount, so its percentiles are the unit percentiles scaled, without a (formula, path, month) array.
+def stress_test(purchase_price, initial_rate, loan_term=30, formulas=None, structure="5/6", property_tax=0.0,
+                home_insurance=0.0, flood_insurance=0.0, num_paths=10_000, long_run_rate=None, reversion=0.15,
+                volatility=1.0, seed=0, percentiles=DEFAULT_PERCENTILES, lock_months=2, float_down_threshold=0.25,
+                loan_formulas=loan_formulas):
+    formulas = list(loan_formulas) if formulas is None else list(formulas)
+    months = int(round(loan_term * 12))
+    arm = structure if isinstance(structure, dict) else arm_structures.get(structure)
+    if arm is None and structure not in ("fixed", "float_down"):
+        raise ValueError(f"unknown structure: {structure}")
+    margin = arm["margin"] if arm else DEFAULT_MARGIN
+
+    index_rates = rate_paths(num_paths, months, initial_rate - margin, long_run_rate, reversion, volatility, seed)
+    if structure == "fixed":
+        note_rates = np.full(index_rates.shape, float(initial_rate))
+    elif structure == "float_down":
+        note_rates = float_down_note_rates(index_rates, initial_rate, margin, lock_months, float_down_threshold)
+    else:
+        note_rates = arm_note_rates(index_rates, initial_rate, **arm)
+    unit_payments = unit_payment_paths(note_rates)
+
+    down_payment_pct, seller_concession_pct = formula_pcts(formulas, loan_formulas)
+    loan_amount = calculate_loan_batch(purchase_price, loan_term, initial_rate, down_payment_pct, seller_concession_pct)["loan_amount"]
+    escrow = property_tax / 12 + home_insurance / 12 + flood_insurance / 12
+
+    unit_percentiles = np.percentile(unit_payments, percentiles, axis=1)                  # (percentile, month)
+    peak_percentiles = np.percentile(unit_payments.max(axis=0), percentiles)              # (percentile,)
+    return {
+        "formulas": formulas,
+        "percentiles": tuple(percentiles),
+        "loan_amount": loan_amount,
+        "payment_percentiles": loan_amount[:, None, None] * unit_percentiles + escrow,   # (formula, percentile, month)
+        "peak_payment_percentiles": loan_amount[:, None] * peak_percentiles + escrow,     # (formula, percentile)
+        "mean_payment": loan_amount[:, None] * unit_payments.mean(axis=1) + escrow,      # (formula, month)
+        "note_rate_percentiles": np.percentile(note_rates, percentiles, axis=1),          # (percentile, month)
+    }
+
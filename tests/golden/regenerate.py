@@ -0,0 +1,129 @@
+"""Rebuild the golden outputs of the legacy calculator variants.
+
+    python tests/golden/regenerate.py
+    python tests/golden/regenerate.py --rev 03c4ca1
+
+For every rule-set version, pulls the page sources that version replaces out of git at --rev (the last
+commit where each page still carried its own rule tables and calculate_loan), runs that page's own
+calculate_loan and eligibility loop over a grid of inputs and writes <version>.json next to this script.
+tests/test_golden.py checks loan_engine.ruleset(version) against those files.
+"""
+import argparse
+import json
+import math
+import subprocess
+import sys
+from itertools import product
+from pathlib import Path
+
+GOLDEN_DIR = Path(__file__).resolve().parent
+REPO_ROOT = GOLDEN_DIR.parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from loan_engine.rulesets import rule_set_versions  # noqa: E402
+
+BASELINE_REV = "03c4ca1"
+PRICES = (50000.0, 318750.0, 806500.0, 1890000.0)
+RATES = (1.0, 5.625, 6.5004, 7.12345, 7.999)  # off-grid rates catch a rate rounded where the page did not round it
+TERMS = (15, 30)
+ESCROWS = ((0.0, 0.0, 0.0), (5400.0, 1800.0, 700.0))
+OCCUPANCIES = ("Primary Residence", "Second Home", "Investment Property")
+UNITS = (1, 2, 3, 4)
+
+
+def page_source(page, rev):
+    return subprocess.run(["git", "show", f"{rev}:{page}"], cwd=REPO_ROOT, check=True, capture_output=True, text=True).stdout
+
+
+# Top-level statement starting with prefix and its indented body (or closing bracket). Works on pages that
+# no longer parse as a whole.
+def top_level_block(source, prefix):
+    lines = source.splitlines()
+    start = next(i for i, line in enumerate(lines) if line.startswith(prefix))
+    block = [lines[start]]
+    for line in lines[start + 1:]:
+        if line and not line[0].isspace() and line[0] not in "})]":
+            break
+        block.append(line)
+    return "\n".join(block).rstrip() + "\n"
+
+
+# The page's rule tables and calculate_loan, executed on their own
+def page_namespace(source):
+    namespace = {}
+    names = ["loan_formulas = ", "ltv_limits = ", "conforming_loan_limit = ", "def calculate_loan("]
+    for prefix in names:
+        if any(line.startswith(prefix) for line in source.splitlines()):
+            exec(top_level_block(source, prefix), namespace)
+    return namespace
+
+
+# Arguments of the page's calculate_loan for one case, in that variant's own signature
+def legacy_arguments(namespace, price, rate, term, formula, escrow):
+    parameters = namespace["calculate_loan"].__code__.co_varnames[:namespace["calculate_loan"].__code__.co_argcount]
+    values = namespace["loan_formulas"][formula]
+    arguments = {"purchase_price": price, "interest_rate": rate, "loan_term": term, "formula": formula,
+                 "down_payment_pct": values["down_payment"] / 100, "seller_concession_pct": values["seller_concession"] / 100,
+                 "property_tax": escrow[0], "home_insurance": escrow[1], "flood_insurance": escrow[2]}
+    return [arguments[name] for name in parameters]
+
+
+def calculate_cases(namespace):
+    cases = []
+    for formula, price, rate, term, escrow in product(namespace["loan_formulas"], PRICES, RATES, TERMS, ESCROWS):
+        expected = namespace["calculate_loan"](*legacy_arguments(namespace, price, rate, term, formula, escrow))
+        cases.append([price, rate, term, formula, *escrow, list(expected)])
+    return cases
+
+
+# Prices on a grid plus the exact float on each side of every formula's max price, through the page's loop
+def eligibility_cases(source, namespace):
+    loop = top_level_block(source, "for formula, values in loan_formulas.items():")
+    loan_formulas, limit = namespace["loan_formulas"], namespace["conforming_loan_limit"]
+    prices = {50000.0 + 50000.0 * step for step in range(40)}
+    for values in loan_formulas.values():
+        max_price = (limit / (1 - values["down_payment"] / 100)) * (1 - values["seller_concession"] / 100)
+        prices.update((max_price, math.nextafter(max_price, math.inf), math.nextafter(max_price, -math.inf)))
+    cases = []
+    for price, occupancy_type, num_units in product(sorted(prices), OCCUPANCIES, UNITS):
+        scope = dict(namespace, purchase_price=price, occupancy_type=occupancy_type, num_units=num_units, eligible_formulas=[])
+        exec(loop, scope)
+        cases.append([price, occupancy_type, num_units, scope["eligible_formulas"]])
+    return cases
+
+
+def golden_outputs(version, rev=BASELINE_REV):
+    golden = None
+    for page in rule_set_versions[version]["pages"]:
+        source = page_source(page, rev)
+        if "\ndef calculate_loan(" not in source:
+            continue  # page (9) called calculate_loan without defining it
+        namespace = page_namespace(source)
+        outputs = {"calculate": calculate_cases(namespace)}
+        if "\nfor formula, values in loan_formulas.items():" in source:
+            outputs["eligible_formulas"] = eligibility_cases(source, namespace)
+        if golden is None:
+            golden = {"version": version, "rev": rev, "pages": [page], **outputs}
+        elif all(golden.get(key) == cases for key, cases in outputs.items()):
+            golden["pages"].append(page)
+        else:
+            raise SystemExit(f"{version}: {page} disagrees with {golden['pages'][0]}")
+    return golden
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rev", default=BASELINE_REV, help="commit holding the legacy pages (default: %(default)s)")
+    parser.add_argument("versions", nargs="*", default=list(rule_set_versions), help="versions to rebuild (default: all)")
+    args = parser.parse_args(argv)
+
+    for version in args.versions:
+        golden = golden_outputs(version, args.rev)
+        path = GOLDEN_DIR / f"{version}.json"
+        path.write_text(json.dumps(golden, ensure_ascii=False, separators=(",", ":")) + "\n", encoding="utf-8")
+        print(f"{path.name}: {len(golden['calculate'])} calculations, {len(golden.get('eligible_formulas', []))} eligibility cases")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from loan_engine.amortization import amortization_schedule  # noqa: E402
+from loan_engine.batch import SCHEDULE_COLUMNS, amortization_chunks, amortization_matrix  # noqa: E402
+
+LOANS = np.array([782305.0, 250000.0, 1_150_000.0, 90000.0, 640000.0])
+TERMS = np.array([30, 15, 30, 10, 20])
+RATES = np.array([5.625, 7.25, 0.0, 3.0, 6.875])
+
+
+def test_matrix_matches_schedule_generator():
+    matrix = amortization_matrix(LOANS, TERMS, RATES)
+    assert matrix["balance"].shape == (len(LOANS), 360)
+    for row, (loan_amount, term, rate) in enumerate(zip(LOANS, TERMS, RATES)):
+        schedule = np.array([values for _, *values in amortization_schedule(loan_amount, term, rate)])
+        months = len(schedule)
+        for column, name in enumerate(SCHEDULE_COLUMNS):
+            np.testing.assert_allclose(matrix[name][row, :months], schedule[:, column], rtol=1e-9, atol=1e-6)
+            assert not matrix[name][row, months:].any()  # months past the term stay zero
+        assert matrix["principal"][row].sum() == pytest.approx(loan_amount)
+
+
+def test_chunked_assembly_matches_single_pass():
+    single = amortization_matrix(LOANS, TERMS, RATES)
+    output_bytes = 8 * 3 * len(LOANS) * 360
+    chunked = amortization_matrix(LOANS, TERMS, RATES, max_bytes=output_bytes + 8 * 361 * 6 * 2)  # two loans per block
+    blocks = list(amortization_chunks(LOANS, TERMS, RATES, chunk_rows=2))
+    assert [start for start, _ in blocks] == [0, 2, 4]
+    for name in SCHEDULE_COLUMNS:
+        np.testing.assert_array_equal(chunked[name], single[name])
+        np.testing.assert_array_equal(np.concatenate([block[name] for _, block in blocks]), single[name])
+
+
+def test_matrix_over_max_bytes_raises():
+    with pytest.raises(ValueError, match="amortization_chunks"):
+        amortization_matrix(LOANS, TERMS, RATES, max_bytes=8 * 3 * len(LOANS) * 360)
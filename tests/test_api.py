@@ -0,0 +1,131 @@
+import asyncio
+import json
+
+import pytest
+
+from loan_engine import api
+from loan_engine import rules as startup
+from loan_engine.api import LocalClient, PricingService
+from loan_engine.core import evaluate_scenario
+from loan_engine.rulesets import use_rules
+
+SCENARIO = {"occupancy": "Primary Residence", "units": 1, "price": 500000, "term": 30, "rate": 6.5, "formula": "C.10.6",
+            "tax": 3600, "insurance": 1200}
+
+
+def run(coroutine_function, *args):
+    async def main():
+        client = LocalClient(PricingService(workers=2))
+        try:
+            return await coroutine_function(client, *args)
+        finally:
+            client.service.close()
+
+    return asyncio.run(main())
+
+
+async def post(client, path, payload):
+    return await client.post(path, payload)
+
+
+def test_price_matches_evaluate_scenario():
+    status, result = run(post, "/price", SCENARIO)
+    assert status == 200
+    assert result == pytest.approx(evaluate_scenario(dict(SCENARIO, formula="C.10.6 – Optimized combo with 10% down and 6% seller credit")))
+
+
+def test_batch_coalesces_identical_scenarios():
+    async def batch(client):
+        other = dict(SCENARIO, price=900000, formula="C.3.0")
+        status, response = await client.post("/price", {"scenarios": [SCENARIO, other, SCENARIO, SCENARIO]})
+        return status, response, client.service.stats
+
+    status, response, stats = run(batch)
+    assert status == 200
+    results = response["results"]
+    assert len(results) == 4 and results[0] == results[2] == results[3] != results[1]
+    assert stats["evaluated"] == 2 and stats["coalesced"] == 2 and stats["scenarios"] == 4
+
+
+@pytest.mark.parametrize("method, path, payload, status", [
+    ("GET", "/missing", None, 404),
+    ("GET", "/price", None, 405),
+    ("POST", "/price", {"scenarios": "all"}, 400),
+    ("POST", "/price", {k: v for k, v in SCENARIO.items() if k != "rate"}, 400),
+    ("POST", "/price", dict(SCENARIO, formula="C.99.9"), 400),
+    ("POST", "/price", dict(SCENARIO, formula=["C.10.6"]), 400),
+    ("POST", "/price", dict(SCENARIO, term=1e-300), 400),
+    ("POST", "/price", dict(SCENARIO, rate=-1), 400),
+    ("POST", "/price", dict(SCENARIO, units=5), 400),
+    ("POST", "/price", dict(SCENARIO, units=0), 400),
+    ("POST", "/price", dict(SCENARIO, units=2.9), 400),
+    ("POST", "/price", dict(SCENARIO, units=True), 400),
+    ("POST", "/price", dict(SCENARIO, occupancy="Martian"), 400),
+    ("POST", "/price", {"scenarios": [SCENARIO, dict(SCENARIO, price="cheap")]}, 400),
+])
+def test_error_mapping(method, path, payload, status):
+    async def request(client):
+        return await client.request(method, path, payload)
+
+    code, response = run(request)
+    assert code == status and "error" in response
+
+
+def test_reloaded_rules_apply_to_the_next_request():
+    async def price_twice(client):
+        scenario = dict(SCENARIO, price=850000, formula="C.3.0")
+        before = await client.post("/price", scenario)
+        use_rules(dict(startup.startup_rules, loan_limits={**startup.loan_limits, 1: {"conforming": 900000, "high_balance": 1350000}}))
+        return before, await client.post("/price", scenario)
+
+    try:
+        (status_before, before), (status_after, after) = run(price_twice)
+    finally:
+        use_rules(startup.startup_rules)
+    assert status_before == status_after == 200
+    assert before["loan_amount"] == after["loan_amount"]
+    assert before["exceeds_conforming_limit"] and not after["exceeds_conforming_limit"]
+
+
+def test_engine_failure_is_a_500(monkeypatch):
+    def fail(key, rules):
+        raise ZeroDivisionError("boom")
+
+    monkeypatch.setattr(api, "_evaluate_key", fail)
+    status, response = run(post, "/price", SCENARIO)
+    assert (status, response) == (500, {"error": "internal error"})
+
+
+def test_http_connection_gets_a_response_for_bad_input():
+    async def exchange():
+        service = PricingService(workers=1)
+        server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            responses = []
+            for payload in (dict(SCENARIO, term=1e-300), SCENARIO):
+                body = json.dumps(payload).encode()
+                writer.write(b"POST /price HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+                await writer.drain()
+                status_line = await reader.readline()
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    headers[name.lower()] = value.strip()
+                responses.append((status_line.split()[1], json.loads(await reader.readexactly(int(headers["content-length"])))))
+            writer.close()
+            return responses
+        finally:
+            server.close()
+            await server.wait_closed()
+            service.close()
+
+    (bad_status, bad), (ok_status, ok) = asyncio.run(asyncio.wait_for(exchange(), timeout=10))
+    assert bad_status == b"400" and "term" in bad["error"]
+    assert ok_status == b"200" and ok["eligible"] in (True, False)  # same keep-alive connection still serves
+
+
+def test_normalize_scenario_takes_whole_number_units():
+    assert api.normalize_scenario(dict(SCENARIO, units=2.0))[1] == 2
+    assert api.normalize_scenario(dict(SCENARIO, units="3"))[1] == 3
@@ -0,0 +1,82 @@
+from itertools import product
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from loan_engine.batch import LOAN_COLUMNS, calculate_formula_loan_batch, calculate_loan_batch, max_affordable_price_batch  # noqa: E402
+from loan_engine.core import calculate_formula_loan, calculate_loan  # noqa: E402
+from loan_engine.rules import affordability_loan_formulas, loan_formulas, loan_limits  # noqa: E402
+from loan_engine.solver import max_affordable_price  # noqa: E402
+
+PRICES = (50000.0, 318750.0, 806500.0, 1890000.0)
+RATES = (0.0, 1.0, 5.625, 7.9994)
+TERMS = (15, 30)
+ESCROWS = ((0.0, 0.0, 0.0), (5400.0, 1800.0, 700.0))
+CENT = 0.005
+
+
+def grid(*axes):
+    return [np.array(column) for column in zip(*product(*axes))]
+
+
+def test_calculate_loan_batch_matches_scalar():
+    price, rate, term, down_payment_pct, seller_concession_pct, escrow = grid(PRICES, RATES, TERMS, (0.03, 0.2), (0.0, 0.06), range(len(ESCROWS)))
+    tax, insurance, flood = np.array([ESCROWS[i] for i in escrow]).T
+    result = calculate_loan_batch(price, term, rate, down_payment_pct, seller_concession_pct, tax, insurance, flood)
+    for i in range(len(price)):
+        expected = calculate_loan(price[i], term[i], rate[i], down_payment_pct[i], seller_concession_pct[i], tax[i], insurance[i], flood[i])
+        assert [result[column][i] for column in LOAN_COLUMNS] == pytest.approx(expected, abs=CENT), i
+
+
+def test_calculate_formula_loan_batch_matches_scalar():
+    price, rate, term, formula = grid(PRICES, RATES, TERMS, list(affordability_loan_formulas))
+    result = calculate_formula_loan_batch(price, rate, term, formula, 5400.0, 1800.0, 700.0)
+    columns = list(result)
+    for i in range(len(price)):
+        expected = calculate_formula_loan(price[i], rate[i], int(term[i]), str(formula[i]), 5400.0, 1800.0, 700.0)
+        assert [result[column][i] for column in columns] == pytest.approx(expected, abs=CENT), i
+
+
+def test_max_affordable_price_batch_matches_scalar():
+    budget, rate, term, formula, units = grid((1500.0, 4000.0, 9000.0, 15000.0), RATES, TERMS, list(loan_formulas), sorted(loan_limits))
+    prices = max_affordable_price_batch(budget, term, rate, formula, 3600.0, 1200.0, 0.0, units)
+    for i in range(len(budget)):
+        expected = max_affordable_price(budget[i], int(term[i]), rate[i], str(formula[i]), 3600.0, 1200.0, 0.0, int(units[i]))
+        if expected is None:
+            assert np.isnan(prices[i]), i
+        else:
+            assert prices[i] == pytest.approx(expected, abs=CENT), i
+
+
+def test_evaluate_scenarios_uses_the_tables_passed_in():
+    from loan_engine.core import evaluate_scenario
+    from loan_engine.eligibility import NextFormulaIndex, next_formula_index
+    from loan_engine.scenarios import evaluate_scenarios
+
+    limits = {units: {name: limit * 0.6 for name, limit in unit_limits.items()} for units, unit_limits in loan_limits.items()}
+    rng = np.random.default_rng(11)
+    count = 400
+    scenarios = {
+        "occupancy": np.full(count, "Primary Residence"), "units": rng.integers(1, 5, count), "price": rng.uniform(100000.0, 2500000.0, count).round(2),
+        "term": np.full(count, 30.0), "rate": np.full(count, 6.5), "tax": np.zeros(count), "insurance": np.zeros(count), "flood": np.zeros(count),
+        "formula": rng.choice(list(loan_formulas), count),
+    }
+    result = evaluate_scenarios(scenarios, loan_limits=limits)
+    index = NextFormulaIndex(loan_formulas, limits)
+    expected = [evaluate_scenario({name: values[row] for name, values in scenarios.items()}, loan_limits=limits, index=index)["next_formula"]
+                for row in range(count)]
+    default = [evaluate_scenario({name: values[row] for name, values in scenarios.items()}, loan_limits=limits, index=next_formula_index())["next_formula"]
+               for row in range(count)]
+    assert result["next_formula"].tolist() == expected
+    assert expected != default  # the default index would suggest formulas for the default limits
+
+
+def test_pmt_batch_matches_scalar_pmt():
+    from loan_engine.batch import pmt_batch
+    from loan_engine.core import pmt
+
+    loan_amount, rate, term = grid((100000.0, 806500.0), RATES, TERMS)
+    monthly_interest_rate, num_payments = (rate / 100) / 12, term * 12.0
+    expected = [pmt(*args) for args in zip(loan_amount.tolist(), monthly_interest_rate.tolist(), num_payments.tolist())]
+    assert pmt_batch(loan_amount, monthly_interest_rate, num_payments).tolist() == expected
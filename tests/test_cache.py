@@ -0,0 +1,30 @@
+from loan_engine.cache import CACHE_SIZE, cache_stats, cached_calculate_formula_loan, cached_calculate_loan, clear_cache
+from loan_engine.core import calculate_formula_loan, calculate_loan
+
+
+def test_hits_misses_and_clear():
+    clear_cache()
+    assert cache_stats()["calculate_loan"] == {"hits": 0, "misses": 0, "size": 0, "maxsize": CACHE_SIZE}
+
+    first = cached_calculate_loan(400000, 30, 6.5, 0.03, 0.0, 3600, 1200, 0)
+    assert first == calculate_loan(400000.0, 30.0, 6.5, 0.03, 0.0, 3600.0, 1200.0, 0.0)
+    # ints and floats normalize to the same entry
+    assert cached_calculate_loan(400000.0, 30.0, 6.5, 0.03, 0, 3600.0, 1200, 0.0) is first
+    # a rate past the Interest input's precision is computed exactly, not rounded onto the 6.5 entry
+    off_grid = cached_calculate_loan(400000, 30, 6.5004, 0.03, 0.0, 3600, 1200, 0)
+    assert off_grid == calculate_loan(400000.0, 30.0, 6.5004, 0.03, 0.0, 3600.0, 1200.0, 0.0)
+    assert off_grid[3] != first[3]
+    cached_calculate_loan(400000, 15, 6.5, 0.03, 0.0, 3600, 1200, 0)
+    assert cache_stats()["calculate_loan"] == {"hits": 1, "misses": 3, "size": 3, "maxsize": CACHE_SIZE}
+
+    result = cached_calculate_formula_loan(500000, 6.5, 30, "C.10.6", 3600, 1200, 0, round_cents=True)
+    assert result == calculate_formula_loan(500000, 6.5, 30, "C.10.6", 3600, 1200, 0, round_cents=True)
+    assert cached_calculate_formula_loan(500000, 6.5, 30, "C.10.6", 3600, 1200, 0, round_cents=True) is result
+    assert cached_calculate_formula_loan(500000, 6.5, 30, "C.10.6", 3600, 1200, 0) != result  # rounding is part of the key
+    # calculate_formula_loan rounds the rate itself, so an off-grid rate shares the entry and matches it exactly
+    off_grid = cached_calculate_formula_loan(500000, 6.5004, 30, "C.10.6", 3600, 1200, 0, round_cents=True)
+    assert off_grid is result and off_grid == calculate_formula_loan(500000, 6.5004, 30, "C.10.6", 3600, 1200, 0, round_cents=True)
+    assert cache_stats()["calculate_formula_loan"] == {"hits": 2, "misses": 2, "size": 2, "maxsize": CACHE_SIZE}
+
+    clear_cache()
+    assert all(stats["size"] == stats["hits"] == stats["misses"] == 0 for stats in cache_stats().values())
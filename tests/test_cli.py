@@ -0,0 +1,61 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from loan_engine.cli import main, run_scenario_file  # noqa: E402
+from loan_engine.scenarios import MORTGAGE_INSURANCE_COLUMNS, RESULT_COLUMNS, SCENARIO_COLUMNS, evaluate_scenarios  # noqa: E402
+
+# Chunks of two rows: the first has whole-number money columns, no next_formula and no fips or credit score;
+# the later ones have fractional values, a suggested formula and the optional columns filled in
+ROWS = [
+    ("Primary Residence", 1, 400000, 30, 6.5, 3600, 1200, 0, "C.3.0", None, None),
+    ("Second Home", 1, 350000, 15, 7, 2400, 900, 0, "C.10.6", None, None),
+    ("Primary Residence", 1, 900000.5, 30, 6.125, 3600.5, 1200, 250.25, "C.3.0", "06037", 700),
+    ("Investment Property", 2, 1200000, 30, 7.25, 9000, 2400, 0, "HB.20.0", "06037", 780),
+    ("Primary Residence", 3, 1500000, 30, 6.875, 12000, 3000, 0, "HB.10.6", "36061", 640),
+]
+
+
+@pytest.fixture
+def scenario_file(tmp_path):
+    path = tmp_path / "scenarios.csv"
+    pd.DataFrame(ROWS, columns=[*SCENARIO_COLUMNS, "fips", "credit_score"]).to_csv(path, index=False)
+    return path
+
+
+def expected_results():
+    columns = {name: [row[i] for row in ROWS] for i, name in enumerate([*SCENARIO_COLUMNS, "fips", "credit_score"])}
+    columns["fips"] = ["" if value is None else value for value in columns["fips"]]
+    columns["credit_score"] = [float("nan") if value is None else value for value in columns["credit_score"]]
+    return evaluate_scenarios({name: pd.Series(values).to_numpy() for name, values in columns.items()})
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_round_trip_in_small_chunks(tmp_path, scenario_file, suffix):
+    output = tmp_path / f"results{suffix}"
+    assert run_scenario_file(scenario_file, output, chunk_size=2) == len(ROWS)
+    results = pd.read_parquet(output) if suffix == ".parquet" else pd.read_csv(output, dtype={"fips": str})
+    expected = expected_results()
+
+    assert list(results.columns) == [*SCENARIO_COLUMNS, "fips", "credit_score", *RESULT_COLUMNS, *MORTGAGE_INSURANCE_COLUMNS]
+    assert results["price"].tolist() == [row[2] for row in ROWS]
+    for column in ("loan_amount", "total_monthly_payment", "monthly_mortgage_insurance"):
+        assert results[column].to_numpy() == pytest.approx(expected[column], nan_ok=True)
+    assert results["eligible"].tolist() == expected["eligible"].tolist()
+    assert [None if pd.isna(value) else value for value in results["next_formula"]] == expected["next_formula"].tolist()
+    assert results["monthly_mortgage_insurance"][:2].isna().all()  # no credit score, no rate
+    assert results["mortgage_insurance_unpriced"].tolist() == expected["mortgage_insurance_unpriced"].tolist()
+    assert results["total_monthly_payment"].notna().all()
+
+
+def test_parquet_schema_is_fixed(tmp_path, scenario_file):
+    import pyarrow.parquet as pq
+
+    assert main([str(scenario_file), str(tmp_path / "results.parquet"), "--chunk-size", "1"]) == 0
+    schema = pq.read_schema(tmp_path / "results.parquet")
+    assert str(schema.field("next_formula").type) == "string"
+    assert str(schema.field("fips").type) == "string"
+    assert str(schema.field("price").type) == "double"
+    assert str(schema.field("units").type) == "int64"
+    assert str(schema.field("eligible").type) == "bool"
@@ -0,0 +1,63 @@
+import os
+import re
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from loan_engine.county_limits import county_loan_limits  # noqa: E402
+from loan_engine.rules import loan_limits  # noqa: E402
+
+HEADER = "# sample\nfips,state,county,one_unit,two_unit,three_unit,four_unit\n"
+
+
+def write_csv(path, one_unit):
+    path.write_text(HEADER + f"06075,CA,San Francisco,{one_unit},1548975,1872225,2326875\n", encoding="utf-8")
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "limits.csv"
+    write_csv(path, 1100000)
+    yield path
+    county_loan_limits.cache_clear()
+
+
+def test_county_lookup_falls_back_to_national_limits(csv_path):
+    limits = county_loan_limits(csv_path)
+    assert limits.limits("06075", 1) == {"conforming": loan_limits[1]["conforming"], "high_balance": 1100000}
+    assert limits.limits("", 2) == loan_limits[2]  # no county: national limits
+    assert limits.limits("01001", 4) == loan_limits[4]  # county not listed
+
+    conforming, high_balance = limits.unit_limits_many(np.array(["06075", "", "01001", "06075"]), np.array([1, 1, 3, 2]))
+    assert conforming.tolist() == [loan_limits[units]["conforming"] for units in (1, 1, 3, 2)]
+    assert high_balance.tolist() == [1100000, loan_limits[1]["high_balance"], loan_limits[3]["high_balance"], 1548975]
+    assert limits.unit_limits_many(np.array([6075]), np.array([1]))[1].tolist() == [1100000]
+
+
+def test_compiled_table_is_rebuilt_when_csv_is_newer(csv_path):
+    assert county_loan_limits(csv_path).limits("06075", 1)["high_balance"] == 1100000
+    compiled = csv_path.with_suffix(".npy")
+    assert compiled.exists()
+
+    write_csv(csv_path, 1150000)
+    stat = compiled.stat()
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    county_loan_limits.cache_clear()
+    assert county_loan_limits(csv_path).limits("06075", 1)["high_balance"] == 1150000
+    assert np.load(compiled)[6075, 0] == 1150000
+
+
+@pytest.mark.parametrize("fips, units, message", [
+    (["06075", "06075"], [1, 5], "unit count 5 is not one of 1, 2, 3, 4"),
+    ([6075], [0], "unit count 0"),
+    ([123456], [1], "FIPS code 123456 is outside 0-99999"),
+    ([-1], [1], "FIPS code -1 is outside"),
+    (["6037x"], [1], "FIPS code '6037x' is not a number"),
+])
+def test_lookups_outside_the_table_are_rejected(csv_path, fips, units, message):
+    limits = county_loan_limits(csv_path)
+    with pytest.raises(ValueError, match=re.escape(message)):
+        limits.unit_limits_many(np.array(fips), np.array(units))
+    with pytest.raises(ValueError, match=re.escape(message)):
+        limits.limits(fips[-1], units[-1])
@@ -0,0 +1,58 @@
+import math
+
+import pytest
+
+import loan_engine as engine
+
+np = pytest.importorskip("numpy")
+dti = pytest.importorskip("loan_engine.dti")
+
+LEADS = {
+    "income": np.array([6500.0, 21000.0, 900.0, 45000.0]),
+    "debts": np.array([[450.0, 120.0], [2200.0, np.nan], [800.0, 0.0], [0.0, 0.0]]),
+    "units": np.array([1, 3, 1, 2]),
+    "term": np.array([30.0, 15.0, 30.0, 30.0]),
+    "rate": np.array([6.875, 5.5, 7.25, 0.0]),
+    "tax": np.array([4800.0, 15000.0, 1200.0, 22000.0]),
+    "insurance": np.array([1500.0, 3600.0, 600.0, 4000.0]),
+    "flood": np.array([0.0, 900.0, 0.0, 0.0]),
+    "price": np.array([310000.0, 1400000.0, 150000.0, 2100000.0]),
+    "formula": np.array(["C.3.3", "HB.10.6", "C.5.0", "HB.25.9"]),
+}
+
+
+# Every cell of the (leads x formulas) matrix equals the scalar solver; None from the scalar is NaN in the batch
+def test_max_qualifying_prices_match_scalar():
+    prices = dti.max_qualifying_prices(LEADS["income"], LEADS["debts"], LEADS["term"], LEADS["rate"], LEADS["tax"], LEADS["insurance"],
+                                       LEADS["flood"], LEADS["units"])
+    debts = np.nansum(LEADS["debts"], axis=1)
+    for lead in range(len(debts)):
+        for column, formula in enumerate(engine.loan_formulas):
+            expected = engine.max_qualifying_price(LEADS["income"][lead], debts[lead], LEADS["term"][lead], LEADS["rate"][lead], formula,
+                                                   LEADS["tax"][lead], LEADS["insurance"][lead], LEADS["flood"][lead], int(LEADS["units"][lead]))
+            if expected is None:
+                assert math.isnan(prices[lead, column])
+            else:
+                assert prices[lead, column] == pytest.approx(expected, rel=1e-12)
+
+
+def test_qualify_leads_ratios_and_best_formula():
+    result = dti.qualify_leads(LEADS)
+    debts = np.nansum(LEADS["debts"], axis=1)
+    for lead in range(len(debts)):
+        front_end, back_end = engine.dti_ratios(LEADS["income"][lead], result["total_monthly_payment"][lead], debts[lead])
+        assert result["front_end"][lead] == pytest.approx(front_end)
+        assert result["back_end"][lead] == pytest.approx(back_end)
+        assert result["qualifies"][lead] == (front_end <= 28 and back_end <= 36)
+    assert result["best_formula"][2] is None  # debts use up the whole back-end allowance
+    assert result["best_price"][3] == max(result[f"max_price_{key.split(' ')[0]}"][3] for key in engine.loan_formulas)
+
+
+def test_run_lead_file(tmp_path):
+    pd = pytest.importorskip("pandas")
+    leads = pd.DataFrame({column: LEADS[column] for column in dti.LEAD_COLUMNS if column != "debts"}).assign(debts=np.nansum(LEADS["debts"], axis=1))
+    leads.to_csv(tmp_path / "leads.csv", index=False)
+    assert dti.run_lead_file(tmp_path / "leads.csv", tmp_path / "out.csv", chunk_size=3) == 4
+    out = pd.read_csv(tmp_path / "out.csv")
+    assert list(out.columns[:len(leads.columns)]) == list(leads.columns)
+    assert out["max_payment"].tolist() == pytest.approx(dti.max_qualifying_payment_batch(leads["income"], leads["debts"]).tolist())
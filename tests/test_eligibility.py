@@ -0,0 +1,70 @@
+import math
+import random
+
+import pytest
+
+from loan_engine.core import eligible_formulas, next_formula
+from loan_engine.eligibility import FormulaPriceIndex, NextFormulaIndex, PriceIndex
+from loan_engine.formulas import formula_records
+from loan_engine.rules import affordability_loan_formulas, conforming_loan_limit, loan_formulas, loan_limits, ltv_limits
+
+SELECTED = (None, *loan_formulas)
+
+
+# Each value and its float neighbours, where an off-by-one-ulp index would disagree with the scan
+def around(values):
+    return sorted({probe for value in values for probe in (math.nextafter(value, -math.inf), value, math.nextafter(value, math.inf))})
+
+
+# Every limit / factor price boundary of the tables plus seeded random prices between and beyond them
+def probe_prices(limits, loan_formulas):
+    edges = [limit / formula.loan_factor * scale for limit in limits for formula in formula_records(loan_formulas).values()
+             for scale in (1.0, formula.concession_factor)]
+    rng = random.Random(3)
+    return around(edges) + [rng.uniform(0.0, 2.0 * max(edges)) for _ in range(500)] + [0.0, 1e12]
+
+
+def test_price_index_matches_linear_scan():
+    rng = random.Random(7)
+    bounds = [(f"f{i}", rng.choice([-math.inf, rng.uniform(0, 500)]), rng.choice([math.inf, rng.uniform(500, 1000)])) for i in range(12)]
+    index = PriceIndex(bounds)
+    for price in around([edge for _, floor, ceiling in bounds for edge in (floor, ceiling) if math.isfinite(edge)]) + [-1.0, 750.0, 2000.0]:
+        assert index.lookup(price) == tuple(name for name, floor, ceiling in bounds if floor < price <= ceiling), price
+
+
+def test_eligibility_index_matches_linear_scan():
+    index = FormulaPriceIndex()
+    prices = probe_prices([conforming_loan_limit], affordability_loan_formulas)
+    for occupancy_type in [*ltv_limits, "Vacation Rental"]:
+        for num_units in (1, 2, 3, 4):
+            assert index.eligible_formulas_many(prices, occupancy_type, num_units) == [
+                tuple(eligible_formulas(price, occupancy_type, num_units)) for price in prices], (occupancy_type, num_units)
+
+
+@pytest.mark.parametrize("num_units", sorted(loan_limits))
+def test_next_formula_index_matches_linear_scan(num_units):
+    index = NextFormulaIndex()
+    limits = loan_limits[num_units]
+    windows = {"conforming": ("C", None, limits["conforming"]), "high_balance": ("HB", limits["conforming"], limits["high_balance"]),
+               "max_loan_limit": (None, None, limits["high_balance"])}
+    for price in probe_prices([limits["conforming"], limits["high_balance"]], loan_formulas):
+        for rule, (program, min_loan_amount, max_loan_amount) in windows.items():
+            for selected in SELECTED:
+                expected = next_formula(price, selected, max_loan_amount, min_loan_amount, program=program)
+                assert index.next_formula(price, selected, num_units, rule) == expected, (price, rule, selected)
+
+
+def test_evaluate_scenario_uses_the_tables_passed_in():
+    from loan_engine.core import evaluate_scenario
+
+    limits = {units: {name: limit * 0.6 for name, limit in unit_limits.items()} for units, unit_limits in loan_limits.items()}
+    index = NextFormulaIndex(loan_formulas, limits)
+    rng = random.Random(5)
+    suggestions = []
+    for _ in range(300):
+        scenario = {"occupancy": "Primary Residence", "units": rng.randint(1, 4), "price": round(rng.uniform(100000.0, 2500000.0), 2),
+                    "term": 30, "rate": 6.5, "formula": rng.choice(list(loan_formulas))}
+        result = evaluate_scenario(scenario, loan_limits=limits)
+        assert result == evaluate_scenario(scenario, loan_limits=limits, index=index)
+        suggestions.append(result["next_formula"])
+    assert any(suggestions)
@@ -0,0 +1,47 @@
+from itertools import product
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from loan_engine.core import calculate_formula_loan  # noqa: E402
+from loan_engine.fixed_point import (CENTS_COLUMNS, calculate_formula_loan_cents, calculate_formula_loan_cents_batch,  # noqa: E402
+                                     div_round, reconciliation_report, to_cents)
+from loan_engine.rules import affordability_loan_formulas  # noqa: E402
+
+ROWS = list(product((50000.0, 318750.0, 806500.0, 444444.44), (0.0, 5.625, 7.999), (15, 30), list(affordability_loan_formulas), (0.0, 1234.56)))
+
+
+def columns():
+    return [np.array(column) for column in zip(*ROWS)]
+
+
+def test_half_up_rounding():
+    assert to_cents(0.145) == 15 and to_cents(2.675) == 268 and to_cents(0.0) == 0
+    assert div_round(5, 2) == 3 and div_round(7, 2) == 4 and div_round(4, 3) == 1
+    np.testing.assert_array_equal(div_round(np.array([5, 7, 4]), np.array([2, 2, 3])), [3, 4, 1])
+
+
+def test_cents_add_up_and_batch_matches_scalar():
+    batch = calculate_formula_loan_cents_batch(*columns(), 1800.0, 700.0)
+    for i, row in enumerate(ROWS):
+        cents = calculate_formula_loan_cents(*row, 1800.0, 700.0)
+        assert all(isinstance(value, int) for value in cents)
+        assert [int(batch[column][i]) for column in CENTS_COLUMNS] == list(cents), row
+        total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment, *escrow = cents
+        assert cash_to_close == total_sale_price - loan_amount
+        assert total_monthly_payment == monthly_payment + sum(escrow)
+
+
+def test_reconciliation_report_counts_cent_differences():
+    report = reconciliation_report(*columns(), 1800.0, 700.0)
+    assert report["rows"] == len(ROWS)
+    # the float paths never drift more than a cent from the fixed-point figures
+    assert all(stats["max_cents_diff"] <= 1 for path in ("float", "float_round") for stats in report[path].values())
+
+    expected = {column: 0 for column in CENTS_COLUMNS}
+    for row in ROWS:
+        rounded = calculate_formula_loan(*row, 1800.0, 700.0, round_cents=True)
+        for column, fixed, value in zip(CENTS_COLUMNS, calculate_formula_loan_cents(*row, 1800.0, 700.0), rounded):
+            expected[column] += fixed != to_cents(value)
+    assert {column: stats["mismatched"] for column, stats in report["float_round"].items()} == expected
@@ -0,0 +1,52 @@
+import pytest
+
+from loan_engine import core, formulas
+from loan_engine.core import formula_lookup
+from loan_engine.formulas import Formula, TableCache, formula_records, register_formulas
+from loan_engine.rule_config import FORMULA_TABLES
+from loan_engine.rules import loan_formulas, startup_rules
+
+
+# A formula key parses into its code and program, and the record and its FORMULA_DTYPE row carry the same values
+def test_formula_string_round_trips_through_record_and_dtype():
+    np = pytest.importorskip("numpy")
+    from loan_engine.batch import FORMULA_DTYPE, formula_table
+
+    rows, array = formula_table(loan_formulas)
+    assert list(rows) == list(loan_formulas)
+    lookup = formula_lookup(loan_formulas)
+    for key, values in loan_formulas.items():
+        record = Formula(key, values)
+        assert record.label == key and key.startswith(record.code + " ") and record.code.startswith(record.program + ".")
+        assert lookup[record.code] == key
+        row = array[rows[key]]
+        for field in FORMULA_DTYPE.names:
+            assert row[field] == getattr(record, field), (key, field)
+        assert row["down_payment_pct"] * 100 == pytest.approx(values["down_payment"])
+        assert row["seller_concession_pct"] * 100 == pytest.approx(values["seller_concession"])
+    assert array.dtype == FORMULA_DTYPE and np.count_nonzero(array["is_conforming"] & array["is_high_balance"]) == 0
+
+
+# Each reload replaces the registered tables of the version it supersedes instead of adding to them
+def test_reloads_do_not_grow_the_formula_caches(monkeypatch):
+    monkeypatch.setattr(formulas, "_registered", {})
+    for _ in range(20):
+        reloaded = {name: {key: dict(values) for key, values in startup_rules[name].items()} for name in FORMULA_TABLES}
+        for name in FORMULA_TABLES:
+            assert register_formulas(reloaded[name], name) is formula_records(reloaded[name])
+            formula_lookup(reloaded[name])
+    assert len(formulas._registered) == len(FORMULA_TABLES)
+    assert formula_records(reloaded["loan_formulas"]) is formulas._registered["loan_formulas"][1]
+    assert len(core._formula_lookups) <= core._formula_lookups.maxsize
+
+
+def test_table_cache_keeps_the_most_recent_tables():
+    built = []
+    cache = TableCache(lambda table: built.append(table) or len(built), maxsize=2)
+    first, second, third = {}, {}, {}
+    assert cache(first) == 1 and cache(first) == 1
+    cache(second)
+    cache(first)  # a hit makes first the most recent again
+    cache(third)
+    assert len(cache) == 2 and cache(first) == 1
+    assert cache(second) == 4  # dropped, so built again
@@ -0,0 +1,51 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import loan_engine as engine
+
+GOLDEN_DIR = Path(__file__).resolve().parent / "golden"
+VERSIONS = sorted(path.stem for path in GOLDEN_DIR.glob("*.json"))
+
+
+def golden(version):
+    return json.loads((GOLDEN_DIR / f"{version}.json").read_text(encoding="utf-8"))
+
+
+def test_every_version_has_golden_outputs():
+    assert VERSIONS == sorted(engine.rule_set_versions)
+
+
+# Each rule set reproduces its legacy pages' calculate_loan exactly; five-value variants are the first five fields
+@pytest.mark.parametrize("version", VERSIONS)
+def test_calculate_matches_legacy_pages(version):
+    rules = engine.ruleset(version)
+    for price, rate, term, formula, tax, insurance, flood, expected in golden(version)["calculate"]:
+        result = rules.calculate(price, rate, term, formula, tax, insurance, flood)
+        assert list(result[:len(expected)]) == expected, (version, price, rate, term, formula)
+
+
+@pytest.mark.parametrize("version", [version for version in VERSIONS if "eligible_formulas" in golden(version)])
+def test_eligible_formulas_match_legacy_pages(version):
+    rules = engine.ruleset(version)
+    for price, occupancy_type, num_units, expected in golden(version)["eligible_formulas"]:
+        assert list(rules.eligible_formulas(price, occupancy_type, num_units)) == expected, (version, price, occupancy_type, num_units)
+
+
+def test_ruleset_is_shared_per_process():
+    assert engine.ruleset("affordability") is engine.ruleset("affordability")
+    assert engine.ruleset() is engine.ruleset("calculator")
+    assert engine.ruleset("affordability").eligibility_index is engine.eligibility_index()
+    assert engine.ruleset("calculator").next_formula_index is engine.next_formula_index()
+
+
+def test_formula_codes_resolve_to_labels():
+    rules = engine.ruleset("calculator")
+    label = next(key for key in engine.loan_formulas if key.startswith("C.10.6"))
+    assert rules.calculate(500000.0, 6.5, 30, "C.10.6") == rules.calculate(500000.0, 6.5, 30, label)
+
+
+def test_unknown_version():
+    with pytest.raises(ValueError, match="unknown rule-set version"):
+        engine.ruleset("nope")
@@ -0,0 +1,49 @@
+import pytest
+
+from loan_engine.core import calculate_loan
+from loan_engine.graph import DependencyGraph
+from loan_engine.rules import loan_limits
+
+INPUTS = {"purchase_price": 807000.0, "seller_concession_pct": 0.03, "down_payment_pct": 0.1, "loan_term": 30.0, "interest_rate": 5.625,
+          "property_tax": 3600.0, "home_insurance": 1200.0, "flood_insurance": 0.0, "formula": "C.10.6", "num_units": 1,
+          "occupancy_type": "Primary Residence", "loan_limits": loan_limits}
+ALL_NODES = ["sale_price", "loan_amount", "principal_interest", "escrow", "total_payment", "eligibility"]
+
+
+def test_first_run_computes_every_node_and_matches_calculate_loan():
+    graph = DependencyGraph(state={})
+    values = graph.evaluate(**INPUTS)
+    assert graph.trace == ALL_NODES
+    expected = calculate_loan(*(INPUTS[name] for name in ("purchase_price", "loan_term", "interest_rate", "down_payment_pct",
+                                                          "seller_concession_pct", "property_tax", "home_insurance", "flood_insurance")))
+    assert [values[name] for name in ("total_sale_price", "loan_amount", "cash_to_close", "monthly_payment", "total_monthly_payment")] == list(expected)
+
+
+@pytest.mark.parametrize("change, trace", [
+    ({}, []),
+    ({"property_tax": 4800.0}, ["escrow", "total_payment"]),
+    ({"interest_rate": 6.0}, ["principal_interest", "total_payment"]),
+    ({"occupancy_type": "Second Home"}, ["eligibility"]),
+    ({"down_payment_pct": 0.2}, ["loan_amount", "principal_interest", "total_payment", "eligibility"]),
+    ({"purchase_price": 900000.0}, ["sale_price", "loan_amount", "principal_interest", "total_payment", "eligibility"]),
+])
+def test_rerun_recomputes_only_downstream_nodes(change, trace):
+    state = {}
+    DependencyGraph(state=state).evaluate(**INPUTS)
+    graph = DependencyGraph(state=state)  # a page rerun builds a new graph over the same session state
+    values = graph.evaluate(**dict(INPUTS, **change))
+    assert graph.trace == trace
+    assert values == DependencyGraph(state={}).evaluate(**dict(INPUTS, **change))
+
+
+def test_unchanged_output_stops_propagation():
+    graph = DependencyGraph(state={})
+    graph.evaluate(**dict(INPUTS, purchase_price=970000.0, seller_concession_pct=0.03))
+    # same total sale price: the loan amount and payment nodes are skipped, the concession check still runs
+    graph.evaluate(**dict(INPUTS, purchase_price=950000.0, seller_concession_pct=0.05))
+    assert graph.trace == ["sale_price", "eligibility"]
+
+
+def test_missing_inputs_are_reported():
+    with pytest.raises(ValueError, match="missing graph input"):
+        DependencyGraph(state={}).evaluate(purchase_price=1.0)
@@ -0,0 +1,69 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from loan_engine.mortgage_insurance import mortgage_insurance_rates  # noqa: E402
+from loan_engine.scenarios import evaluate_scenarios, rank_formulas  # noqa: E402
+
+
+def test_rate_card_bands():
+    rates = mortgage_insurance_rates()
+    ltv = [80.0, 80.01, 85.0, 90.0, (1 - 0.05) * 100, (1 - 0.03) * 100, 97.01]
+    annual = rates.annual_rates(ltv, [760, 760, 700, 740, 850, 620, 760])
+    assert annual[0] == 0.0  # 80% LTV or less carries no MI
+    assert annual[1] == 0.19  # 80.01% rounds up into the 80-85 band at 12% coverage
+    assert annual[2] == 0.35
+    assert annual[3] == 0.39
+    assert annual[4] == 0.44
+    assert annual[5] == 2.09
+    assert math.isnan(annual[6])  # above the card
+    assert math.isnan(rates.annual_rates(95.0, 619))  # below the lowest score band
+    assert list(rates.annual_rates(85.0, 760, [6, 12, 25])[:2]) == [0.14, 0.19]
+    assert rates.premium(400000.0, 97.0, 700) == pytest.approx(400000.0 * 1.07 / 100 / 12)
+    assert rates.premium(400000.0, 97.0, 500) is None
+
+
+def test_scenarios_add_mortgage_insurance_to_total():
+    scenarios = {
+        "occupancy": np.array(["Primary Residence"] * 3), "units": np.array([1, 1, 1]), "price": np.array([400000.0] * 3),
+        "term": np.array([30.0] * 3), "rate": np.array([6.5] * 3), "tax": np.array([3600.0] * 3), "insurance": np.array([1200.0] * 3),
+        "flood": np.zeros(3), "formula": np.array(["C.3.0", "C.20.0", "C.10.0"]),
+    }
+    base = evaluate_scenarios(scenarios)
+    with_mi = evaluate_scenarios(dict(scenarios, credit_score=np.array([720, 720, 680])))
+    expected = mortgage_insurance_rates().monthly_premium(base["loan_amount"], base["ltv"], [720, 720, 680])
+    assert "monthly_mortgage_insurance" not in base
+    assert with_mi["monthly_mortgage_insurance"].tolist() == expected.tolist()
+    assert with_mi["monthly_mortgage_insurance"][1] == 0.0  # 80% LTV
+    assert with_mi["total_monthly_payment"].tolist() == (base["total_monthly_payment"] + expected).tolist()
+
+    ranking = rank_formulas({"occupancy": "Primary Residence", "units": 1, "price": 400000.0, "term": 30, "rate": 6.5, "credit_score": 700},
+                            sort_by="total_monthly_payment")
+    assert "monthly_mortgage_insurance" in ranking
+    assert (ranking["monthly_mortgage_insurance"][ranking["ltv"] <= 80] == 0).all()
+
+
+@pytest.mark.parametrize("credit_score", [float("nan"), 600])
+def test_unpriced_mortgage_insurance_stays_out_of_the_total(credit_score):
+    scenarios = {
+        "occupancy": np.array(["Primary Residence"] * 2), "units": np.array([1, 1]), "price": np.array([400000.0] * 2),
+        "term": np.array([30.0] * 2), "rate": np.array([6.5] * 2), "tax": np.array([3600.0] * 2), "insurance": np.array([1200.0] * 2),
+        "flood": np.zeros(2), "formula": np.array(["C.20.0", "C.5.0"]),  # LTV 80 and 95
+    }
+    base = evaluate_scenarios(scenarios)
+    with_mi = evaluate_scenarios(dict(scenarios, credit_score=np.array([credit_score] * 2)))
+    assert base["ltv"].tolist() == pytest.approx([80.0, 95.0])
+    assert with_mi["monthly_mortgage_insurance"][0] == 0.0
+    assert math.isnan(with_mi["monthly_mortgage_insurance"][1])
+    assert with_mi["mortgage_insurance_unpriced"].tolist() == [False, True]
+    assert with_mi["total_monthly_payment"].tolist() == base["total_monthly_payment"].tolist()
+
+
+def test_rank_formulas_with_a_low_score_keeps_totals():
+    ranking = rank_formulas({"occupancy": "Primary Residence", "units": 1, "price": 400000.0, "term": 30, "rate": 6.5, "credit_score": 600},
+                            sort_by="total_monthly_payment")
+    assert np.isfinite(ranking["total_monthly_payment"]).all()
+    assert (ranking["mortgage_insurance_unpriced"] == (ranking["ltv"] > 80)).all()
+    assert (ranking["monthly_mortgage_insurance"][ranking["ltv"] <= 80] == 0).all()
@@ -0,0 +1,37 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from loan_engine.parallel import evaluate_scenarios_parallel  # noqa: E402
+from loan_engine.rules import loan_formulas, loan_limits, ltv_limits  # noqa: E402
+from loan_engine.scenarios import evaluate_scenarios  # noqa: E402
+
+
+def random_scenarios(count, seed=17):
+    rng = np.random.default_rng(seed)
+    return {
+        "occupancy": rng.choice(list(ltv_limits), count), "units": rng.integers(1, 5, count),
+        "price": rng.uniform(50000.0, 2500000.0, count).round(2), "term": rng.choice([15.0, 30.0], count),
+        "rate": rng.uniform(0.0, 9.0, count).round(3), "tax": rng.uniform(0.0, 12000.0, count).round(2),
+        "insurance": rng.uniform(0.0, 4000.0, count).round(2), "flood": np.zeros(count),
+        "formula": rng.choice(list(loan_formulas), count), "credit_score": rng.integers(580, 820, count),
+    }
+
+
+# The default path ships the rule tables to each worker through the pool initializer
+@pytest.mark.parametrize("scale", [1.0, 0.6])
+def test_parallel_matches_serial(scale):
+    limits = loan_limits if scale == 1.0 else {units: {name: limit * scale for name, limit in unit_limits.items()}
+                                               for units, unit_limits in loan_limits.items()}
+    scenarios = random_scenarios(2000)
+    expected = evaluate_scenarios(scenarios, loan_limits=limits)
+    result = evaluate_scenarios_parallel(scenarios, chunk_size=300, max_workers=2, loan_limits=limits)
+    assert list(result) == list(expected)
+    for column in expected:
+        np.testing.assert_array_equal(result[column], expected[column], err_msg=column)
+
+
+def test_parallel_with_no_rows():
+    scenarios = {column: values[:0] for column, values in random_scenarios(1).items()}
+    result = evaluate_scenarios_parallel(scenarios, max_workers=2)
+    assert all(len(values) == 0 for values in result.values())
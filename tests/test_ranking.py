@@ -0,0 +1,49 @@
+from itertools import product
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from loan_engine.core import evaluate_scenario  # noqa: E402
+from loan_engine.formulas import formula_records  # noqa: E402
+from loan_engine.rules import loan_formulas, ltv_limits  # noqa: E402
+from loan_engine.scenarios import RANKING_KEYS, rank_formulas  # noqa: E402
+
+CHECKS = ("exceeds_conforming_limit", "outside_high_balance_range", "exceeds_max_loan_limit", "occupancy_ltv_not_allowed",
+          "seller_concession_exceeded")
+SCENARIOS = [
+    {"occupancy": occupancy_type, "units": num_units, "price": price, "term": 30, "rate": 6.875, "tax": 4800.0, "insurance": 1500.0}
+    for occupancy_type, num_units, price in product(list(ltv_limits), (1, 2, 4), (300000.0, 850000.0, 1400000.0))
+]
+
+
+# Expected ranking from the scalar evaluate_scenario: eligible first, then sort_by ascending, ties in table order
+def scalar_ranking(scenario, sort_by):
+    rows = []
+    for position, (key, record) in enumerate(formula_records(loan_formulas).items()):
+        result = evaluate_scenario(dict(scenario, formula=key))
+        ltv_not_allowed = record.max_ltv > ltv_limits[scenario["occupancy"]].get(scenario["units"], 0)
+        rows.append((not (result["eligible"] and not ltv_not_allowed), result[sort_by], position, key, result))
+    return sorted(rows, key=lambda row: row[:3])
+
+
+@pytest.mark.parametrize("sort_by", RANKING_KEYS)
+def test_ranking_matches_scalar_evaluation(sort_by):
+    for scenario in SCENARIOS:
+        ranking = rank_formulas(scenario, sort_by=sort_by)
+        expected = scalar_ranking(scenario, sort_by)
+        assert ranking["formula"].tolist() == [row[3] for row in expected], scenario
+        assert ranking["eligible"].tolist() == [not row[0] for row in expected], scenario
+        for i, (_, _, _, _, result) in enumerate(expected):
+            for column in CHECKS:
+                assert ranking[column][i] == result[column], (scenario, result["formula"], column)
+            for column in ("loan_amount", "cash_to_close", "total_monthly_payment", "ltv"):
+                assert ranking[column][i] == pytest.approx(result[column], abs=0.005), (scenario, result["formula"], column)
+
+
+# The scenarios mix eligible and ineligible formulas and trip every check, so order and flags are both exercised
+def test_scenarios_cover_every_check():
+    rankings = [rank_formulas(scenario) for scenario in SCENARIOS]
+    assert any(ranking["eligible"].any() and not ranking["eligible"].all() for ranking in rankings)
+    for column in CHECKS + ("ltv_not_allowed",):
+        assert any(ranking[column].any() for ranking in rankings), column
@@ -0,0 +1,65 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+refinance = pytest.importorskip("loan_engine.refinance")
+
+from loan_engine.amortization import monthly_payment  # noqa: E402
+
+SCENARIOS = refinance.refinance_grid([5.0, 6.0, 7.5], [15, 30], [0.0, 1.0], [0.0, 3000.0])
+BALANCE = np.array([300000.0, 150000.0, 50000.0])
+RATE = np.array([7.25, 4.0, 0.0])
+REMAINING = np.array([330, 120, 60])
+
+
+# Month-by-month cash flows of keeping the loan vs refinancing, discounted, plus the payoff difference at the horizon
+def simulated_npv(balance, rate, remaining, new_rate, new_term, points, fees, discount_rate, horizon):
+    old_payment = monthly_payment(balance, remaining / 12, rate)
+    new_months = int(new_term * 12)
+    new_payment = monthly_payment(balance, new_term, new_rate)
+    monthly_discount = discount_rate / 1200
+    end = max(remaining, new_months) if horizon is None else horizon
+    npv = -(balance * points / 100 + fees)
+    old_balance = new_balance = balance
+    for month in range(1, end + 1):
+        npv += ((old_payment if month <= remaining else 0) - (new_payment if month <= new_months else 0)) / (1 + monthly_discount) ** month
+        if month <= remaining:
+            old_balance = old_balance * (1 + rate / 1200) - old_payment
+        if month <= new_months:
+            new_balance = new_balance * (1 + new_rate / 1200) - new_payment
+    owed = (old_balance if end < remaining else 0) - (new_balance if end < new_months else 0)
+    return npv + owed / (1 + monthly_discount) ** end
+
+
+@pytest.mark.parametrize("horizon", [None, 84])
+def test_analysis_matches_month_by_month_cash_flows(horizon):
+    analysis = refinance.analyze_refinance(BALANCE, RATE, REMAINING, SCENARIOS, discount_rate=5.0, horizon=horizon)
+    for loan in range(len(BALANCE)):
+        for scenario in range(len(SCENARIOS["new_rate"])):
+            fields = [SCENARIOS[field][scenario] for field in refinance.SCENARIO_FIELDS]
+            expected = simulated_npv(BALANCE[loan], RATE[loan], int(REMAINING[loan]), *fields, 5.0, horizon)
+            assert analysis["npv"][loan, scenario] == pytest.approx(expected, rel=1e-9, abs=1e-6)
+            savings = analysis["monthly_savings"][loan, scenario]
+            if savings > 0:
+                assert analysis["break_even_month"][loan, scenario] == math.ceil(analysis["closing_costs"][loan, scenario] / savings)
+            else:
+                assert math.isnan(analysis["break_even_month"][loan, scenario])
+
+
+def test_portfolio_file_in_small_blocks(tmp_path):
+    pd = pytest.importorskip("pandas")
+    rng = np.random.default_rng(7)
+    book = pd.DataFrame({"loan_id": [f"L{i}" for i in range(500)], "balance": rng.uniform(5e4, 1e6, 500),
+                         "rate": rng.uniform(3, 8, 500), "remaining_term": rng.integers(12, 361, 500)})
+    book.to_csv(tmp_path / "book.csv", index=False)
+    max_bytes = len(SCENARIOS["new_rate"]) * refinance.WORK_ARRAYS * 8 * 64  # 64 loans per block
+    # Discounting at a scenario's own note rate makes its 15- and 30-year NPVs tie, so use a rate off the grid
+    assert refinance.run_portfolio_file(tmp_path / "book.csv", tmp_path / "out.csv", SCENARIOS, discount_rate=4.5, max_bytes=max_bytes) == 500
+
+    out = pd.read_csv(tmp_path / "out.csv", dtype={"loan_id": str})
+    expected = refinance.best_refinance(refinance.analyze_refinance(book["balance"], book["rate"], book["remaining_term"], SCENARIOS, 4.5),
+                                        SCENARIOS)
+    assert out["loan_id"].tolist() == book["loan_id"].tolist()
+    assert out["best_scenario"].tolist() == expected["best_scenario"].tolist()
+    assert out["npv"].to_numpy() == pytest.approx(expected["npv"])
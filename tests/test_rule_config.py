@@ -0,0 +1,77 @@
+import json
+import os
+import re
+
+import pytest
+
+from loan_engine import rules as startup
+from loan_engine.rule_config import DEFAULT_RULES_PATH, RuleConfigError, RuleWatcher, compile_rules, load_rules
+from loan_engine.rulesets import ruleset, use_rules
+
+
+def config():
+    return json.loads(DEFAULT_RULES_PATH.read_text(encoding="utf-8"))
+
+
+def test_shipped_file_compiles_to_engine_tables():
+    rules = load_rules(DEFAULT_RULES_PATH)
+    assert rules["loan_limits"] == startup.loan_limits
+    assert list(rules["loan_limits"]) == [1, 2, 3, 4]
+    assert rules["ltv_limits"]["Second Home"] == {1: 90}
+    assert rules["conforming_loan_limit"] == rules["loan_limits"][1]["conforming"] == 806500
+    assert rules["mortgage_insurance_coverage"] == {85: 12, 90: 25, 95: 30, 97: 35}
+
+
+@pytest.mark.parametrize("edit, message", [
+    (lambda c: c.pop("ltv_limits"), "missing table(s) ltv_limits"),
+    (lambda c: c["loan_limits"]["2"].update(high_balance=1), "loan_limits.2.high_balance"),
+    (lambda c: c["loan_limits"].update({"5": c["loan_limits"]["1"]}), "outside 1-4"),
+    (lambda c: c["loan_limits"].pop("3"), "loan_limits: limits for 3 unit(s) are required"),
+    (lambda c: c["affordability_loan_formulas"]["C.3.0"].update(down_payment="3"), "expected a number"),
+    (lambda c: c["legacy_loan_formulas"].update({"X.1.0": {"down_payment": 1, "seller_concession": 0, "max_ltv": 99}}), "program code"),
+    (lambda c: c["dti_limits"].update(front_end=40), "front_end must not exceed back_end"),
+])
+def test_invalid_config_is_rejected(edit, message):
+    broken = config()
+    edit(broken)
+    with pytest.raises(RuleConfigError, match=re.escape(message)):
+        compile_rules(broken)
+
+
+# high_balance_loan_limit was never read (per-unit loan_limits carry the high-balance limits); older files still load
+def test_retired_table_is_ignored(caplog):
+    older = dict(config(), high_balance_loan_limit=1000000)
+    assert compile_rules(older) == compile_rules(config())
+    assert "high_balance_loan_limit" not in compile_rules(older)
+    assert "ignoring retired table high_balance_loan_limit" in caplog.text
+    with pytest.raises(RuleConfigError, match="unknown table"):
+        compile_rules(dict(config(), max_loan_limit=1))
+
+
+def test_watcher_swaps_rule_sets_on_change(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(DEFAULT_RULES_PATH.read_text(encoding="utf-8"), encoding="utf-8")
+    watcher = RuleWatcher(path, use_rules)
+    before = ruleset("affordability")
+    try:
+        assert not watcher.check()  # unchanged file is not re-read
+
+        updated = config()
+        updated["loan_limits"]["1"]["conforming"] = 832750
+        path.write_text(json.dumps(updated), encoding="utf-8")
+        assert watcher.check()
+        after = ruleset("affordability")
+        assert after is not before and after is ruleset("affordability")
+        assert after.conforming_loan_limit == 832750
+        assert before.conforming_loan_limit == 806500  # a rerun already holding the old set keeps it
+        assert "C.3.0" in after.eligible_formulas(850000.0, "Primary Residence", 1)
+        assert "C.3.0" not in before.eligible_formulas(850000.0, "Primary Residence", 1)
+        assert after.calculate(500000.0, 6.5, 30, "C.10.6") == before.calculate(500000.0, 6.5, 30, "C.10.6")
+
+        path.write_text('{"loan_formulas": ', encoding="utf-8")  # half-written file
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        assert not watcher.check()
+        assert ruleset("affordability") is after
+    finally:
+        use_rules(startup.startup_rules)
@@ -0,0 +1,31 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from loan_engine.core import calculate_loan  # noqa: E402
+from loan_engine.rules import loan_formulas  # noqa: E402
+from loan_engine.sensitivity import grid_axis, rate_formula_grid, rate_price_grid  # noqa: E402
+
+RATES = grid_axis(5.0, 8.0, 7)
+PRICES = grid_axis(250000.0, 1250000.0, 5, 0)
+FORMULAS = list(loan_formulas)[:6]
+
+
+@pytest.mark.parametrize("column, index", [("loan_amount", 1), ("cash_to_close", 2), ("total_monthly_payment", 4)])
+def test_rate_price_grid_matches_scalar_calculation(column, index):
+    grid = rate_price_grid(RATES, PRICES, 30, 0.05, 0.03, 4800.0, 1500.0, 300.0, column=column)
+    assert grid.shape == (len(RATES), len(PRICES))
+    for i, rate in enumerate(RATES):
+        for j, price in enumerate(PRICES):
+            assert grid[i, j] == pytest.approx(calculate_loan(price, 30, rate, 0.05, 0.03, 4800.0, 1500.0, 300.0)[index], abs=0.005)
+
+
+def test_rate_formula_grid_matches_scalar_calculation():
+    grid = rate_formula_grid(RATES, FORMULAS, 600000.0, 15, 4800.0, 1500.0, 0.0)
+    assert grid.shape == (len(RATES), len(FORMULAS))
+    for i, rate in enumerate(RATES):
+        for j, formula in enumerate(FORMULAS):
+            down_payment_pct = loan_formulas[formula]["down_payment"] / 100
+            seller_concession_pct = loan_formulas[formula]["seller_concession"] / 100
+            expected = calculate_loan(600000.0, 15, rate, down_payment_pct, seller_concession_pct, 4800.0, 1500.0, 0.0)[4]
+            assert grid[i, j] == pytest.approx(expected, abs=0.005)
@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from loan_engine import max_seller_concession  # noqa: E402
+from loan_engine.rules import loan_formulas, loan_limits, ltv_limits  # noqa: E402
+from loan_engine import shared_tables  # noqa: E402
+from loan_engine.parallel import evaluate_chunks_parallel, shard_scenarios  # noqa: E402
+from loan_engine.scenarios import evaluate_scenarios, max_seller_concession_batch, rank_formulas  # noqa: E402
+from loan_engine.shared_tables import RuleTables, current_rule_tables, current_version, publish_rule_tables  # noqa: E402
+
+SCENARIOS = {
+    "occupancy": np.array(["Primary Residence", "Investment Property"]), "units": np.array([1, 2]), "price": np.array([400000.0, 900000.0]),
+    "term": np.array([30.0, 15.0]), "rate": np.array([6.5, 7.0]), "tax": np.array([3600.0, 9000.0]), "insurance": np.array([1200.0, 2400.0]),
+    "flood": np.zeros(2), "formula": np.array(["C.3.0", "HB.25.0"]), "credit_score": np.array([720, 760]),
+}
+
+
+def test_published_tables_match_rules(tmp_path):
+    version = publish_rule_tables(tmp_path)
+    assert publish_rule_tables(tmp_path) == version  # unchanged tables publish nothing new
+    tables = RuleTables.attach(tmp_path)
+    assert tables.loan_formulas == loan_formulas
+    assert tables.loan_limits == loan_limits
+    assert tables.ltv_limits == ltv_limits
+    assert all(not array.flags.writeable for array in tables.arrays.values())
+    for occupancy_type in ltv_limits:
+        for ltv in (80, 90, 95):
+            assert tables.max_seller_concession(occupancy_type, ltv) == max_seller_concession(occupancy_type, ltv)
+
+    shared = evaluate_scenarios(SCENARIOS, **tables.scenario_tables())
+    expected = evaluate_scenarios(SCENARIOS)
+    assert shared.keys() == expected.keys()
+    for column in expected:
+        np.testing.assert_array_equal(shared[column], expected[column])
+
+
+def test_new_version_is_picked_up_without_restart(tmp_path):
+    publish_rule_tables(tmp_path)
+    first = current_rule_tables(tmp_path)
+    assert current_rule_tables(tmp_path) is first
+
+    label = next(iter(loan_formulas))
+    changed = dict(loan_formulas, **{label: dict(loan_formulas[label], down_payment=3.5, max_ltv=96.5)})
+    version = publish_rule_tables(tmp_path, loan_formulas=changed)
+    assert current_version(tmp_path) == version != first.version
+    updated = current_rule_tables(tmp_path)
+    assert updated.version == version
+    assert updated.loan_formulas == changed
+    assert first.loan_formulas == loan_formulas  # processes still holding the old version keep reading it
+
+
+def test_engine_reads_the_published_concession_table(tmp_path):
+    publish_rule_tables(tmp_path)
+    tables = RuleTables.attach(tmp_path)
+    occupancy = np.array(["Primary Residence", "Second Home", "Investment Property", "Vacation Rental"] * 2)
+    ltv = np.repeat([85.0, 95.0], 4)
+    np.testing.assert_array_equal(max_seller_concession_batch(occupancy, ltv, tables.arrays["seller_concession"]),
+                                  max_seller_concession_batch(occupancy, ltv))
+    assert tables.scenario_tables()["seller_concession"] is tables.arrays["seller_concession"]
+
+    scenario = {"occupancy": "Second Home", "units": 1, "price": 500000.0, "term": 30, "rate": 6.5, "credit_score": 720}
+    shared, expected = rank_formulas(scenario, **tables.ranking_tables()), rank_formulas(scenario)
+    for column in expected:
+        np.testing.assert_array_equal(shared[column], expected[column])
+
+
+def test_pool_workers_price_against_published_tables(tmp_path):
+    publish_rule_tables(tmp_path)
+    scenarios = {column: np.tile(values, 3) for column, values in SCENARIOS.items()}
+    parts = list(evaluate_chunks_parallel(shard_scenarios(scenarios, 2), max_workers=2, tables_root=str(tmp_path)))
+    expected = evaluate_scenarios(scenarios)
+    for column in expected:
+        np.testing.assert_array_equal(np.concatenate([part[column] for part in parts]), expected[column])
+
+
+def test_calculator_page_ranks_against_published_tables(tmp_path, monkeypatch):
+    testing = pytest.importorskip("streamlit.testing.v1")
+    publish_rule_tables(tmp_path)
+    monkeypatch.setenv(shared_tables.ENV_VAR, str(tmp_path))
+    app = testing.AppTest.from_file(str(Path(__file__).resolve().parent.parent / "updated_loan_calculator_app.py"), default_timeout=60)
+    app.run()
+    app.toggle[0].set_value(True).run()
+    assert not app.exception
+    assert len(app.dataframe) == 1
+    assert shared_tables._attached[tmp_path].version == current_version(tmp_path)
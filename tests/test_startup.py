@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+# Pages must start without pandas/NumPy and within the import budget of benchmarks/check_startup.py
+def test_pages_start_within_import_budget():
+    pytest.importorskip("streamlit")
+    result = subprocess.run([sys.executable, str(REPO_ROOT / "benchmarks" / "check_startup.py")], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout
+
+
+# Profiling must not import the NumPy modules itself; it wraps them once the page has imported them
+def test_profiling_wraps_numpy_modules_lazily():
+    pytest.importorskip("numpy")
+    code = "\n".join([
+        "import sys",
+        "from loan_engine.instrumentation import page_profiler",
+        "page_profiler('page').finish()",
+        "print(sorted(name for name in ('numpy', 'pandas', 'loan_engine.scenarios', 'loan_engine.sensitivity') if name in sys.modules))",
+        "import loan_engine.sensitivity",  # imported by the page on an earlier rerun
+        "profiler = page_profiler('page')",
+        "from loan_engine.sensitivity import rate_price_grid",
+        "rate_price_grid([6.5], [400000.0], 30, 0.03, 0.0)",
+        "print([call['function'] for call in profiler.finish()['calls']])",
+    ])
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True,
+                            env={**os.environ, "LOAN_ENGINE_PROFILE": "log", "PYTHONPATH": str(REPO_ROOT)})
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == ["[]", "['rate_price_grid']"]
+
+
+# Instrumenting the engine happens on the profiler's clock, so the first "imports" lap includes it
+def test_instrumenting_counts_toward_the_imports_lap():
+    code = "\n".join([
+        "import time",
+        "from loan_engine import instrumentation",
+        "instrument_engine = instrumentation.instrument_engine",
+        "instrumentation.instrument_engine = lambda: (time.sleep(0.05), instrument_engine())",
+        "profiler = instrumentation.page_profiler('page')",
+        "profiler.checkpoint('imports')",
+        "print(profiler.finish()['sections'][0]['ms'] >= 50)",
+    ])
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True,
+                            env={**os.environ, "LOAN_ENGINE_PROFILE": "log", "PYTHONPATH": str(REPO_ROOT)})
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == ["True"]
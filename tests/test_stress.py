@@ -0,0 +1,73 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from loan_engine.batch import calculate_loan_batch, formula_pcts  # noqa: E402
+from loan_engine.rules import loan_formulas  # noqa: E402
+from loan_engine.stress import (arm_note_rates, arm_structures, float_down_note_rates, rate_paths, stress_test,  # noqa: E402
+                                unit_payment_paths)
+
+INITIAL_RATE = 6.5
+FORMULAS = [label for label in loan_formulas if label.split(" ")[0] in ("C.3.0", "C.10.6", "HB.20.0")]
+
+
+def unit_payment(rate, months):
+    monthly_interest_rate = rate / 1200
+    return monthly_interest_rate / (1 - (1 + monthly_interest_rate) ** -months)
+
+
+# Volatile paths so the caps bind on many of them
+def volatile_paths(months=360, num_paths=400):
+    return rate_paths(num_paths, months, INITIAL_RATE - 2.75, volatility=4.0, seed=11)
+
+
+@pytest.mark.parametrize("structure", sorted(arm_structures))
+def test_arm_rates_respect_every_cap_on_every_path(structure):
+    arm = arm_structures[structure]
+    note_rates = arm_note_rates(volatile_paths(), INITIAL_RATE, **arm)
+    fixed_months, adjust_months = arm["fixed_months"], arm["adjust_months"]
+    assert (note_rates[:fixed_months] == INITIAL_RATE).all()
+
+    resets = note_rates[fixed_months::adjust_months]
+    changes = np.abs(np.diff(np.vstack([note_rates[:1], resets]), axis=0))
+    assert (changes[0] <= arm["initial_cap"] + 1e-12).all()
+    assert (changes[1:] <= arm["periodic_cap"] + 1e-12).all()
+    assert (note_rates <= INITIAL_RATE + arm["lifetime_cap"] + 1e-12).all()
+    assert (note_rates >= arm["margin"] - 1e-12).all()
+    assert changes[0].max() == pytest.approx(arm["initial_cap"])  # the paths are volatile enough to hit the cap
+    for month in range(fixed_months, note_rates.shape[0]):  # rates only move at resets
+        if (month - fixed_months) % adjust_months:
+            np.testing.assert_array_equal(note_rates[month], note_rates[month - 1])
+
+
+@pytest.mark.parametrize("structure", sorted(arm_structures))
+def test_payments_never_exceed_the_lifetime_cap_payment(structure):
+    arm = arm_structures[structure]
+    payments = unit_payment_paths(arm_note_rates(volatile_paths(), INITIAL_RATE, **arm))
+    np.testing.assert_allclose(payments[0], unit_payment(INITIAL_RATE, 360))
+    assert (payments <= unit_payment(INITIAL_RATE + arm["lifetime_cap"], 360) * (1 + 1e-9)).all()
+
+
+def test_float_down_only_ever_lowers_the_rate():
+    note_rates = float_down_note_rates(volatile_paths(), INITIAL_RATE, 2.75)
+    assert (note_rates <= INITIAL_RATE).all()
+    assert (note_rates == note_rates[0]).all()  # one rate for the whole term
+    assert (note_rates[0] < INITIAL_RATE).any() and (note_rates[0] == INITIAL_RATE).any()
+
+
+def test_stress_test_payments_scale_by_formula_and_stay_capped():
+    arm = arm_structures["5/6"]
+    result = stress_test(600000.0, INITIAL_RATE, formulas=FORMULAS, property_tax=4800.0, num_paths=2000, volatility=3.0)
+    loan_amount = result["loan_amount"]
+    escrow = 4800.0 / 12
+    ceiling = loan_amount * unit_payment(INITIAL_RATE + arm["lifetime_cap"], 360) + escrow
+    assert (result["peak_payment_percentiles"] <= ceiling[:, None] + 1e-6).all()
+    assert (result["payment_percentiles"] <= ceiling[:, None, None] + 1e-6).all()
+    assert (result["note_rate_percentiles"] <= INITIAL_RATE + arm["lifetime_cap"]).all()
+
+    fixed = stress_test(600000.0, INITIAL_RATE, formulas=FORMULAS, structure="fixed", property_tax=4800.0, num_paths=50)
+    expected = calculate_loan_batch(600000.0, 30, INITIAL_RATE, *formula_pcts(FORMULAS, loan_formulas), property_tax=4800.0)["total_monthly_payment"]
+    np.testing.assert_allclose(fixed["payment_percentiles"], np.broadcast_to(expected[:, None, None], fixed["payment_percentiles"].shape))
+
+    with pytest.raises(ValueError, match="unknown structure"):
+        stress_test(600000.0, INITIAL_RATE, structure="3/1")
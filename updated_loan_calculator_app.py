@@ -1,62 +1,17 @@
+from loan_engine.instrumentation import page_profiler
 
-//import streamlit as st
-
-# Loan formula setup and max limits
-loan_formulas = {
-    "C.3.0 – 3% down with closing costs out of pocket": {"down_payment": 3, "seller_concession": 0, "max_ltv": 97},
-    "C.3.3 – 3% down with 3% seller credit towards closing costs": {"down_payment": 3, "seller_concession": 3, "max_ltv": 97},
-    "C.5.0 – Low out of pocket with 5% down and 0% seller credit": {"down_payment": 5, "seller_concession": 0, "max_ltv": 95},
-    "C.5.3 – Low out of pocket with 5% down and 3% seller credit": {"down_payment": 5, "seller_concession": 3, "max_ltv": 95},
-    "C.10.0 – Optimized combo with 10% down and 0% seller credit": {"down_payment": 10, "seller_concession": 0, "max_ltv": 90},
-    "C.10.6 – Optimized combo with 10% down and 6% seller credit": {"down_payment": 10, "seller_concession": 6, "max_ltv": 90},
-    "C.15.0 – Investment property with 15% down and 0% seller credit": {"down_payment": 15, "seller_concession": 0, "max_ltv": 85},
-    "C.15.2 – Investment property with minimum down and 2% seller credit": {"down_payment": 15, "seller_concession": 2, "max_ltv": 85},
-    "C.15.6 – Special investment with 15% down and 6% seller credit": {"down_payment": 15, "seller_concession": 6, "max_ltv": 85},
-    "C.20.0 – Investment property with 20% down and 0% seller credit": {"down_payment": 20, "seller_concession": 0, "max_ltv": 80},
-    "C.20.2 – Investment property with 20% down and 2% seller credit": {"down_payment": 20, "seller_concession": 2, "max_ltv": 80},
-    "C.20.6 – Investment property with 20% down and 6% seller credit": {"down_payment": 20, "seller_concession": 6, "max_ltv": 80},
-    "C.25.0 – Investment property with 25% down and 0% seller credit": {"down_payment": 25, "seller_concession": 0, "max_ltv": 75},
-    "C.25.2 – Investment property with 25% down and 2% seller credit": {"down_payment": 25, "seller_concession": 2, "max_ltv": 75},
-    "C.25.6 – Investment property with 25% down and 6% seller credit": {"down_payment": 25, "seller_concession": 6, "max_ltv": 75},
-    "HB.10.0 – High-balance formula with 10% down and 0% seller credit": {"down_payment": 10, "seller_concession": 0, "max_ltv": 90},
-    "HB.10.6 – High-balance formula with 10% down and 6% seller credit": {"down_payment": 10, "seller_concession": 6, "max_ltv": 90},
-    "HB.15.0 – High-balance formula with 15% down and 0% seller credit": {"down_payment": 15, "seller_concession": 0, "max_ltv": 85},
-    "HB.15.6 – High-balance formula with 15% down and 6% seller credit": {"down_payment": 15, "seller_concession": 6, "max_ltv": 85},
-    "HB.20.0 – High-balance formula with 20% down and 0% seller credit": {"down_payment": 20, "seller_concession": 0, "max_ltv": 80},
-    "HB.20.6 – High-balance formula with 20% down and 6% seller credit": {"down_payment": 20, "seller_concession": 6, "max_ltv": 80},
-    "HB.25.0 – High-balance formula with 25% down and 0% seller credit": {"down_payment": 25, "seller_concession": 0, "max_ltv": 75},
-    "HB.25.6 – High-balance formula with 25% down and 6% seller credit": {"down_payment": 25, "seller_concession": 6, "max_ltv": 75},
-    "HB.25.9 – High-balance formula with 25% down and 9% seller credit": {"down_payment": 25, "seller_concession": 9, "max_ltv": 75}
-}
-
-# **Loan Limits for Conforming & High-Balance Loans**
-loan_limits = {
-    1: {"conforming": 806500, "high_balance": 1209750},
-    2: {"conforming": 1032650, "high_balance": 1548975},
-    3: {"conforming": 1248150, "high_balance": 1872225},
-    4: {"conforming": 1551250, "high_balance": 2326875}
-}
-
-# Function to calculate loan details
-def calculate_loan(purchase_price, loan_term, interest_rate, down_payment_pct, seller_concession_pct, property_tax, home_insurance, flood_insurance):
-    total_sale_price = purchase_price / (1 - seller_concession_pct)
-    loan_amount = total_sale_price * (1 - down_payment_pct)
-    cash_to_close = total_sale_price * down_payment_pct
-
-    # Monthly mortgage calculation (PMT formula)
-    monthly_interest_rate = (interest_rate / 100) / 12
-    num_payments = loan_term * 12
-    monthly_payment = (monthly_interest_rate * loan_amount) / (1 - (1 + monthly_interest_rate) ** -num_payments)
-
-    # Escrow calculations (tax, insurance, flood insurance)
-    monthly_property_tax = property_tax / 12
-    monthly_home_insurance = home_insurance / 12
-    monthly_flood_insurance = flood_insurance / 12
-
-    # Total monthly payment
-    total_monthly_payment = monthly_payment + monthly_property_tax + monthly_home_insurance + monthly_flood_insurance
-
-    return total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment
+profiler = page_profiler(__file__)  # no-op unless LOAN_ENGINE_PROFILE is set
+
+import streamlit as st
+
+import loan_engine as engine
+from loan_engine.graph import DependencyGraph
+
+engine.watch_rules()  # swaps edits of the rule configuration file into engine.ruleset() without a restart
+rules = engine.ruleset("calculator")  # rule tables shared by every page and session in the process
+loan_formulas, loan_limits = rules.loan_formulas, rules.loan_limits
+
+profiler.checkpoint("imports")
 
 # Streamlit UI setup
 st.title("🏡 Home Affordability Calculator")
@@ -82,6 +37,7 @@ max_loan_limit = loan_limits[num_units]["high_balance"]
 
 loan_options = [key for key, values in loan_formulas.items()]
 selected_formula = st.selectbox("📜 Loan Formula", loan_options)
+profiler.checkpoint("inputs")
 
 # Initialize session state variables if not already set
 if 'button_clicked' not in st.session_state:
@@ -97,9 +53,15 @@ if st.session_state.button_clicked:
     down_payment_pct = loan_formulas[selected_formula]["down_payment"] / 100
     seller_concession_pct = loan_formulas[selected_formula]["seller_concession"] / 100
 
-    total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment = calculate_loan(
-        purchase_price, loan_term, interest_rate, down_payment_pct, seller_concession_pct, property_tax, home_insurance, flood_insurance
+    # Only the graph nodes downstream of a changed input re-run; values carry over in st.session_state
+    results = DependencyGraph(state=st.session_state).evaluate(
+        purchase_price=purchase_price, loan_term=loan_term, interest_rate=interest_rate, down_payment_pct=down_payment_pct,
+        seller_concession_pct=seller_concession_pct, property_tax=property_tax, home_insurance=home_insurance,
+        flood_insurance=flood_insurance, formula=selected_formula, num_units=num_units, occupancy_type=occupancy_type,
+        loan_limits=loan_limits,
     )
+    total_sale_price, loan_amount, cash_to_close = results["total_sale_price"], results["loan_amount"], results["cash_to_close"]
+    monthly_payment, total_monthly_payment = results["monthly_payment"], results["total_monthly_payment"]
 
     st.write(f"Total Sale Price: ${total_sale_price:,.2f}")
     st.write(f"Loan Amount: ${loan_amount:,.2f}")
@@ -108,13 +70,13 @@ if st.session_state.button_clicked:
     st.write(f"Total Monthly Payment (Including Taxes & Insurance): ${total_monthly_payment:,.2f}")
 
     # Validate conforming formulas
-    if selected_formula.startswith("C") and loan_amount > loan_limits[num_units]["conforming"]:
+    if results["exceeds_conforming_limit"]:
         st.markdown(f'<div style="background-color:red; color:white; padding:10px; font-size:16px;">'
                     f'<strong>Loan amount (${loan_amount:,.2f}) exceeds the conforming limit for {num_units}-unit property (${loan_limits[num_units]["conforming"]:,.2f}).</strong></div>',
                     unsafe_allow_html=True)
 
         # Option to apply new down payment and recalculate
-        adjusted_down_payment_pct = ((loan_amount - loan_limits[num_units]["conforming"]) / total_sale_price) + down_payment_pct
+        adjusted_down_payment_pct = engine.adjusted_down_payment_pct(loan_amount, loan_limits[num_units]["conforming"], total_sale_price, down_payment_pct)
         new_cash_to_close = total_sale_price * adjusted_down_payment_pct
 
         st.session_state.adjusted_down_payment = adjusted_down_payment_pct
@@ -122,7 +84,7 @@ if st.session_state.button_clicked:
 
         if st.button(f"✅ Apply {adjusted_down_payment_pct:.2f}% Down Payment & Recalculate\nTotal Cash to Close: ${new_cash_to_close:,.2f}"):
             down_payment_pct = adjusted_down_payment_pct
-            total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment = calculate_loan(
+            total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment = engine.cached_calculate_loan(
                 purchase_price, loan_term, interest_rate, down_payment_pct, seller_concession_pct, property_tax, home_insurance, flood_insurance
             )
 
@@ -131,18 +93,14 @@ if st.session_state.button_clicked:
             st.write(f"Total Monthly Payment: ${total_monthly_payment:,.2f}")
 
         # Option to switch to the next eligible formula
-        next_formula = None
-        for key, values in loan_formulas.items():
-            if key != selected_formula and key.startswith("C") and (purchase_price * (1 - values["down_payment"] / 100)) <= loan_limits[num_units]["conforming"]:
-                next_formula = key
-                break
+        next_formula = rules.next_formula(purchase_price, selected_formula, num_units, "conforming")
 
         if next_formula:
             new_cash_to_close_next = total_sale_price * (loan_formulas[next_formula]["down_payment"] / 100)
             if st.button(f"🔄 Switch to {next_formula} (Eligible Formula)\nTotal Cash to Close: ${new_cash_to_close_next:,.2f}"):
                 selected_formula = next_formula
                 down_payment_pct = loan_formulas[next_formula]["down_payment"] / 100
-                total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment = calculate_loan(
+                total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment = engine.cached_calculate_loan(
                     purchase_price, loan_term, interest_rate, down_payment_pct, loan_formulas[next_formula]["seller_concession"] / 100, property_tax, home_insurance, flood_insurance
                 )
 
@@ -151,23 +109,19 @@ if st.session_state.button_clicked:
                 st.write(f"Total Monthly Payment: ${total_monthly_payment:,.2f}")
 
     # Validate high balance formulas
-    elif selected_formula.startswith("HB") and (loan_amount <= loan_limits[num_units]["conforming"] or loan_amount > loan_limits[num_units]["high_balance"]):
+    elif results["outside_high_balance_range"]:
         st.markdown(f'<div style="background-color:red; color:white; padding:10px; font-size:16px;">'
                     f'<strong>Loan amount (${loan_amount:,.2f}) exceeds the high-balance limit for {num_units}-unit property (${loan_limits[num_units]["high_balance"]:,.2f}) or is below the conforming limit (${loan_limits[num_units]["conforming"]:,.2f}).</strong></div>',
                     unsafe_allow_html=True)
 
-        next_formula = None
-        for key, values in loan_formulas.items():
-            if key != selected_formula and key.startswith("HB") and (loan_limits[num_units]["conforming"] < purchase_price * (1 - values["down_payment"] / 100) <= loan_limits[num_units]["high_balance"]):
-                next_formula = key
-                break
+        next_formula = rules.next_formula(purchase_price, selected_formula, num_units, "high_balance")
 
         if next_formula:
             new_cash_to_close_next = total_sale_price * (loan_formulas[next_formula]["down_payment"] / 100)
             if st.button(f"🔄 Switch to {next_formula} (Eligible Formula)\nTotal Cash to Close: ${new_cash_to_close_next:,.2f}"):
                 selected_formula = next_formula
                 down_payment_pct = loan_formulas[next_formula]["down_payment"] / 100
-                total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment = calculate_loan(
+                total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment = engine.cached_calculate_loan(
                     purchase_price, loan_term, interest_rate, down_payment_pct, loan_formulas[next_formula]["seller_concession"] / 100, property_tax, home_insurance, flood_insurance
                 )
 
@@ -176,12 +130,13 @@ if st.session_state.button_clicked:
                 st.write(f"Total Monthly Payment: ${total_monthly_payment:,.2f}")
 
     # Check if the loan amount exceeds the max loan limit
+    # The Apply/Switch buttons above may have recalculated loan_amount, so this check and the LTV check use the live values
     if loan_amount > max_loan_limit:
         st.markdown(f'<div style="background-color:red; color:white; padding:10px; font-size:16px;">'
                     f'<strong>{selected_formula} is ineligible because the loan amount (${loan_amount:,.2f}) exceeds the max loan limit (${max_loan_limit:,.2f}).</strong></div>',
                     unsafe_allow_html=True)
 
-        adjusted_down_payment = ((loan_amount - max_loan_limit) / total_sale_price * 100) + loan_formulas[selected_formula]["down_payment"]
+        adjusted_down_payment = engine.adjusted_down_payment_pct(loan_amount, max_loan_limit, total_sale_price, loan_formulas[selected_formula]["down_payment"] / 100) * 100
         new_cash_to_close = total_sale_price * (adjusted_down_payment / 100)
 
         st.session_state.adjusted_down_payment = adjusted_down_payment
@@ -189,7 +144,7 @@ if st.session_state.button_clicked:
 
         if st.button(f"✅ Apply {adjusted_down_payment:.2f}% Down Payment & Recalculate\nTotal Cash to Close: ${new_cash_to_close:,.2f}"):
             down_payment_pct = adjusted_down_payment / 100
-            total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment = calculate_loan(
+            total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment = engine.cached_calculate_loan(
                 purchase_price, loan_term, interest_rate, down_payment_pct, seller_concession_pct, property_tax, home_insurance, flood_insurance
             )
 
@@ -197,18 +152,14 @@ if st.session_state.button_clicked:
             st.write(f"Monthly Payment: ${monthly_payment:,.2f}")
             st.write(f"Total Monthly Payment: ${total_monthly_payment:,.2f}")
 
-        next_formula = None
-        for key, values in loan_formulas.items():
-            if key != selected_formula and (purchase_price * (1 - values["down_payment"] / 100)) <= max_loan_limit:
-                next_formula = key
-                break
+        next_formula = rules.next_formula(purchase_price, selected_formula, num_units, "max_loan_limit")
 
         if next_formula:
             new_cash_to_close_next = total_sale_price * (loan_formulas[next_formula]["down_payment"] / 100)
             if st.button(f"🔄 Switch to {next_formula} (Eligible Formula)\nTotal Cash to Close: ${new_cash_to_close_next:,.2f}"):
                 selected_formula = next_formula
                 down_payment_pct = loan_formulas[next_formula]["down_payment"] / 100
-                total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment = calculate_loan(
+                total_sale_price, loan_amount, cash_to_close, monthly_payment, total_monthly_payment = engine.cached_calculate_loan(
                     purchase_price, loan_term, interest_rate, down_payment_pct, loan_formulas[next_formula]["seller_concession"] / 100, property_tax, home_insurance, flood_insurance
                 )
 
@@ -219,22 +170,121 @@ if st.session_state.button_clicked:
     # Check LTV limits based on occupancy type
     ltv = (loan_amount / total_sale_price) * 100
 
-    if occupancy_type == "Primary Residence":
-        if ltv > 90:
-            max_seller_concession = 0.03
-        else:
-            max_seller_concession = 0.06
-    elif occupancy_type == "Second Home":
-        if ltv > 90:
-            st.markdown(f'<div style="background-color:red; color:white; padding:10px; font-size:16px;">'
-                        f'<strong>Selected formula is not allowed for Second Home with LTV exceeding 90%.</strong></div>',
-                        unsafe_allow_html=True)
-        else:
-            max_seller_concession = 0.06
-    elif occupancy_type == "Investment Property":
-        max_seller_concession = 0.02
-
-    if seller_concession_pct > max_seller_concession:
+    max_seller_concession = engine.max_seller_concession(occupancy_type, ltv)
+    if max_seller_concession is None:
+        st.markdown(f'<div style="background-color:red; color:white; padding:10px; font-size:16px;">'
+                    f'<strong>Selected formula is not allowed for {occupancy_type} with LTV exceeding 90%.</strong></div>',
+                    unsafe_allow_html=True)
+    elif seller_concession_pct > max_seller_concession:
         st.markdown(f'<div style="background-color:red; color:white; padding:10px; font-size:16px;">'
                     f'<strong>Seller concession exceeds the allowed limit for {occupancy_type}.</strong></div>',
                     unsafe_allow_html=True)
+
+    with st.expander("🔁 Recompute trace"):
+        st.write(f"Nodes re-evaluated this run: {', '.join(st.session_state.loan_graph['trace']) or 'none'}")
+
+profiler.checkpoint("calculation")
+
+# Evaluate all: every formula scored against the loan limits, LTV limits and seller-concession rules at once.
+# A toggle rather than an expander: an expander body runs on every rerun even when collapsed, and this one
+# imports pandas/NumPy.
+if st.toggle("🏆 Compare All Formulas"):
+    import pandas as pd
+
+    from loan_engine.scenarios import rank_formulas
+    from loan_engine.shared_tables import published_rule_tables
+
+    # With LOAN_ENGINE_TABLES set, every server process ranks against the one published, memory-mapped version
+    published = published_rule_tables()
+    tables = published.ranking_tables() if published else {"loan_formulas": loan_formulas, "loan_limits": loan_limits, "ltv_limits": rules.ltv_limits}
+    rank_by = st.radio("Rank by", ["Cash to Close", "Total Monthly Payment"], horizontal=True)
+    ranking = rank_formulas(
+        {"occupancy": occupancy_type, "units": num_units, "price": purchase_price, "term": loan_term, "rate": interest_rate,
+         "tax": property_tax, "insurance": home_insurance, "flood": flood_insurance},
+        sort_by="cash_to_close" if rank_by == "Cash to Close" else "total_monthly_payment", **tables,
+    )
+    ranking_table = pd.DataFrame({
+        "Formula": ranking["formula"],
+        "Eligible": ranking["eligible"],
+        "Cash to Close": ranking["cash_to_close"],
+        "Total Monthly Payment": ranking["total_monthly_payment"],
+        "Loan Amount": ranking["loan_amount"],
+        "LTV (%)": ranking["ltv"],
+    })
+    st.write(f"{int(ranking['eligible'].sum())} of {len(ranking_table)} formulas are eligible for this scenario.")
+    st.dataframe(
+        ranking_table,
+        hide_index=True,
+        column_config={
+            "Cash to Close": st.column_config.NumberColumn(format="$%.2f"),
+            "Total Monthly Payment": st.column_config.NumberColumn(format="$%.2f"),
+            "Loan Amount": st.column_config.NumberColumn(format="$%.2f"),
+            "LTV (%)": st.column_config.NumberColumn(format="%.2f"),
+        },
+    )
+
+profiler.checkpoint("compare all formulas")
+
+# Rate sensitivity: payment grid over rate x price (or rate x formula) in one vectorized pass, built only while
+# the toggle is on
+if st.toggle("📈 Rate Sensitivity"):
+    import altair as alt
+    import numpy as np
+    import pandas as pd
+
+    from loan_engine.sensitivity import grid_axis, rate_formula_grid, rate_price_grid
+
+    sens_col1, sens_col2, sens_col3 = st.columns([1, 1, 1])
+    with sens_col1:
+        sensitivity_axis = st.radio("Compare rates against", ["Price", "Formula"], horizontal=True)
+        rate_steps = int(st.number_input("Rate steps", min_value=2, max_value=200, step=1, value=9))
+    with sens_col2:
+        rate_from = float(st.number_input("Rate from (%)", min_value=0.0, max_value=15.0, step=0.125, value=max(interest_rate - 1.0, 0.0), format="%.3f"))
+        rate_to = float(st.number_input("Rate to (%)", min_value=0.0, max_value=15.0, step=0.125, value=interest_rate + 1.0, format="%.3f"))
+    with sens_col3:
+        price_steps = int(st.number_input("Price steps", min_value=2, max_value=200, step=1, value=9, disabled=sensitivity_axis != "Price"))
+        price_spread = float(st.number_input("Price spread (±%)", min_value=1.0, max_value=90.0, step=5.0, value=20.0, disabled=sensitivity_axis != "Price"))
+
+    # Grid and heatmap rows cached on their inputs: reruns that leave them unchanged (any other widget on the
+    # page) reuse the result instead of rebuilding a grid of up to 200 x 200 payments
+    @st.cache_data(max_entries=32, show_spinner=False)
+    def sensitivity_grid(sensitivity_axis, rate_from, rate_to, rate_steps, price_steps, price_spread, purchase_price, loan_term,
+                         formula, property_tax, home_insurance, flood_insurance, loan_formulas):
+        rates = grid_axis(rate_from, rate_to, rate_steps)
+        if sensitivity_axis == "Price":
+            columns = grid_axis(purchase_price * (1 - price_spread / 100), purchase_price * (1 + price_spread / 100), price_steps, 0)
+            grid = rate_price_grid(rates, columns, loan_term, loan_formulas[formula]["down_payment"] / 100,
+                                   loan_formulas[formula]["seller_concession"] / 100, property_tax, home_insurance, flood_insurance)
+            column_labels = [f"${price:,.0f}" for price in columns]
+        else:
+            column_labels = [key.split(" ")[0] for key in loan_formulas]
+            grid = rate_formula_grid(rates, list(loan_formulas), purchase_price, loan_term, property_tax, home_insurance, flood_insurance,
+                                     loan_formulas=loan_formulas)
+        rate_labels = [f"{rate:.3f}%" for rate in rates]
+        heatmap_data = pd.DataFrame({
+            "Rate": np.repeat(rate_labels, len(column_labels)),
+            sensitivity_axis: np.tile(column_labels, len(rate_labels)),
+            "Total Monthly Payment": grid.ravel(),
+        })
+        return rate_labels, column_labels, grid, heatmap_data
+
+    rate_labels, column_labels, grid, heatmap_data = sensitivity_grid(
+        sensitivity_axis, rate_from, rate_to, rate_steps, price_steps, price_spread, purchase_price, loan_term, selected_formula,
+        property_tax, home_insurance, flood_insurance, loan_formulas,
+    )
+    st.altair_chart(
+        alt.Chart(heatmap_data).mark_rect().encode(
+            x=alt.X(f"{sensitivity_axis}:O", sort=column_labels),
+            y=alt.Y("Rate:O", sort=rate_labels),
+            color=alt.Color("Total Monthly Payment:Q", scale=alt.Scale(scheme="redyellowgreen", reverse=True)),
+            tooltip=["Rate", sensitivity_axis, alt.Tooltip("Total Monthly Payment:Q", format="$,.2f")],
+        ),
+        width="stretch",
+    )
+    st.dataframe(
+        pd.DataFrame(grid, index=rate_labels, columns=column_labels),
+        column_config={label: st.column_config.NumberColumn(format="$%.2f") for label in column_labels},
+    )
+
+profiler.checkpoint("rate sensitivity")
+profiler.finish()